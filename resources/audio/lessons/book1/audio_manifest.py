@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频清单
+功能：
+1. 扫描 resources/audio/lessons 下所有MP3，只读帧头（见 mp3_header.py）得到 时长、比特率、声道数、采样率
+2. 记录文件大小和内容哈希（SHA-256），路径与课文JSON中的 audio 字段相同（相对仓库根目录）
+3. 多进程并行；大小和修改时间未变的文件直接沿用上次的结果
+4. 输出为一个JSON（前端可以直接 fetch）或 SQLite 数据库（按扩展名 .sqlite / .db 选择）
+
+用法: python audio_manifest.py [--root resources/audio/lessons] [--output resources/audio/manifest.json] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from build_cache import file_digest
+from mp3_header import read_mp3_info
+
+
+# 仓库根目录（与 audio_processor.py 相同；这里不导入它，清单工具不需要 pydub）
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+
+MANIFEST_VERSION = 1
+SQLITE_EXTENSIONS = ('.sqlite', '.db')
+
+# 清单中每个文件的字段（SQLite 的列顺序）
+ENTRY_FIELDS = (
+    'size', 'mtime_ns', 'sha256', 'duration_ms', 'bitrate_kbps',
+    'channels', 'sample_rate', 'vbr', 'error'
+)
+
+
+def scan_mp3_files(root):
+    """递归查找MP3，返回 [(路径, stat)]，按路径排序"""
+    found = []
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith('.mp3') and entry.is_file():
+                    found.append((entry.path, entry.stat()))
+    return sorted(found)
+
+
+def inspect_file(path):
+    """读取一个文件的帧头信息和哈希，解析失败时记录错误"""
+    stat = os.stat(path)
+    entry = dict.fromkeys(ENTRY_FIELDS)
+    entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=file_digest(path))
+    try:
+        info = read_mp3_info(path)
+        entry.update((key, info[key]) for key in ('duration_ms', 'bitrate_kbps', 'channels', 'sample_rate', 'vbr'))
+    except (OSError, ValueError) as e:
+        entry['error'] = str(e)
+    return entry
+
+
+def load_manifest(path):
+    """读取已有的清单，返回 {相对路径: 条目}（不存在或格式不符时为空）"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        if path.endswith(SQLITE_EXTENSIONS):
+            with sqlite3.connect(path) as db:
+                rows = db.execute(f"SELECT path, {', '.join(ENTRY_FIELDS)} FROM audio_files").fetchall()
+            files = {}
+            for row in rows:
+                entry = dict(zip(ENTRY_FIELDS, row[1:]))
+                entry['vbr'] = None if entry['vbr'] is None else bool(entry['vbr'])
+                files[row[0]] = entry
+            return files
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data['files'] if data.get('version') == MANIFEST_VERSION else {}
+    except (OSError, ValueError, KeyError, sqlite3.Error):
+        return {}  # 清单损坏时全部重新读取
+
+
+def totals(files):
+    """清单的汇总信息"""
+    valid = [entry for entry in files.values() if entry['error'] is None]
+    return {
+        'files': len(files),
+        'errors': len(files) - len(valid),
+        'bytes': sum(entry['size'] for entry in files.values()),
+        'duration_ms': sum(entry['duration_ms'] for entry in valid),
+    }
+
+
+def save_manifest(path, files):
+    """写入清单（先写临时文件再替换）"""
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    if path.endswith(SQLITE_EXTENSIONS):
+        with sqlite3.connect(tmp_path) as db:
+            db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            db.execute(
+                "CREATE TABLE audio_files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT, "
+                "duration_ms INTEGER, bitrate_kbps INTEGER, channels INTEGER, sample_rate INTEGER, "
+                "vbr INTEGER, error TEXT)"
+            )
+            db.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('version', str(MANIFEST_VERSION)),
+                ('generated_at', datetime.now().isoformat(timespec='seconds')),
+            ])
+            db.executemany(
+                f"INSERT INTO audio_files VALUES ({', '.join('?' * (len(ENTRY_FIELDS) + 1))})",
+                [(name, *(entry[key] for key in ENTRY_FIELDS)) for name, entry in sorted(files.items())]
+            )
+        db.close()
+    else:
+        data = {
+            'version': MANIFEST_VERSION,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'totals': totals(files),
+            'files': dict(sorted(files.items())),
+        }
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_manifest(root, previous, workers=1, repo_root=REPO_ROOT):
+    """扫描 root，返回 (新清单, 统计)；大小和修改时间未变的文件沿用 previous 中的条目"""
+    files = {}
+    changed = []
+    for path, stat in scan_mp3_files(root):
+        name = os.path.relpath(path, repo_root).replace(os.sep, '/')
+        entry = previous.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            files[name] = entry
+        else:
+            changed.append((name, path))
+
+    if changed:
+        paths = [path for _, path in changed]
+        if workers > 1 and len(changed) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                entries = list(pool.map(inspect_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+        else:
+            entries = [inspect_file(path) for path in paths]
+        files.update((name, entry) for (name, _), entry in zip(changed, entries))
+
+    stats = {
+        'reused': len(files) - len(changed),
+        'updated': len(changed),
+        'removed': len(set(previous) - set(files)),
+    }
+    return files, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成音频清单（只读MP3帧头，不解码）")
+    parser.add_argument('--root', default=os.path.join(REPO_ROOT, "resources", "audio", "lessons"), help="要扫描的目录")
+    parser.add_argument('--output', default=os.path.join(REPO_ROOT, "resources", "audio", "manifest.json"),
+                        help="清单文件（.json，或 .sqlite / .db 输出为 SQLite）")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument('--force', action='store_true', help="忽略已有的清单，全部重新读取")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    previous = {} if args.force else load_manifest(args.output)
+    files, stats = build_manifest(args.root, previous, max(1, args.workers))
+
+    if stats['updated'] or stats['removed'] or not os.path.exists(args.output):
+        save_manifest(args.output, files)
+        print(f"✅ 清单已保存: {args.output}")
+    else:
+        print("清单没有变化")
+
+    summary = totals(files)
+    print(f"文件: {summary['files']} 个 (沿用 {stats['reused']}, 更新 {stats['updated']}, 删除 {stats['removed']}), "
+          f"{summary['bytes'] / 1e6:.1f} MB, 总时长 {summary['duration_ms'] / 60000:.1f} 分钟, "
+          f"耗时 {time.perf_counter() - start:.2f}s")
+    for name, entry in files.items():
+        if entry['error']:
+            print(f"❌ {name}: {entry['error']}")
+
+
+if __name__ == "__main__":
+    main()
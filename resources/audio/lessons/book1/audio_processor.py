@@ -13,26 +13,95 @@
 import os
 import re
 import shutil
+import argparse
+import atexit
+import json
 import logging
-import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
+from build_cache import BuildCache, params_digest
+from decoder import decode_mp3_to_wav, decoder_backend, open_mp3
+from encoder import ENCODER_BACKENDS, ENCODING_PROFILES, apply_channels, create_encoder, encoding_profile, resolve_backend
+from lesson_pipeline import DEFAULT_QUEUE_SIZE, LessonPipeline
+from publish import PUBLISH_MODES, publish_file, remove_stale
+from segment_classifier import KEEP_LABELS, classifier_params, classify_segments, mono_samples
+from run_report import PER_FILE, RunReport, file_entry, find_sampler, peak_rss_mb, start_queued_logging, timed
+from source_watcher import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, SourceWatcher
+from silence import MIN_GAP_MS, EnergyEnvelope, detect_nonsilent, select_cut_gaps, split_at_gaps
+from wav_stream import MappedWav, PcmAudio
+
+# 仓库根目录（本文件位于 resources/audio/lessons/book1/）
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+
+# 步骤4发布的文件名（只有这些文件会被当作过期输出删除）
+PUBLISHED_NAME = re.compile(r"\d+\.mp3$")
+
+# 按条目数切割时读取的课文文件及其中的列表字段
+COUNT_SOURCES = {
+    'words': ("words.json", "words"),
+    'dialogue': ("dialogue.json", "sentences"),
+}
+
+
+class RecordCollector(logging.Handler):
+    """在子进程中收集日志记录，交给主进程按提交顺序重放"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        # 提前格式化消息，保证记录可以跨进程传递
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def run_worker_job(state, method_name, args):
+    """进程池中执行单个文件任务，返回 (结果, 统计增量, 日志记录, 文件计时)"""
+    processor = AudioProcessor.for_worker(state)
+    result = getattr(processor, method_name)(*args)
+    return result, processor.stats, processor.logger.handlers[0].records, processor.file_timings
 
 
 class AudioProcessor:
-    def __init__(self, source_dir=".", log_level=logging.INFO):
+    # 只属于主进程的属性，不复制到子进程
+    LOCAL_ATTRS = ('logger', 'log_listener', 'log_sampler', 'report')
+
+    def __init__(self, source_dir=".", log_level=logging.INFO, workers=1):
         self.source_dir = source_dir
+        self.workers = max(1, workers)   # 步骤0和步骤3的并行进程数，1为串行
         self.setup_logging(log_level)
         
         # 配置参数
         self.min_silence_len = 500    # 静音最小长度（ms）
         self.silence_thresh = -40     # 静音判定阈值（dBFS）
-        self.book2_root = "/Users/nbxx/Documents/GitHub/GANADA_Korean/resources/audio/lessons/book2"
+        self.encoding_profile = "standard"  # 编码配置（见 encoder.py 的 ENCODING_PROFILES，用 set_encoding_profile 切换）
+        self.bitrate = "192k"         # MP3编码比特率
+        self.output_channels = None   # 输出声道数，None 保持原声道数
+        self.encoder_backend = "auto" # MP3编码后端: auto / ffmpeg-batch / lame / pydub（见 encoder.py）
+        self.force_rebuild = False    # 忽略增量缓存，全部重新处理
+        self.book2_root = os.path.join(REPO_ROOT, "resources", "audio", "lessons", "book2")  # 步骤4的目标根目录
+        self.publish_mode = "link"    # 步骤4发布方式: link 优先硬链接 / copy 生成独立文件（见 publish.py）
 
         # 音频切割参数（可通过set_split_params方法修改）
         self.split_min_silence_len = 1000  # 切割时的静音最小长度（ms）
         self.split_silence_thresh = -50    # 切割时的静音判定阈值（dBFS）
+        self.use_mmap = True               # 切割WAV时使用内存映射，峰值内存不随文件长度增长
+        self.use_pcm_cache = False         # 把MP3解码结果保留在 .pcm_cache/，重复运行时直接映射读取（否则解码到临时文件）
+
+        # 切割方式: silence 按上面的静音参数切割；count 按课文条目数选出最长的静音作为切点
+        self.split_mode = "silence"
+        self.count_source = "words"        # count 模式读取 words.json 的 words 或 dialogue.json 的 sentences
+        self.text_root = os.path.join(REPO_ROOT, "resources", "text", "lessons", "book2")
+
+        # 步骤1筛选方式: position 删除编号1、2并隔一个保留一个；features 按片段特征区分提示音/原音/跟读
+        # （见 segment_classifier.py，决策报告写入 log/ 下的 *_segments.jsonl）
+        self.segment_filter = "position"
         
         # 统计信息
         self.stats = {
@@ -41,9 +110,17 @@ class AudioProcessor:
             'moved_files': 0,
             'renamed_files': 0,
             'converted_files': 0,
-            'copied_files': 0
+            'copied_files': 0,
+            'unchanged_files': 0,
+            'removed_files': 0,
+            'cache_hits': 0,
+            'cache_misses': 0
         }
 
+        # 性能报告：run_all_steps / run_fused_steps 运行时记录，结束后写入 log/ 下的JSON
+        self.report = None
+        self.file_timings = []
+
     def setup_logging(self, log_level):
         """设置日志系统"""
         # 创建log目录
@@ -54,18 +131,114 @@ class AudioProcessor:
         timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
         log_file = os.path.join(log_dir, f"audio_processor_{timestamp}.txt")
         
-        # 配置日志格式
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        # 配置日志格式：写文件和控制台输出放到后台线程，不阻塞处理循环
+        self.log_file = log_file
+        self.log_listener = None
+        if logging.getLogger().handlers:
+            self.log_sampler = find_sampler()
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            handlers = [logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            self.log_listener, self.log_sampler = start_queued_logging(handlers, log_level)
+            atexit.register(self.log_listener.stop)
         self.logger = logging.getLogger(__name__)
         self.logger.info(f"音频处理工具启动 - 日志文件: {log_file}")
 
+    def set_log_sampling(self, every):
+        """逐文件日志（切割、删除、转换完成等）每 every 条输出1条，1为全部输出"""
+        self.log_sampler.every = max(1, every)
+
+    @classmethod
+    def for_worker(cls, state):
+        """在子进程中重建处理器：复制配置，日志只收集不输出，统计从0开始"""
+        processor = cls.__new__(cls)
+        processor.__dict__.update(state)
+        processor.stats = dict.fromkeys(state['stats'], 0)
+        processor.file_timings = []
+        processor.report = None
+
+        logger = logging.getLogger(f"{__name__}.worker")
+        logger.handlers = [RecordCollector()]
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        processor.logger = logger
+        return processor
+
+    def run_file_jobs(self, method_name, jobs):
+        """对每个任务调用 method_name(*args)，workers>1 时使用进程池
+
+        子进程的日志和统计会按提交顺序汇总回主进程，输出与串行执行相同。
+        """
+        if self.workers <= 1 or len(jobs) <= 1:
+            return [getattr(self, method_name)(*args) for args in jobs]
+
+        state = self.worker_state()
+        results = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+            futures = [pool.submit(run_worker_job, state, method_name, args) for args in jobs]
+            for future in futures:
+                results.append(self.merge_worker_result(*future.result()))
+        return results
+
+    def worker_state(self):
+        """复制到子进程的配置（见 for_worker）"""
+        return {key: value for key, value in self.__dict__.items()
+                if key not in self.LOCAL_ATTRS and key != 'file_timings'}
+
+    def merge_worker_result(self, result, stats, records, timings):
+        """重放子进程的日志，累加统计和文件计时，返回任务结果"""
+        for record in records:
+            if self.logger.isEnabledFor(record.levelno):
+                self.logger.handle(record)
+        for key, value in stats.items():
+            self.stats[key] += value
+        self.file_timings.extend(timings)
+        return result
+
+    @contextmanager
+    def report_step(self, name):
+        """记录一个步骤的耗时，并把期间的文件计时归入该步骤（没有在生成报告时什么也不做）"""
+        if self.report is None:
+            yield
+            return
+        with self.report.step(name):
+            try:
+                yield
+            finally:
+                self.report.add_files(self.file_timings)
+                self.file_timings = []
+
+    def start_report(self, mode):
+        """开始记录性能报告"""
+        self.report = RunReport(mode)
+        self.file_timings = []
+
+    def save_report(self):
+        """写出性能报告JSON，返回路径"""
+        self.report.add_files(self.file_timings)
+        self.file_timings = []
+        self.report.finish(self.stats, self.log_sampler.dropped)
+        report_path = os.path.splitext(self.log_file)[0] + "_report.json"
+        self.report.save(report_path)
+        self.logger.info(f"性能报告: {report_path}")
+        return report_path
+
+    def set_encoding_profile(self, name):
+        """切换步骤3的编码配置（比特率和声道数）
+
+        步骤2-4和课文JSON都使用 .mp3 文件名，所以这里只接受MP3配置；
+        Opus/AAC 的体积和质量可以用 encoding_report.py 比较
+        """
+        profile = encoding_profile(name)
+        if profile['codec'] != "mp3":
+            raise ValueError(f"编码配置 {name} 不是MP3，步骤3只支持: {', '.join(mp3_profiles())}")
+        self.encoding_profile = name
+        self.bitrate = profile['bitrate']
+        self.output_channels = profile['channels']
+        self.logger.info(f"编码配置: {name} ({self.bitrate}, {'单声道' if self.output_channels == 1 else '原声道'})")
+
     def set_split_params(self, min_silence_len=800, silence_thresh=-35):
         """设置音频切割参数
 
@@ -82,115 +255,109 @@ class AudioProcessor:
         self.logger.info(f"切割参数已更新: 静音长度={min_silence_len}ms, 阈值={silence_thresh}dBFS")
 
     def convert_mp3_to_wav(self, mp3_file, wav_file):
-        """使用 macOS 自带的 afconvert 转换 MP3 到 WAV"""
+        """把MP3解码为16bit/44.1kHz WAV（跨平台，不依赖 afconvert）"""
         try:
-            cmd = ['afconvert', '-f', 'WAVE', '-d', 'LEI16@44100', mp3_file, wav_file]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                self.logger.info(f"✅ MP3转WAV成功: {mp3_file} -> {wav_file}")
-                return True
-            else:
-                self.logger.error(f"❌ MP3转WAV失败: {result.stderr}")
-                return False
+            decode_mp3_to_wav(mp3_file, wav_file)
+            self.logger.info(f"✅ MP3转WAV成功: {mp3_file} -> {wav_file}")
+            return True
         except Exception as e:
             self.logger.error(f"❌ MP3转WAV出错: {e}")
             return False
 
+    def pcm_cache_dir(self):
+        """MP3解码缓存目录，未启用时返回None"""
+        return os.path.join(self.source_dir, ".pcm_cache") if self.use_pcm_cache else None
+
     def prepare_audio_files(self):
-        """准备音频文件：自动将MP3转换为WAV（如果需要）"""
+        """准备音频文件：检查MP3解码器（MP3在切割时分块解码成WAV再内存映射读取）"""
         self.logger.info("=" * 60)
-        self.logger.info("准备音频文件: 检查并转换MP3为WAV")
+        self.logger.info("准备音频文件: 检查MP3解码器")
         self.logger.info("=" * 60)
 
-        # 查找需要转换的 MP3 文件
-        mp3_pattern = re.compile(r"(\d\d-\d\d)\.mp3$")
-        wav_pattern = re.compile(r"(\d\d-\d\d)_original\.wav$")
-
-        # 获取现有的WAV文件列表
-        existing_wav = set()
-        for filename in os.listdir(self.source_dir):
-            match = wav_pattern.match(filename)
-            if match:
-                existing_wav.add(match.group(1))  # 添加前缀，如 "10-02"
-
-        # 查找需要转换的MP3文件
-        mp3_to_convert = []
-        for filename in os.listdir(self.source_dir):
-            match = mp3_pattern.match(filename)
-            if match:
-                prefix = match.group(1)
-                if prefix not in existing_wav:
-                    mp3_to_convert.append(filename)
-
-        if not mp3_to_convert:
-            self.logger.info("所有MP3文件都已转换为WAV，无需重复转换")
+        mp3_files = [f for f in self.find_original_files() if f.endswith('.mp3')]
+        if not mp3_files:
+            self.logger.info("所有原始文件都是WAV，无需解码")
             return True
 
-        self.logger.info(f"找到 {len(mp3_to_convert)} 个MP3文件需要转换为WAV")
-
-        success_count = 0
-        for mp3_file in mp3_to_convert:
-            base_name = os.path.splitext(mp3_file)[0]
-            wav_file = f"{base_name}_original.wav"
-            mp3_path = os.path.join(self.source_dir, mp3_file)
-            wav_path = os.path.join(self.source_dir, wav_file)
+        backend = decoder_backend()
+        if backend is None:
+            self.logger.error("❌ 没有可用的MP3解码器，请安装 miniaudio（pip install miniaudio）或 ffmpeg")
+            return False
 
-            if self.convert_mp3_to_wav(mp3_path, wav_path):
-                success_count += 1
+        cache_dir = self.pcm_cache_dir()
+        cache_info = f"，PCM缓存目录: {cache_dir}" if cache_dir else ""
+        self.logger.info(f"找到 {len(mp3_files)} 个MP3文件，切割时使用 {backend} 直接解码{cache_info}")
+        return True
 
-        self.logger.info(f"MP3转WAV完成: {success_count}/{len(mp3_to_convert)} 个文件成功转换")
-        return success_count == len(mp3_to_convert)
+    def analyze_audio_file(self, filename, thresholds=None, min_silence_lens=None):
+        """分析音频文件的详细信息，帮助调试静音检测问题
 
-    def analyze_audio_file(self, filename):
-        """分析音频文件的详细信息，帮助调试静音检测问题"""
+        Args:
+            filename: 要分析的文件名
+            thresholds: 要比较的静音阈值列表(dBFS)，默认 [-20, -30, -40, -50, -60]
+            min_silence_lens: 要比较的最小静音长度列表(ms)，默认只用当前切割参数
+                所有组合共用同一个能量包络，只需读取和扫描一次音频
+        """
         file_path = os.path.join(self.source_dir, filename)
         if not os.path.exists(file_path):
             self.logger.error(f"文件不存在: {filename}")
             return
 
+        if thresholds is None:
+            thresholds = [-20, -30, -40, -50, -60]
+        if min_silence_lens is None:
+            min_silence_lens = [self.split_min_silence_len]
+
+        source = None
         try:
-            audio = AudioSegment.from_mp3(file_path)
+            source = self.open_source_audio(file_path)
+            envelope = source.envelope() if isinstance(source, PcmAudio) else EnergyEnvelope.from_audio_segment(source)
 
             print(f"\n{'='*50}")
             print(f"音频文件分析: {filename}")
             print(f"{'='*50}")
             print(f"基本信息:")
-            print(f"  - 长度: {len(audio)}ms ({len(audio)/1000:.1f}秒)")
-            print(f"  - 声道数: {audio.channels}")
-            print(f"  - 采样率: {audio.frame_rate}Hz")
-            print(f"  - 位深: {audio.sample_width*8}bit")
-            print(f"  - 最大音量: {audio.max_dBFS:.1f}dBFS")
-            print(f"  - RMS音量: {audio.dBFS:.1f}dBFS")
-
-            # 分析不同阈值下的静音检测结果
-            thresholds = [-20, -30, -40, -50, -60]
+            print(f"  - 长度: {len(envelope)}ms ({len(envelope)/1000:.1f}秒)")
+            print(f"  - 声道数: {source.channels}")
+            print(f"  - 采样率: {source.frame_rate}Hz")
+            print(f"  - 位深: {source.sample_width*8}bit")
+            print(f"  - 最大音量: {envelope.max_dBFS:.1f}dBFS")
+            print(f"  - RMS音量: {envelope.dBFS:.1f}dBFS")
+
+            # 分析不同阈值下的静音检测结果（最后一组用于检查是否完全无声）
+            grid = envelope.analyze_grid(thresholds, min_silence_lens)
             print(f"\n不同静音阈值的检测结果:")
-            for thresh in thresholds:
-                nonsilent_ranges = detect_nonsilent(
-                    audio,
-                    min_silence_len=self.split_min_silence_len,
-                    silence_thresh=thresh
-                )
-                print(f"  - 阈值 {thresh}dBFS: 检测到 {len(nonsilent_ranges)} 个片段")
-                if nonsilent_ranges:
-                    total_duration = sum(end - start for start, end in nonsilent_ranges)
-                    print(f"    总时长: {total_duration}ms ({total_duration/1000:.1f}秒)")
+            for min_silence_len in min_silence_lens:
+                if len(min_silence_lens) > 1:
+                    print(f"  最小静音长度 {min_silence_len}ms:")
+                for thresh in thresholds:
+                    count, total_duration = grid[(min_silence_len, thresh)]
+                    print(f"  - 阈值 {thresh}dBFS: 检测到 {count} 个片段")
+                    if count:
+                        print(f"    总时长: {total_duration}ms ({total_duration/1000:.1f}秒)")
 
             # 检查是否有实际的音频内容
-            if audio.max_dBFS < -60:
+            if envelope.max_dBFS < -60:
                 print(f"\n⚠️  警告: 音频音量极低，可能是:")
                 print(f"    1. 录音音量太小")
                 print(f"    2. 音频文件损坏")
                 print(f"    3. 音频格式问题")
-            elif len(detect_nonsilent(audio, min_silence_len=100, silence_thresh=-60)) == 0:
+            elif envelope.analyze_grid([-60], [100])[(100, -60)][0] == 0:
                 print(f"\n⚠️  警告: 即使用最低阈值(-60dBFS)也检测不到音频内容")
                 print(f"    可能是纯静音文件或文件损坏")
 
         except Exception as e:
             self.logger.error(f"分析文件 {filename} 失败: {e}")
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
 
-    def step0_split_audio_files(self):
-        """步骤0: 按静音切割原始音频文件"""
+    def step0_split_audio_files(self, lessons=None):
+        """步骤0: 按静音切割原始音频文件
+
+        Args:
+            lessons: 只处理这些课程（如 {"01"}），None 为全部
+        """
         # 首先准备音频文件（MP3转WAV）
         if not self.prepare_audio_files():
             self.logger.error("音频文件准备失败，无法继续切割")
@@ -201,90 +368,254 @@ class AudioProcessor:
         self.logger.info("=" * 60)
         self.logger.info(f"切割参数: 静音长度={self.split_min_silence_len}ms, 阈值={self.split_silence_thresh}dBFS")
 
-        # 查找原始音频文件（优先WAV，然后MP3）
+        original_files = self.find_original_files(lessons)
+        if not original_files:
+            self.logger.warning("未找到需要切割的原始音频文件（格式: XX-XX.mp3）")
+            return
+
+        self.logger.info(f"找到 {len(original_files)} 个原始音频文件需要切割")
+
+        if self.split_mode == "count":
+            # 同一课程的切点需要一起选择：先扫描所有文件的静音，再按课程分配切点
+            scans = self.run_file_jobs('scan_source_silences', [(filename,) for filename in original_files])
+            detected = self.plan_count_splits(dict(zip(original_files, scans)))
+            self.run_file_jobs('split_audio_file', [(filename, detected.get(filename, [])) for filename in original_files])
+        else:
+            self.run_file_jobs('split_audio_file', [(filename,) for filename in original_files])
+
+        self.logger.info(f"步骤0完成 - 切割生成: {self.stats['converted_files']} 个音频片段")
+        self.log_peak_memory()
+
+    def find_original_files(self, lessons=None):
+        """查找原始音频文件：同一前缀优先使用 XX-XX_original.wav，没有时使用 XX-XX.mp3
+
+        Args:
+            lessons: 只返回这些课程的原始文件（如 {"01"}），None 为全部
+        """
         wav_pattern = re.compile(r"(\d\d-\d\d)_original\.wav$")
         mp3_pattern = re.compile(r"(\d\d-\d\d)\.mp3$")
-        original_files = []
+        filenames = os.listdir(self.source_dir)
 
-        # 先查找WAV文件
-        for filename in os.listdir(self.source_dir):
+        wav_prefixes = set()
+        for filename in filenames:
+            match = wav_pattern.match(filename)
+            if match:
+                wav_prefixes.add(match.group(1))
+
+        original_files = []
+        for filename in filenames:
             if wav_pattern.match(filename):
                 original_files.append(filename)
-
-        # 如果没有WAV文件，查找MP3文件
-        if not original_files:
-            for filename in os.listdir(self.source_dir):
-                if mp3_pattern.match(filename):
+            else:
+                match = mp3_pattern.match(filename)
+                if match and match.group(1) not in wav_prefixes:
                     original_files.append(filename)
 
-        if not original_files:
-            self.logger.warning("未找到需要切割的原始音频文件（格式: XX-XX.mp3）")
-            return
+        if lessons is not None:
+            original_files = [f for f in original_files if self.source_prefix(f)[:2] in lessons]
+        return original_files
 
-        self.logger.info(f"找到 {len(original_files)} 个原始音频文件需要切割")
+    def open_source_audio(self, file_path):
+        """打开原始音频：MP3分块解码成WAV后内存映射，WAV优先使用内存映射，不支持的格式退回 AudioSegment"""
+        if file_path.endswith('.mp3'):
+            source, cached = open_mp3(file_path, self.pcm_cache_dir())
+            self.logger.debug(f"{'使用PCM缓存' if cached else '解码MP3'}: {file_path}")
+            return source
 
-        for filename in original_files:
+        if self.use_mmap:
+            try:
+                return MappedWav(file_path)
+            except ValueError as e:
+                self.logger.debug(f"内存映射不可用，改为整体加载: {e}")
+
+        return AudioSegment.from_wav(file_path)
+
+    def split_audio_file(self, filename, nonsilent_ranges=None):
+        """切割单个原始音频文件，返回生成的片段数
+
+        Args:
+            nonsilent_ranges: 已经确定的片段区间（count 模式），为None时按静音参数检测
+        """
+        if nonsilent_ranges is None:
             self.logger.info(f"处理文件: {filename}")
-            file_path = os.path.join(self.source_dir, filename)
+        file_path = os.path.join(self.source_dir, filename)
+        timing = self.begin_file_timing('split', filename, file_path)
+        source = None
 
-            try:
-                # 加载音频文件（支持WAV和MP3格式）
-                if filename.endswith('.wav'):
-                    audio = AudioSegment.from_wav(file_path)
-                else:
-                    audio = AudioSegment.from_mp3(file_path)
-                self.logger.info(f"音频信息: 长度={len(audio)}ms, 声道数={audio.channels}, 采样率={audio.frame_rate}Hz, 位深={audio.sample_width*8}bit")
+        try:
+            with timed(timing, 'decode'):
+                source = self.open_source_audio(file_path)
+            if nonsilent_ranges is None:
+                with timed(timing, 'detect'):
+                    nonsilent_ranges = self.detect_segments(filename, source)
+            if not nonsilent_ranges:
+                return 0
+
+            # 提取文件名前缀（如 "02-02"）
+            base_name = self.source_prefix(filename)
+
+            # 切割并保存每个片段
+            for i, (start, end) in enumerate(nonsilent_ranges, 1):
+                # 生成新文件名
+                new_filename = f"{base_name}_{i}.wav"
+                new_path = os.path.join(self.source_dir, new_filename)
+
+                # 导出音频片段（内存映射时直接从映射视图写出，不复制）
+                with timed(timing, 'write'):
+                    if isinstance(source, PcmAudio):
+                        source.export_segment(start, end, new_path)
+                    else:
+                        source[start:end].export(new_path, format="wav")
+                timing['bytes_written'] += os.path.getsize(new_path)
+
+                duration = end - start
+                self.logger.info(f"✅ 切割片段 {i}: {new_filename} (时长: {duration}ms)", extra=PER_FILE)
+                self.stats['converted_files'] += 1
+
+            return len(nonsilent_ranges)
+
+        except Exception as e:
+            self.logger.error(f"❌ 切割文件 {filename} 失败: {e}")
+            return 0
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    @staticmethod
+    def source_prefix(filename):
+        """原始文件名前缀，如 "02-02_original.wav" → "02-02" """
+        base_name = os.path.splitext(filename)[0]
+        if base_name.endswith('_original'):
+            base_name = base_name[:-9]  # 移除 "_original" 后缀
+        return base_name
+
+    def detect_segments(self, filename, source):
+        """检测原始音频中的非静音片段，返回 [start, end] 毫秒区间列表"""
+        envelope = self.source_envelope(source)
+
+        # 检测非静音片段
+        self.logger.info(f"使用静音检测参数: 最小静音长度={self.split_min_silence_len}ms, 静音阈值={self.split_silence_thresh}dBFS")
+        nonsilent_ranges = envelope.detect_nonsilent(
+            min_silence_len=self.split_min_silence_len,
+            silence_thresh=self.split_silence_thresh
+        )
+
+        if not nonsilent_ranges:
+            self.logger.warning(f"文件 {filename} 中未检测到非静音片段")
+        else:
+            self.logger.info(f"检测到 {len(nonsilent_ranges)} 个音频片段")
+        return nonsilent_ranges
+
+    def source_envelope(self, source):
+        """构建原始音频的能量包络，并记录音频信息和音量"""
+        mapped = isinstance(source, MappedWav)
+        self.logger.info(f"音频信息: 长度={len(source)}ms, 声道数={source.channels}, 采样率={source.frame_rate}Hz, 位深={source.sample_width*8}bit, 内存映射={'是' if mapped else '否'}")
+
+        # 一次性构建能量包络（内存映射时按块流式读取）
+        envelope = source.envelope() if isinstance(source, PcmAudio) else EnergyEnvelope.from_audio_segment(source)
 
-                # 计算音频的音量统计信息
-                max_dBFS = audio.max_dBFS
-                rms_dBFS = audio.dBFS
-                self.logger.info(f"音频音量: 最大音量={max_dBFS:.1f}dBFS, RMS音量={rms_dBFS:.1f}dBFS")
+        # 计算音频的音量统计信息
+        max_dBFS = envelope.max_dBFS
+        rms_dBFS = envelope.dBFS
+        self.logger.info(f"音频音量: 最大音量={max_dBFS:.1f}dBFS, RMS音量={rms_dBFS:.1f}dBFS")
 
-                # 如果音频太安静，给出警告
-                if max_dBFS < -50:
-                    self.logger.warning(f"⚠️  音频音量很低 (最大音量: {max_dBFS:.1f}dBFS)，可能需要调整静音阈值")
+        # 如果音频太安静，给出警告
+        if max_dBFS < -50:
+            self.logger.warning(f"⚠️  音频音量很低 (最大音量: {max_dBFS:.1f}dBFS)，可能需要调整静音阈值")
+        return envelope
 
-                # 检测非静音片段
-                self.logger.info(f"使用静音检测参数: 最小静音长度={self.split_min_silence_len}ms, 静音阈值={self.split_silence_thresh}dBFS")
-                nonsilent_ranges = detect_nonsilent(
-                    audio,
-                    min_silence_len=self.split_min_silence_len,
-                    silence_thresh=self.split_silence_thresh
-                )
+    def scan_source_silences(self, filename):
+        """count 模式：检测原始文件中所有不短于 MIN_GAP_MS 的静音，作为候选切点
 
-                if not nonsilent_ranges:
-                    self.logger.warning(f"文件 {filename} 中未检测到非静音片段")
-                    continue
+        Returns:
+            {'length': 音频长度ms, 'silences': [[start, end], ...]}，失败时返回None
+        """
+        self.logger.info(f"处理文件: {filename}")
+        file_path = os.path.join(self.source_dir, filename)
+        timing = self.begin_file_timing('scan', filename, file_path)
+        source = None
+        try:
+            with timed(timing, 'decode'):
+                source = self.open_source_audio(file_path)
+            with timed(timing, 'detect'):
+                envelope = self.source_envelope(source)
+                silences = envelope.detect_silence(min_silence_len=MIN_GAP_MS, silence_thresh=self.split_silence_thresh)
+            self.logger.info(f"候选切点: {len(silences)} 段静音 (≥{MIN_GAP_MS}ms, 阈值={self.split_silence_thresh}dBFS)")
+            return {'length': len(envelope), 'silences': silences}
+        except Exception as e:
+            self.logger.error(f"❌ 扫描文件 {filename} 失败: {e}")
+            return None
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    def expected_target_count(self, lesson_num):
+        """课程的目标条目数（words.json 的单词数或 dialogue.json 的句子数），读取失败时返回None"""
+        filename, key = COUNT_SOURCES[self.count_source]
+        path = os.path.join(self.text_root, f"lesson{int(lesson_num)}", filename)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return len(json.load(f)[key])
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"⚠️  无法读取课程 {lesson_num} 的条目数 ({path}): {e}")
+            return None
 
-                self.logger.info(f"检测到 {len(nonsilent_ranges)} 个音频片段")
+    def plan_count_splits(self, scans):
+        """count 模式：按课程的目标条目数在所有原始文件中选出最长的静音作为切点
+        读取不到条目数的课程，只从 MIN_GAP_MS 检测到的静音中保留不短于 split_min_silence_len 的作为切点
 
-                # 提取文件名前缀（如 "02-02"）
-                base_name = os.path.splitext(filename)[0]
-                if base_name.endswith('_original'):
-                    base_name = base_name[:-9]  # 移除 "_original" 后缀
+        Args:
+            scans: {原始文件名: scan_source_silences 的结果}
 
-                # 切割并保存每个片段
-                for i, (start, end) in enumerate(nonsilent_ranges, 1):
-                    segment = audio[start:end]
+        Returns:
+            {原始文件名: [[start, end], ...]}
+        """
+        lessons = {}
+        for filename in sorted(scans, key=self.source_prefix):
+            if scans[filename] is not None:
+                lessons.setdefault(self.source_prefix(filename)[:2], []).append(filename)
+
+        detected = {}
+        for lesson_num, filenames in sorted(lessons.items()):
+            sources = [(scans[f]['silences'], scans[f]['length']) for f in filenames]
+            target_count = self.expected_target_count(lesson_num)
+            if target_count is None:
+                # 没有课文数据时退回静音参数切割：只按 split_min_silence_len 过滤已用 MIN_GAP_MS 检测到的静音，
+                # 不会用配置的静音参数重新检测，结果与 silence 模式近似但不完全相同（见 select_cut_gaps）
+                for filename, (silences, length) in zip(filenames, sources):
+                    long_enough = [r for r in silences
+                                   if r[1] - r[0] >= self.split_min_silence_len and r[0] > 0 and r[1] < length]
+                    detected[filename] = split_at_gaps(silences, length, long_enough)
+                continue
 
-                    # 生成新文件名
-                    new_filename = f"{base_name}_{i}.wav"
-                    new_path = os.path.join(self.source_dir, new_filename)
+            segment_count = self.segments_for_targets(target_count, len(filenames))
+            chosen, weakest, strongest_rejected = select_cut_gaps(sources, segment_count - len(filenames))
+            self.logger.info(f"课程 {lesson_num}: {target_count} 个条目 → 需要 {segment_count} 个片段，"
+                             f"选中静音最短 {weakest}ms，未选中静音最长 {strongest_rejected}ms")
+            if weakest and strongest_rejected and weakest - strongest_rejected < MIN_GAP_MS:
+                self.logger.warning(f"⚠️  课程 {lesson_num} 的切点与未选中的静音长度接近，请检查切割结果")
 
-                    # 导出音频片段
-                    segment.export(new_path, format="wav")
+            for filename, (silences, length), gaps in zip(filenames, sources, chosen):
+                detected[filename] = split_at_gaps(silences, length, gaps)
+                self.logger.info(f"文件 {filename}: 切出 {len(detected[filename])} 个片段")
 
-                    duration = end - start
-                    self.logger.info(f"✅ 切割片段 {i}: {new_filename} (时长: {duration}ms)")
-                    self.stats['converted_files'] += 1
+            total = sum(len(detected[f]) for f in filenames)
+            if total != segment_count:
+                self.logger.warning(f"⚠️  课程 {lesson_num} 只切出 {total} 个片段（需要 {segment_count} 个），候选静音不足")
+        return detected
 
-            except Exception as e:
-                self.logger.error(f"❌ 切割文件 {filename} 失败: {e}")
+    def log_peak_memory(self):
+        """记录进程峰值内存"""
+        peak = peak_rss_mb()
+        if peak is not None:
+            self.logger.info(f"峰值内存: {peak:.1f}MB")
 
-        self.logger.info(f"步骤0完成 - 切割生成: {self.stats['converted_files']} 个音频片段")
+    def step1_filter_files(self, lessons=None):
+        """步骤1: 删除提示音并筛选文件
 
-    def step1_filter_files(self):
-        """步骤1: 删除提示音并筛选文件"""
+        Args:
+            lessons: 只处理这些课程（如 {"01"}），None 为全部
+        """
         self.logger.info("=" * 60)
         self.logger.info("步骤1: 删除提示音并筛选文件")
         self.logger.info("=" * 60)
@@ -293,6 +624,8 @@ class AudioProcessor:
         grouped_files = {}
         
         wav_files = [f for f in os.listdir(self.source_dir) if f.endswith('.wav')]
+        if lessons is not None:
+            wav_files = [f for f in wav_files if f[:2] in lessons]
         self.logger.info(f"找到 {len(wav_files)} 个WAV文件")
         
         for filename in wav_files:
@@ -302,38 +635,111 @@ class AudioProcessor:
                 continue
             
             prefix, num_str = match.groups()
-            num = int(num_str)
-            
-            # 删除提示音（编号为0,1,2）
-            if num in (0, 1, 2):
-                file_path = os.path.join(self.source_dir, filename)
-                os.remove(file_path)
-                self.stats['deleted_files'] += 1
-                self.logger.info(f"🗑️  删除提示音: {filename}")
-                continue
-            
-            # 存储有效文件
-            grouped_files.setdefault(prefix, []).append((num, filename))
+            grouped_files.setdefault(prefix, []).append((int(num_str), filename))
         
-        # 对每组文件执行"隔一个删除一个"逻辑
+        # 每组删除提示音和跟读（按编号隔一个删除一个，或按片段特征分类）
         for prefix, file_list in grouped_files.items():
             sorted_files = sorted(file_list, key=lambda x: x[0])
             self.logger.info(f"处理组 {prefix}: {len(sorted_files)} 个文件")
+            names = dict(sorted_files)
+            kept = set(self.filter_segments(prefix, list(names), lambda num: self.load_segment(names[num])))
             
-            for i, (num, filename) in enumerate(sorted_files):
+            for num, filename in sorted_files:
                 full_path = os.path.join(self.source_dir, filename)
-                if i % 2 == 0:
+                if num in kept:
                     self.stats['kept_files'] += 1
                     self.logger.debug(f"✅ 保留: {filename}")
                 else:
                     os.remove(full_path)
                     self.stats['deleted_files'] += 1
-                    self.logger.info(f"🗑️  删除: {filename}")
+                    prompt = num in (0, 1, 2) and self.segment_filter == "position"
+                    self.logger.info(f"🗑️  删除{'提示音' if prompt else ''}: {filename}", extra=PER_FILE)
         
         self.logger.info(f"步骤1完成 - 删除: {self.stats['deleted_files']} 个, 保留: {self.stats['kept_files']} 个")
 
-    def step2_reorganize_files(self):
-        """步骤2: 重新排序和分组文件"""
+    @staticmethod
+    def segments_for_targets(target_count, source_count):
+        """select_segments 的逆运算：每个原始文件开头2个提示音，每个条目录有原音和跟读两段"""
+        return 2 * source_count + 2 * target_count
+
+    @staticmethod
+    def select_segments(numbers):
+        """步骤1的筛选规则：删除提示音（编号0,1,2），剩余片段隔一个保留一个
+
+        Returns:
+            按编号排序的保留片段编号
+        """
+        remaining = sorted(num for num in numbers if num not in (0, 1, 2))
+        return remaining[::2]
+
+    def filter_segments(self, prefix, numbers, load):
+        """步骤1的筛选，返回保留的片段编号（按 segment_filter 选择规则）
+
+        Args:
+            prefix: 原始文件前缀（如 "02-01"）
+            numbers: 该文件所有片段的编号（从1开始，按时间顺序）
+            load: features 模式读取片段的函数，load(编号) -> (单声道样本, 采样率)
+        """
+        if self.segment_filter != "features":
+            return self.select_segments(numbers)
+
+        segments = [load(num) for num in numbers]
+        decisions = classify_segments([samples for samples, _ in segments], segments[0][1]) if segments else []
+        positional = set(self.select_segments(numbers))
+        for num, decision in zip(numbers, decisions):
+            decision['segment'] = num
+            decision['position_kept'] = num in positional
+        self.save_segment_decisions(prefix, decisions)
+
+        kept = [num for num, decision in zip(numbers, decisions) if decision['label'] in KEEP_LABELS]
+        labels = Counter(decision['label'] for decision in decisions)
+        differs = sum(1 for decision in decisions if (decision['label'] in KEEP_LABELS) != decision['position_kept'])
+        self.logger.info(f"片段分类 {prefix}: 提示音 {labels['prompt']}, 噪声 {labels['noise']}, "
+                         f"原音 {labels['target']}, 跟读 {labels['repeat']}"
+                         + (f"（与按位置筛选不同: {differs} 个）" if differs else ""))
+        if labels['target'] != labels['repeat']:
+            self.logger.warning(f"⚠️  {prefix} 有 {abs(labels['target'] - labels['repeat'])} 个原音没有配对的跟读，"
+                                f"请检查决策报告")
+        return kept
+
+    def load_segment(self, filename):
+        """读取源目录中的片段WAV，返回 (单声道样本, 采样率)"""
+        source = self.open_source_audio(os.path.join(self.source_dir, filename))
+        try:
+            return mono_samples(source), source.frame_rate
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    def save_segment_decisions(self, prefix, decisions):
+        """把一个原始文件的分类结果追加到决策报告（JSON Lines，每行一个原始文件；子进程也可以同时追加）"""
+        report_path = os.path.splitext(self.log_file)[0] + "_segments.jsonl"
+        line = json.dumps({'source': prefix, 'segments': decisions}, ensure_ascii=False) + "\n"
+        with open(report_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def classify_source_segments(self, filename, ranges):
+        """融合模式：从原始文件中按区间取出片段并分类，返回保留的片段编号"""
+        source = self.open_source_audio(os.path.join(self.source_dir, filename))
+        try:
+            return self.filter_segments(
+                self.source_prefix(filename),
+                list(range(1, len(ranges) + 1)),
+                lambda num: (mono_samples(source, *ranges[num - 1]), source.frame_rate)
+            )
+        except Exception as e:
+            self.logger.error(f"❌ 分类文件 {filename} 的片段失败: {e}")
+            return None
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    def step2_reorganize_files(self, lessons=None):
+        """步骤2: 重新排序和分组文件
+
+        Args:
+            lessons: 只处理这些课程（如 {"01"}），None 为全部
+        """
         self.logger.info("=" * 60)
         self.logger.info("步骤2: 重新排序和分组文件")
         self.logger.info("=" * 60)
@@ -342,6 +748,8 @@ class AudioProcessor:
         grouped_files = {}
 
         wav_files = [f for f in os.listdir(self.source_dir) if f.endswith('.wav')]
+        if lessons is not None:
+            wav_files = [f for f in wav_files if f[:2] in lessons]
         self.logger.info(f"处理 {len(wav_files)} 个WAV文件")
 
         # 按课程号分组文件
@@ -403,8 +811,12 @@ class AudioProcessor:
         end_trim = nonsilent_ranges[-1][1]
         return audio[start_trim:end_trim]
 
-    def step3_convert_to_mp3(self):
-        """步骤3: 转换WAV为MP3并去除静音（仅处理子文件夹中的文件）"""
+    def step3_convert_to_mp3(self, lessons=None):
+        """步骤3: 转换WAV为MP3并去除静音（仅处理子文件夹中的文件）
+
+        Args:
+            lessons: 只处理这些课程（如 {"01"}），None 为全部
+        """
         self.logger.info("=" * 60)
         self.logger.info("步骤3: 转换WAV为MP3并去除静音")
         self.logger.info("=" * 60)
@@ -412,7 +824,8 @@ class AudioProcessor:
         # 只处理数字命名的子文件夹
         lesson_folders = [f for f in os.listdir(self.source_dir)
                          if os.path.isdir(os.path.join(self.source_dir, f))
-                         and f.isdigit() and len(f) == 2]
+                         and f.isdigit() and len(f) == 2
+                         and (lessons is None or f in lessons)]
 
         total_files = 0
         for folder in lesson_folders:
@@ -422,34 +835,112 @@ class AudioProcessor:
 
         self.logger.info(f"找到 {len(lesson_folders)} 个课程文件夹，共 {total_files} 个WAV文件需要转换")
 
+        self.logger.info(f"MP3编码后端: {resolve_backend(self.encoder_backend)}")
+
+        # 按课程提交任务，同一课程的文件共用一个编码器（批量后端可以一次编码整个课程）
+        jobs = []
         for folder in lesson_folders:
             folder_path = os.path.join(self.source_dir, folder)
             wav_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.wav')]
 
             if wav_files:
-                self.logger.info(f"处理课程 {folder}: {len(wav_files)} 个文件")
+                jobs.append((folder, wav_files))
 
-            for filename in wav_files:
-                full_path = os.path.join(folder_path, filename)
-                try:
-                    self.logger.debug(f"🎵 处理: {folder}/{filename}")
+        self.run_file_jobs('convert_lesson_to_mp3', jobs)
+
+        self.logger.info(f"步骤3完成 - 转换: {self.stats['converted_files']} 个文件")
 
-                    audio = AudioSegment.from_wav(full_path)
-                    trimmed = self.trim_silence(audio)
+    def convert_lesson_to_mp3(self, folder, filenames):
+        """转换一个课程文件夹中的WAV为MP3，返回成功转换的数量"""
+        self.logger.info(f"处理课程 {folder}: {len(filenames)} 个文件")
+        timing = self.begin_file_timing('encode', folder)
+        converted = 0
+        with self.open_encoder() as encoder:
+            for filename in filenames:
+                converted += self.convert_wav_to_mp3(folder, filename, encoder, timing)
+            with timed(timing, 'encode'):
+                results = encoder.flush()
+            converted += self.report_encoded(results, timing)
+        return converted
+
+    def convert_wav_to_mp3(self, folder, filename, encoder, timing=None):
+        """提交单个WAV的编码，返回已完成编码的成功数量"""
+        full_path = os.path.join(self.source_dir, folder, filename)
+        timing = timing if timing is not None else self.begin_file_timing('encode', f"{folder}/{filename}")
+        try:
+            self.logger.debug(f"🎵 处理: {folder}/{filename}")
 
-                    mp3_path = os.path.splitext(full_path)[0] + ".mp3"
-                    trimmed.export(mp3_path, format="mp3", bitrate="192k")
+            with timed(timing, 'decode'):
+                audio = AudioSegment.from_wav(full_path)
+            timing['bytes_read'] += os.path.getsize(full_path)
+            with timed(timing, 'encode'):
+                results = self.encode_mp3(audio, os.path.splitext(full_path)[0] + ".mp3", encoder)
+            return self.report_encoded(results, timing)
 
-                    self.stats['converted_files'] += 1
-                    self.logger.info(f"✅ 转换完成: {folder}/{os.path.splitext(filename)[0]}.mp3")
+        except Exception as e:
+            self.logger.error(f"❌ 转换失败 {full_path}: {e}")
+            return 0
+
+    def begin_file_timing(self, step, name, path=None):
+        """新建一条文件计时记录（写入性能报告）"""
+        timing = file_entry(step, name, path)
+        self.file_timings.append(timing)
+        return timing
+
+    def open_encoder(self):
+        """按当前配置创建MP3编码器"""
+        return create_encoder(self.encoder_backend, self.bitrate)
+
+    def encode_mp3(self, audio, mp3_path, encoder):
+        """去除首尾静音并提交编码（步骤3和融合模式共用），返回已完成的 [(路径, 异常)]"""
+        trimmed = apply_channels(self.trim_silence(audio), self.output_channels)
+        return encoder.submit(trimmed, mp3_path)
+
+    def report_encoded(self, results, timing=None):
+        """记录编码器返回的结果，返回成功数量"""
+        converted = 0
+        for path, error in results:
+            name = os.path.relpath(path, self.source_dir)
+            if error is None:
+                converted += 1
+                self.stats['converted_files'] += 1
+                if timing is not None:
+                    timing['bytes_written'] += os.path.getsize(path)
+                self.logger.info(f"✅ 转换完成: {name}", extra=PER_FILE)
+            else:
+                self.logger.error(f"❌ 转换失败 {name}: {error}")
+        return converted
+
+    def split_params(self):
+        """影响片段检测结果的参数（用于增量缓存）"""
+        if self.split_mode == "count":
+            # count 模式缓存的是候选静音，切点每次按条目数重新选择
+            return {
+                'split_mode': self.split_mode,
+                'min_gap_len': MIN_GAP_MS,
+                'split_silence_thresh': self.split_silence_thresh
+            }
+        return {
+            'split_min_silence_len': self.split_min_silence_len,
+            'split_silence_thresh': self.split_silence_thresh
+        }
 
-                except Exception as e:
-                    self.logger.error(f"❌ 转换失败 {full_path}: {e}")
+    def encode_params(self):
+        """影响MP3输出的参数（用于增量缓存）"""
+        return {
+            'min_silence_len': self.min_silence_len,
+            'silence_thresh': self.silence_thresh,
+            'bitrate': self.bitrate,
+            'channels': self.output_channels,
+            'encoder': resolve_backend(self.encoder_backend)
+        }
 
-        self.logger.info(f"步骤3完成 - 转换: {self.stats['converted_files']} 个文件")
+    def step4_copy_to_target(self, lessons=None):
+        """步骤4: 发布MP3到目标目录（跳过未变化的文件，优先硬链接，全部发布成功后再删除过期文件）
 
-    def step4_copy_to_target(self):
-        """步骤4: 复制MP3到目标目录"""
+        Args:
+            lessons: 只处理这些课程（如 {"01"}），None 为全部
+        """
         self.logger.info("=" * 60)
         self.logger.info("步骤4: 复制MP3到目标目录")
         self.logger.info("=" * 60)
@@ -458,10 +949,15 @@ class AudioProcessor:
             self.logger.warning(f"目标根目录不存在: {self.book2_root}")
             return
         
-        for folder_name in os.listdir(self.source_dir):
+        actions = {}
+        cleanups = []  # [(目标目录, 保留的文件名, 课程文件夹)]
+        cache = BuildCache(self.source_dir)
+        for folder_name in sorted(os.listdir(self.source_dir)):
             folder_path = os.path.join(self.source_dir, folder_name)
             if not (os.path.isdir(folder_path) and folder_name.isdigit() and len(folder_name) == 2):
                 continue
+            if lessons is not None and folder_name not in lessons:
+                continue
             
             lesson_num = int(folder_name)
             lesson_folder = f"lesson{lesson_num}"
@@ -471,50 +967,387 @@ class AudioProcessor:
             # 创建目标目录
             os.makedirs(words_path, exist_ok=True)
             
-            # 复制MP3文件
-            mp3_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.mp3')]
-            self.logger.info(f"文件夹 {folder_name}: 复制 {len(mp3_files)} 个MP3文件")
+            # 发布MP3文件（每个文件先写临时名再替换）
+            mp3_files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith('.mp3'))
+            self.logger.info(f"文件夹 {folder_name}: 发布 {len(mp3_files)} 个MP3文件")
             
             for filename in mp3_files:
                 src_path = os.path.join(folder_path, filename)
                 dst_path = os.path.join(words_path, filename)
-                shutil.copy2(src_path, dst_path)
-                self.stats['copied_files'] += 1
-                self.logger.debug(f"📋 复制: {filename} → {lesson_folder}/words/")
+                action = publish_file(src_path, dst_path, self.publish_mode)
+                actions[action] = actions.get(action, 0) + 1
+                if action == "unchanged":
+                    self.stats['unchanged_files'] += 1
+                else:
+                    self.stats['copied_files'] += 1
+                    self.logger.debug(f"📋 {action}: {filename} → {lesson_folder}/words/", extra=PER_FILE)
+
+            # 保留集合取应该生成的文件而不是实际生成的文件：编码失败时保留上次发布的版本
+            expected = self.expected_outputs(folder_name, folder_path, cache)
+            if expected is None:
+                self.logger.warning(f"⚠️  课程 {folder_name} 的输出不完整，跳过删除过期发布")
+                continue
+            cleanups.append((words_path, expected | set(mp3_files), lesson_folder))
+
+        # 所有课程的文件都发布成功后（发布出错时异常会中止本步骤）才删除上次发布、本次不再生成的文件
+        for words_path, keep, lesson_folder in cleanups:
+            for name in remove_stale(words_path, keep, PUBLISHED_NAME):
+                self.stats['removed_files'] += 1
+                self.logger.info(f"🗑️  删除过期发布: {lesson_folder}/words/{name}")
         
-        self.logger.info(f"步骤4完成 - 复制: {self.stats['copied_files']} 个文件")
+        summary = ", ".join(f"{action} {count}" for action, count in sorted(actions.items()))
+        self.logger.info(f"步骤4完成 - 复制: {self.stats['copied_files']} 个文件, "
+                         f"未变化跳过: {self.stats['unchanged_files']} 个, 删除过期: {self.stats['removed_files']} 个"
+                         + (f" ({summary})" if summary else ""))
+
+    def expected_outputs(self, folder_name, folder_path, cache):
+        """课程文件夹应该生成的MP3文件名，无法确定时返回None
+
+        逐步模式和流水线模式中每个WAV对应一个MP3；融合模式取缓存清单中记录的输出，
+        课程有编码失败时清单中没有记录。
+        """
+        wav_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.wav')]
+        if wav_files:
+            return {os.path.splitext(f)[0] + ".mp3" for f in wav_files}
+        entry = cache.data['lessons'].get(folder_name)
+        return set(entry['outputs']) if entry is not None else None
 
     def run_all_steps(self):
         """执行所有步骤"""
         start_time = datetime.now()
         self.logger.info("🚀 开始音频处理流程")
+        self.start_report("steps")
 
         try:
-            self.step0_split_audio_files()
-            self.step1_filter_files()
-            self.step2_reorganize_files()
-            self.step3_convert_to_mp3()
-            self.step4_copy_to_target()
-            
-            end_time = datetime.now()
-            duration = end_time - start_time
-            
-            self.logger.info("=" * 60)
-            self.logger.info("🎉 所有步骤完成!")
-            self.logger.info("=" * 60)
-            self.logger.info("处理统计:")
-            self.logger.info(f"  删除文件: {self.stats['deleted_files']} 个")
-            self.logger.info(f"  保留文件: {self.stats['kept_files']} 个")
-            self.logger.info(f"  移动文件: {self.stats['moved_files']} 个")
-            self.logger.info(f"  重命名文件: {self.stats['renamed_files']} 个")
-            self.logger.info(f"  转换文件: {self.stats['converted_files']} 个")
-            self.logger.info(f"  复制文件: {self.stats['copied_files']} 个")
-            self.logger.info(f"  总耗时: {duration}")
-            
+            with self.report_step("step0_split"):
+                self.step0_split_audio_files()
+            with self.report_step("step1_filter"):
+                self.step1_filter_files()
+            with self.report_step("step2_reorganize"):
+                self.step2_reorganize_files()
+            with self.report_step("step3_convert"):
+                self.step3_convert_to_mp3()
+            with self.report_step("step4_copy"):
+                self.step4_copy_to_target()
+            self.log_summary(start_time)
+
         except Exception as e:
             self.logger.error(f"❌ 处理过程中出现错误: {e}")
             raise
 
+    def run_fused_steps(self):
+        """融合模式执行所有步骤：切割、筛选、排序只处理元数据，只写出最终的MP3
+
+        输出的MP3与逐步执行 run_all_steps 完全相同，但不生成任何中间WAV文件。
+        """
+        start_time = datetime.now()
+        self.logger.info("🚀 开始音频处理流程（融合模式）")
+        self.start_report("fused")
+
+        try:
+            with self.report_step("fused_convert"):
+                self.fused_convert_to_mp3()
+            with self.report_step("step4_copy"):
+                self.step4_copy_to_target()
+            self.log_summary(start_time)
+
+        except Exception as e:
+            self.logger.error(f"❌ 处理过程中出现错误: {e}")
+            raise
+
+    def run_pipelined_steps(self, queue_size=DEFAULT_QUEUE_SIZE):
+        """流水线模式执行所有步骤：每课完成一个步骤后立即进入下一步，不同课程的步骤同时执行
+
+        输出的文件与 run_all_steps 完全相同，时间线写入性能报告和 log/ 下的 *_trace.json。
+        """
+        start_time = datetime.now()
+        self.logger.info("🚀 开始音频处理流程（流水线模式）")
+        self.start_report("pipeline")
+
+        try:
+            pipeline = LessonPipeline(self, run_worker_job, queue_size=queue_size)
+            with self.report_step("pipeline"):
+                self.report.data['pipeline'] = pipeline.run()
+            trace_path = pipeline.save_trace(os.path.splitext(self.log_file)[0] + "_trace.json")
+            self.logger.info(f"时间线: {trace_path}（chrome://tracing 或 ui.perfetto.dev 打开）")
+            self.log_summary(start_time)
+
+        except Exception as e:
+            self.logger.error(f"❌ 处理过程中出现错误: {e}")
+            raise
+
+    def process_lessons(self, lessons=None):
+        """只处理指定课程：融合模式的步骤0-3 + 步骤4（监视模式使用），未变化的部分由增量缓存跳过
+
+        Args:
+            lessons: 课程号集合（如 {"01", "03"}），None 为全部
+        """
+        start_time = datetime.now()
+        before = dict(self.stats)
+        names = ", ".join(sorted(lessons)) if lessons is not None else "全部"
+        self.logger.info(f"🚀 处理课程: {names}")
+
+        self.fused_convert_to_mp3(lessons)
+        self.step4_copy_to_target(lessons)
+
+        changed = {key: self.stats[key] - before[key] for key in ('converted_files', 'copied_files', 'removed_files')}
+        self.logger.info(f"✅ 课程 {names} 完成 - 转换: {changed['converted_files']} 个, "
+                         f"发布: {changed['copied_files']} 个, 删除过期: {changed['removed_files']} 个, "
+                         f"耗时 {datetime.now() - start_time}")
+
+    def plan_fused_outputs(self, detected, kept_segments=None):
+        """按步骤1、2的规则把检测到的片段筛选并重新编号（只处理元数据）
+
+        Args:
+            detected: {原始文件名: [[start, end], ...]}
+            kept_segments: features 模式的分类结果 {原始文件名: [保留的片段编号]}，None 时按编号筛选
+
+        Returns:
+            {原始文件名: [(start, end, 课程号, 新编号), ...]}
+        """
+        # 步骤1: 每个前缀内删除提示音并隔一个保留一个
+        lessons = {}
+        for filename, ranges in detected.items():
+            prefix = self.source_prefix(filename)
+            numbers = range(1, len(ranges) + 1)
+            kept = kept_segments[filename] if kept_segments is not None else self.select_segments(numbers)
+            self.stats['kept_files'] += len(kept)
+            self.stats['deleted_files'] += len(ranges) - len(kept)
+            self.logger.info(f"处理组 {prefix}: 保留 {len(kept)} 个, 丢弃 {len(ranges) - len(kept)} 个片段")
+
+            for num in kept:
+                start, end = ranges[num - 1]
+                lessons.setdefault(prefix[:2], []).append((prefix, num, filename, start, end))
+
+        # 步骤2: 按课程分组，先按完整前缀再按编号排序后重新编号
+        plan = {}
+        for lesson_num, segments in lessons.items():
+            segments.sort(key=lambda x: (x[0], x[1]))
+            self.logger.info(f"课程 {lesson_num}: {len(segments)} 个片段")
+            for i, (prefix, num, filename, start, end) in enumerate(segments, 1):
+                plan.setdefault(filename, []).append((start, end, lesson_num, i))
+                self.stats['renamed_files'] += 1
+        return plan
+
+    def fused_convert_to_mp3(self, lessons=None):
+        """融合模式的步骤0-3：检测片段 → 筛选重排 → 直接编码为 NN/i.mp3
+
+        Args:
+            lessons: 只处理这些课程的原始文件（如 {"01"}），None 为全部
+        """
+        if not self.prepare_audio_files():
+            self.logger.error("音频文件准备失败，无法继续切割")
+            return
+
+        self.logger.info("=" * 60)
+        self.logger.info("步骤0-3: 切割、筛选、排序并转换为MP3（融合模式）")
+        self.logger.info("=" * 60)
+
+        # 课程的编号和切点取决于该课程的所有原始文件，所以按课程而不是按文件筛选
+        original_files = self.find_original_files(lessons)
+        if not original_files:
+            self.logger.warning("未找到需要切割的原始音频文件（格式: XX-XX.mp3）")
+            return
+
+        self.logger.info(f"找到 {len(original_files)} 个原始音频文件需要处理")
+
+        # 源文件哈希 + 切割参数 相同时直接使用缓存的片段区间
+        cache = BuildCache(self.source_dir)
+        source_hashes = {filename: cache.source_hash(filename) for filename in original_files}
+        split_key = params_digest(self.split_params())
+
+        detected = {}
+        to_detect = []
+        for filename in original_files:
+            ranges = None if self.force_rebuild else cache.get_segments(filename, split_key)
+            if ranges is None:
+                to_detect.append(filename)
+            else:
+                detected[filename] = ranges
+        if detected:
+            self.logger.info(f"缓存命中: {len(detected)} 个原始文件无需重新检测")
+
+        # count 模式缓存的是每个文件的候选静音，切点在所有文件扫描完后按课程选择
+        job = 'scan_source_silences' if self.split_mode == "count" else 'detect_source_segments'
+        results = self.run_file_jobs(job, [(filename,) for filename in to_detect])
+        for filename, ranges in zip(to_detect, results):
+            detected[filename] = ranges
+            if ranges is not None:
+                cache.set_segments(filename, split_key, ranges)
+        if self.split_mode == "count":
+            detected = self.plan_count_splits(detected)
+        detected = {filename: detected[filename] for filename in original_files if detected.get(filename)}
+
+        kept_segments = None
+        if self.segment_filter == "features":
+            # 分类需要读取整个源文件：源文件哈希、片段区间和分类参数都相同时直接使用缓存的结果
+            kept_segments = {}
+            kept_keys = {}
+            jobs = []
+            for filename, ranges in detected.items():
+                kept_keys[filename] = params_digest({
+                    'source': source_hashes[filename],
+                    'ranges': ranges,
+                    'classifier': classifier_params()
+                })
+                kept = None if self.force_rebuild else cache.get_kept(filename, kept_keys[filename])
+                if kept is None:
+                    jobs.append((filename, ranges))
+                else:
+                    kept_segments[filename] = kept
+            if kept_segments:
+                self.logger.info(f"缓存命中: {len(kept_segments)} 个原始文件无需重新分类")
+
+            # 分类失败的文件退回按编号筛选（不写入缓存）
+            results = self.run_file_jobs('classify_source_segments', jobs)
+            for (filename, ranges), kept in zip(jobs, results):
+                if kept is None:
+                    kept = self.select_segments(range(1, len(ranges) + 1))
+                else:
+                    cache.set_kept(filename, kept_keys[filename], kept)
+                kept_segments[filename] = kept
+            kept_segments = {filename: kept_segments[filename] for filename in detected}
+        plan = self.plan_fused_outputs(detected, kept_segments)
+
+        # 课程的所有源文件、切割参数和编码参数都未变化时跳过整个课程
+        lesson_sources = {}
+        for filename, targets in plan.items():
+            for lesson_num in {target[2] for target in targets}:
+                lesson_sources.setdefault(lesson_num, []).append([filename, source_hashes[filename]])
+
+        stale = {}
+        for lesson_num, sources in sorted(lesson_sources.items()):
+            lesson_params = {
+                'sources': sorted(sources),
+                'split': self.split_params(),
+                'encode': self.encode_params()
+            }
+            if kept_segments is not None:
+                lesson_params['kept'] = [[filename, kept_segments[filename]] for filename, _ in sorted(sources)]
+            if self.split_mode == "count":
+                # 切点还取决于课文条目数，直接记录本次选出的片段区间
+                lesson_params['ranges'] = [[filename, detected[filename]] for filename, _ in sorted(sources)]
+            lesson_key = params_digest(lesson_params)
+            if self.force_rebuild or not cache.lesson_is_current(lesson_num, lesson_key):
+                stale[lesson_num] = lesson_key
+            else:
+                self.logger.info(f"缓存命中: 课程 {lesson_num} 无需重新生成")
+
+        jobs = []
+        for filename, targets in plan.items():
+            targets = [target for target in targets if target[2] in stale]
+            if targets:
+                jobs.append((filename, targets))
+        for lesson_num in stale:
+            os.makedirs(os.path.join(self.source_dir, lesson_num), exist_ok=True)
+
+        self.run_file_jobs('encode_source_segments', jobs)
+
+        # 记录重新生成的课程，并删除上次留下、本次不再生成的MP3
+        for lesson_num, lesson_key in stale.items():
+            expected = {f"{target[3]}.mp3" for targets in plan.values() for target in targets if target[2] == lesson_num}
+            lesson_dir = os.path.join(self.source_dir, lesson_num)
+            for name in os.listdir(lesson_dir):
+                if name.lower().endswith('.mp3') and name not in expected:
+                    os.remove(os.path.join(lesson_dir, name))
+                    self.logger.info(f"🗑️  删除过期输出: {lesson_num}/{name}")
+            if all(os.path.exists(os.path.join(lesson_dir, name)) for name in expected):
+                cache.set_lesson(lesson_num, lesson_key, sorted(expected))
+            else:
+                cache.data['lessons'].pop(lesson_num, None)
+
+        cache.save()
+        self.stats['cache_hits'] += cache.hits
+        self.stats['cache_misses'] += cache.misses
+        self.logger.info(f"缓存统计: 命中 {cache.hits} 次, 未命中 {cache.misses} 次")
+        self.logger.info(f"步骤0-3完成 - 转换: {self.stats['converted_files']} 个文件")
+        self.log_peak_memory()
+
+    def detect_source_segments(self, filename):
+        """检测单个原始文件的片段区间（融合模式，不写文件）"""
+        self.logger.info(f"处理文件: {filename}")
+        file_path = os.path.join(self.source_dir, filename)
+        timing = self.begin_file_timing('detect', filename, file_path)
+        source = None
+        try:
+            with timed(timing, 'decode'):
+                source = self.open_source_audio(file_path)
+            with timed(timing, 'detect'):
+                return self.detect_segments(filename, source)
+        except Exception as e:
+            self.logger.error(f"❌ 检测文件 {filename} 失败: {e}")
+            return []
+        finally:
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    def encode_source_segments(self, filename, targets):
+        """从原始文件中取出片段，直接去除静音并编码到课程文件夹"""
+        file_path = os.path.join(self.source_dir, filename)
+        timing = self.begin_file_timing('encode', filename, file_path)
+        source = None
+        encoder = self.open_encoder()
+        try:
+            with timed(timing, 'decode'):
+                source = self.open_source_audio(file_path)
+            for start, end, lesson_num, index in targets:
+                if isinstance(source, PcmAudio):
+                    segment = AudioSegment(
+                        data=source.read_segment(start, end),
+                        sample_width=source.sample_width,
+                        frame_rate=source.frame_rate,
+                        channels=source.channels
+                    )
+                else:
+                    segment = source[start:end]
+
+                mp3_path = os.path.join(self.source_dir, lesson_num, f"{index}.mp3")
+                try:
+                    with timed(timing, 'encode'):
+                        results = self.encode_mp3(segment, mp3_path, encoder)
+                    self.report_encoded(results, timing)
+                except Exception as e:
+                    self.logger.error(f"❌ 转换失败 {lesson_num}/{index}.mp3: {e}")
+            with timed(timing, 'encode'):
+                results = encoder.flush()
+            self.report_encoded(results, timing)
+        except Exception as e:
+            self.logger.error(f"❌ 处理文件 {filename} 失败: {e}")
+        finally:
+            encoder.close()
+            if isinstance(source, PcmAudio):
+                source.close()
+
+    def log_summary(self, start_time):
+        """输出处理统计"""
+        duration = datetime.now() - start_time
+
+        self.logger.info("=" * 60)
+        self.logger.info("🎉 所有步骤完成!")
+        self.logger.info("=" * 60)
+        self.logger.info("处理统计:")
+        self.logger.info(f"  删除文件: {self.stats['deleted_files']} 个")
+        self.logger.info(f"  保留文件: {self.stats['kept_files']} 个")
+        self.logger.info(f"  移动文件: {self.stats['moved_files']} 个")
+        self.logger.info(f"  重命名文件: {self.stats['renamed_files']} 个")
+        self.logger.info(f"  转换文件: {self.stats['converted_files']} 个")
+        self.logger.info(f"  复制文件: {self.stats['copied_files']} 个")
+        if self.stats['unchanged_files'] or self.stats['removed_files']:
+            self.logger.info(f"  未变化/过期删除: {self.stats['unchanged_files']}/{self.stats['removed_files']} 个")
+        if self.stats['cache_hits'] or self.stats['cache_misses']:
+            self.logger.info(f"  缓存命中/未命中: {self.stats['cache_hits']}/{self.stats['cache_misses']} 次")
+        self.logger.info(f"  总耗时: {duration}")
+        if self.log_sampler.dropped:
+            self.logger.info(f"  省略逐文件日志: {self.log_sampler.dropped} 条（每 {self.log_sampler.every} 条输出1条）")
+        self.log_peak_memory()
+        if self.report:
+            self.save_report()
+
+
+def mp3_profiles():
+    """步骤3可以使用的编码配置"""
+    return tuple(name for name, profile in ENCODING_PROFILES.items() if profile['codec'] == "mp3")
+
 
 def show_advanced_menu(processor):
     """显示高级选项菜单"""
@@ -545,13 +1378,70 @@ def show_advanced_menu(processor):
         print(f"❌ 执行失败: {e}")
 
 
+def create_processor(args):
+    """按命令行参数创建处理器"""
+    # 各文件相互独立，默认使用全部CPU核心并行处理；--workers 1 为串行（输出与并行逐字节相同）
+    processor = AudioProcessor(workers=args.workers)
+    processor.force_rebuild = args.force
+    processor.encoder_backend = args.encoder
+    processor.set_encoding_profile(args.profile)
+    processor.split_mode = args.split_mode
+    processor.segment_filter = args.segment_filter
+    processor.count_source = args.count_source
+    if args.text_root:
+        processor.text_root = args.text_root
+    processor.set_log_sampling(args.log_sample)
+    processor.publish_mode = args.publish_mode
+    if args.target_root:
+        processor.book2_root = args.target_root
+
+    # 设置推荐的切割参数（调整为更宽松的设置）
+    processor.set_split_params(min_silence_len=1500, silence_thresh=-35)
+    return processor
+
+
 def main():
     """主函数 - 韩语音频处理工具"""
+    parser = argparse.ArgumentParser(description="韩语音频处理工具")
+    parser.add_argument('--force', action='store_true', help="忽略增量缓存，全部重新处理")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="步骤0和步骤3的并行进程数（默认CPU核心数，1为串行）")
+    parser.add_argument('--encoder', default="auto", choices=("auto",) + ENCODER_BACKENDS,
+                        help="MP3编码后端（默认 auto：ffmpeg-batch > lame > pydub）")
+    parser.add_argument('--profile', default="standard", choices=mp3_profiles(),
+                        help="步骤3编码配置：standard 原声道192k；speech 单声道64k；speech-low 单声道48k")
+    parser.add_argument('--split-mode', default="silence", choices=("silence", "count"),
+                        help="切割方式：silence 按静音参数；count 按课文条目数一次选出切点")
+    parser.add_argument('--segment-filter', default="position", choices=("position", "features"),
+                        help="步骤1筛选方式：position 按编号隔一个保留一个；features 按片段特征区分提示音/原音/跟读")
+    parser.add_argument('--count-source', default="words", choices=tuple(COUNT_SOURCES),
+                        help="count 模式的条目数来源：words.json 或 dialogue.json")
+    parser.add_argument('--text-root', help="count 模式读取的课文目录（默认 resources/text/lessons/book2）")
+    parser.add_argument('--target-root', help="步骤4的目标根目录（默认 resources/audio/lessons/book2）")
+    parser.add_argument('--publish-mode', default="link", choices=PUBLISH_MODES,
+                        help="步骤4发布方式：link 优先硬链接，copy 生成独立文件；两者都会跳过未变化的文件")
+    parser.add_argument('--log-sample', type=int, default=1, metavar='N',
+                        help="逐文件日志每N条输出1条（默认1，全部输出）；完整计时见 log/ 下的 *_report.json")
+    parser.add_argument('--watch', action='store_true',
+                        help="监视模式：不显示菜单，原始文件写入源目录后自动处理对应课程（融合模式）")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help="监视模式中文件停止变化多少秒后才处理（默认2）")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="没有 inotify 时的轮询间隔秒数（默认1）")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="流水线模式中每个步骤前最多排队的课程数（默认2），越小中间WAV占用的磁盘越少")
+    args = parser.parse_args()
+
+    if args.watch:
+        processor = create_processor(args)
+        SourceWatcher(processor, debounce=args.debounce, poll_interval=args.poll_interval).run()
+        return
+
     print("=" * 60)
     print("韩语音频处理工具")
     print("=" * 60)
     print("功能说明:")
-    print("• 自动将MP3文件转换为WAV格式（使用macOS自带工具）")
+    print("• MP3直接解码切割（miniaudio 或 ffmpeg，不再依赖macOS）")
     print("• 按静音切割音频文件（推荐参数：静音长度1500ms，阈值-35dBFS）")
     print("• 过滤和处理音频片段")
     print("• 重命名和保存最终文件")
@@ -560,19 +1450,18 @@ def main():
     print("2. 📂 仅切割音频文件（MP3→WAV→切割）")
     print("3. 🔧 高级选项（单独执行各步骤）")
     print("4. ⚙️  设置音频切割参数")
+    print("5. ⚡ 一键处理（融合模式，不生成中间WAV，支持增量缓存）")
+    print("6. 🔀 一键处理（流水线模式，各课程的步骤同时执行，输出时间线）")
     print("0. 退出")
     print("=" * 60)
 
-    choice = input("请选择要执行的操作 (0-4): ").strip()
+    choice = input("请选择要执行的操作 (0-6): ").strip()
 
     if choice == "0":
         print("退出程序")
         return
 
-    processor = AudioProcessor()
-
-    # 设置推荐的切割参数（调整为更宽松的设置）
-    processor.set_split_params(min_silence_len=1500, silence_thresh=-35)
+    processor = create_processor(args)
 
     try:
         if choice == "1":
@@ -591,6 +1480,18 @@ def main():
             # 高级选项
             show_advanced_menu(processor)
 
+        elif choice == "5":
+            # 融合模式一键处理
+            print("\n⚡ 开始一键处理（融合模式）...")
+            processor.run_fused_steps()
+            print("\n✅ 所有步骤完成！")
+
+        elif choice == "6":
+            # 流水线模式一键处理
+            print("\n🔀 开始一键处理（流水线模式）...")
+            processor.run_pipelined_steps(args.queue_size)
+            print("\n✅ 所有步骤完成！")
+
         elif choice == "4":
             # 设置参数
             print(f"\n当前切割参数:")
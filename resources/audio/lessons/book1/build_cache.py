@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频处理增量缓存
+功能：
+1. 记录每个原始文件的内容哈希（大小和修改时间未变时不重新计算）
+2. 按 源文件哈希 + 切割参数 缓存检测到的片段区间
+3. 按 课程所有源文件哈希 + 切割/去静音/编码参数 记录课程输出，参数或源文件不变时跳过
+"""
+
+import hashlib
+import json
+import os
+
+
+CACHE_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_digest(params):
+    """参数字典的稳定哈希"""
+    data = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class BuildCache:
+    """保存在源目录中的缓存清单"""
+
+    FILENAME = ".audio_cache.json"
+
+    def __init__(self, source_dir):
+        self.path = os.path.join(source_dir, self.FILENAME)
+        self.source_dir = source_dir
+        self.data = {'version': CACHE_VERSION, 'sources': {}, 'lessons': {}}
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.data = data
+            except (OSError, ValueError):
+                pass  # 清单损坏时视为没有缓存
+
+    def save(self):
+        """写入清单（先写临时文件再替换，避免中断后留下半个文件）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def source_hash(self, filename):
+        """源文件内容哈希，大小和修改时间未变时直接使用记录的值"""
+        path = os.path.join(self.source_dir, filename)
+        stat = os.stat(path)
+        entry = self.data['sources'].get(filename)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['hash']
+
+        digest = file_digest(path)
+        if not entry or entry['hash'] != digest:
+            entry = {'hash': digest}
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        self.data['sources'][filename] = entry
+        return digest
+
+    def get_segments(self, filename, split_key):
+        """返回缓存的片段区间，未命中时返回None"""
+        entry = self.data['sources'].get(filename, {})
+        segments = entry.get('segments', {}).get(split_key)
+        if segments is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return segments
+
+    def set_segments(self, filename, split_key, segments):
+        """记录片段区间（只保留当前参数的结果）"""
+        self.data['sources'].setdefault(filename, {})['segments'] = {split_key: segments}
+
+    def get_kept(self, filename, kept_key):
+        """返回缓存的片段分类结果（保留的片段编号），未命中时返回None"""
+        entry = self.data['sources'].get(filename, {})
+        kept = entry.get('kept', {}).get(kept_key)
+        if kept is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return kept
+
+    def set_kept(self, filename, kept_key, kept):
+        """记录片段分类结果（只保留当前源文件、区间和分类参数的结果）"""
+        self.data['sources'].setdefault(filename, {})['kept'] = {kept_key: kept}
+
+    def lesson_is_current(self, lesson_num, lesson_key):
+        """课程输出是否与记录一致（键相同且所有输出文件仍然存在、大小不变）"""
+        entry = self.data['lessons'].get(lesson_num)
+        current = entry is not None and entry['key'] == lesson_key and all(
+            self._output_size(lesson_num, name) == size
+            for name, size in entry['outputs'].items()
+        )
+        if current:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return current
+
+    def set_lesson(self, lesson_num, lesson_key, output_names):
+        """记录课程的输出文件"""
+        self.data['lessons'][lesson_num] = {
+            'key': lesson_key,
+            'outputs': {name: self._output_size(lesson_num, name) for name in output_names}
+        }
+
+    def _output_size(self, lesson_num, name):
+        path = os.path.join(self.source_dir, lesson_num, name)
+        return os.path.getsize(path) if os.path.exists(path) else None
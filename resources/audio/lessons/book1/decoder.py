@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨平台MP3解码
+功能：
+1. 切割用的原始MP3分块解码（每次 STREAM_FRAMES 帧）并直接写入WAV文件，再内存映射读取（MappedWav），
+   峰值内存不随音频长度增长；不开启PCM缓存时写入临时文件，关闭后删除
+2. 优先使用进程内的 miniaudio（pip install miniaudio），没有时通过管道调用 ffmpeg
+3. 可选的磁盘PCM缓存：解码结果保留在缓存目录，之后的运行直接内存映射读取
+4. decode_mp3 把短音频（如单词片段）整体解码到内存
+
+替代原来只能在 macOS 上使用的 afconvert。
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import wave
+
+from wav_stream import MappedWav, PcmAudio
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+
+# 与原来 afconvert -d LEI16@44100 的输出格式一致
+DEFAULT_FRAME_RATE = 44100
+PIPE_READ_SIZE = 1024 * 1024
+STREAM_FRAMES = 64 * 1024   # 分块解码时每次读取的帧数
+
+
+def decoder_backend():
+    """当前可用的解码后端名称，都不可用时返回None"""
+    if miniaudio is not None:
+        return "miniaudio"
+    if shutil.which("ffmpeg"):
+        return "ffmpeg"
+    return None
+
+
+def decode_mp3(path, frame_rate=DEFAULT_FRAME_RATE):
+    """把MP3解码为16bit PCM，保留原始声道数
+
+    Returns:
+        PcmAudio
+    """
+    if miniaudio is not None:
+        info = miniaudio.get_file_info(path)
+        decoded = miniaudio.decode_file(
+            path,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=info.nchannels,
+            sample_rate=frame_rate
+        )
+        return PcmAudio(memoryview(decoded.samples).cast('B'), decoded.nchannels, decoded.sample_rate, 2)
+
+    return _decode_with_ffmpeg(path, frame_rate)
+
+
+def decode_audio(path, frame_rate=DEFAULT_FRAME_RATE):
+    """通过 ffmpeg 解码任意格式（Opus/AAC 等 miniaudio 不支持的格式），按文件中的编码延迟信息去除首尾填充
+
+    Returns:
+        PcmAudio
+    """
+    return _decode_with_ffmpeg(path, frame_rate)
+
+
+def _decode_with_ffmpeg(path, frame_rate):
+    """通过管道读取 ffmpeg 输出的WAV流"""
+    data = bytearray()
+    channels = _stream_with_ffmpeg(path, frame_rate, data.extend)
+    # 丢弃末尾不完整的帧
+    usable = len(data) - len(data) % (channels * 2)
+    return PcmAudio(data, channels, frame_rate, 2, data_size=usable)
+
+
+def _stream_with_ffmpeg(path, frame_rate, write, on_format=None):
+    """把 ffmpeg 输出的PCM按块交给 write，返回声道数；on_format(声道数) 在第一块数据之前调用"""
+    converter = shutil.which("ffmpeg")
+    if converter is None:
+        raise RuntimeError("没有可用的MP3解码器：请安装 miniaudio 或 ffmpeg")
+
+    cmd = [
+        converter, '-v', 'error', '-nostdin', '-i', path,
+        '-map_metadata', '-1', '-fflags', '+bitexact',
+        '-acodec', 'pcm_s16le', '-ar', str(frame_rate), '-f', 'wav', '-'
+    ]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        channels = _read_wav_stream_header(proc.stdout)
+        if channels is not None and on_format is not None:
+            on_format(channels)
+        while True:
+            block = proc.stdout.read(PIPE_READ_SIZE)
+            if not block:
+                break
+            if channels is not None:
+                write(block)
+        stderr = proc.stderr.read()
+        if proc.wait() != 0 or channels is None:
+            raise RuntimeError(f"ffmpeg 解码失败: {stderr.decode('utf-8', 'replace').strip()}")
+    return channels
+
+
+def decode_mp3_to_wav(path, out_path, frame_rate=DEFAULT_FRAME_RATE):
+    """把MP3分块解码并写入16bit WAV文件（与 decode_mp3(path).export_wav(out_path) 的输出相同），不在内存中保留整段PCM"""
+    out = None
+
+    def open_output(channels):
+        nonlocal out
+        out = wave.open(out_path, 'wb')
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(frame_rate)
+
+    try:
+        if miniaudio is not None:
+            info = miniaudio.get_file_info(path)
+            open_output(info.nchannels)
+            for block in miniaudio.stream_file(path, output_format=miniaudio.SampleFormat.SIGNED16,
+                                               nchannels=info.nchannels, sample_rate=frame_rate,
+                                               frames_to_read=STREAM_FRAMES):
+                out.writeframesraw(block)
+        else:
+            # 管道的块边界不一定对齐帧，不完整的帧留到下一块
+            pending = bytearray()
+
+            def write(block):
+                pending.extend(block)
+                usable = len(pending) - len(pending) % (out.getnchannels() * 2)
+                out.writeframesraw(pending[:usable])
+                del pending[:usable]
+
+            _stream_with_ffmpeg(path, frame_rate, write, open_output)
+    finally:
+        if out is not None:
+            out.close()   # 按实际写入的帧数修正头部的长度字段
+
+
+def _read_wav_stream_header(stream):
+    """读取管道中WAV流的头部，停在data块起点，返回声道数"""
+    riff = stream.read(12)
+    if len(riff) < 12 or riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        return None
+
+    channels = None
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id = header[0:4]
+        chunk_size = struct.unpack('<I', header[4:8])[0]
+        if chunk_id == b'data':
+            return channels
+        body = stream.read(chunk_size + (chunk_size & 1))
+        if chunk_id == b'fmt ':
+            channels = struct.unpack_from('<H', body, 2)[0]
+
+
+def open_mp3(path, cache_dir=None, frame_rate=DEFAULT_FRAME_RATE):
+    """打开MP3作为PCM音源
+
+    Args:
+        path: MP3文件路径
+        cache_dir: PCM缓存目录，为None时解码到临时文件（关闭后删除）；
+            缓存比MP3新时直接内存映射读取，否则重新解码并写入缓存
+        frame_rate: 输出采样率
+
+    Returns:
+        (PcmAudio, 是否命中缓存)
+    """
+    if cache_dir is None:
+        fd, tmp_path = tempfile.mkstemp(prefix="pcm_", suffix=".wav")
+        os.close(fd)
+        try:
+            decode_mp3_to_wav(path, tmp_path, frame_rate)
+            return MappedWav(tmp_path, temporary=True), False
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    cache_path = pcm_cache_path(path, cache_dir)
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        return MappedWav(cache_path), True
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    try:
+        decode_mp3_to_wav(path, tmp_path, frame_rate)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return MappedWav(cache_path), False
+
+
+def pcm_cache_path(path, cache_dir):
+    """MP3对应的PCM缓存文件路径"""
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{base_name}.wav")
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频编码后端（MP3，以及用于比较体积的 Opus/AAC）
+功能：
+1. pydub：每个片段调用一次 AudioSegment.export（每次启动一个 ffmpeg 进程并经过临时文件）
+2. ffmpeg-batch：把一批片段拼接后通过管道交给一个 ffmpeg 进程，一次输出多个MP3（与 pydub 输出逐字节相同）
+3. lame：进程内调用 LAME（pip install lameenc），不启动子进程；输出不含 Xing/LAME 信息帧
+4. 编码配置（ENCODING_PROFILES）：标准192k、单声道语音MP3，以及用于比较体积的 Opus/AAC
+   （Opus/AAC 只支持 ffmpeg-batch 和 pydub 后端）
+
+所有后端的用法相同：submit() 提交片段，flush() 编码剩余片段，
+两者都返回已完成的 [(输出路径, 异常或None)]。
+"""
+
+import abc
+import os
+import shutil
+import subprocess
+
+try:
+    import lameenc
+except ImportError:
+    lameenc = None
+
+
+ENCODER_BACKENDS = ("ffmpeg-batch", "lame", "pydub")
+DEFAULT_BATCH_SIZE = 64
+LAME_QUALITY = 3  # 与 ffmpeg libmp3lame 未指定 -q 时的默认值相同
+
+# 编码格式：ffmpeg 编码器（None 为 ffmpeg 的默认编码器）、容器格式、输出扩展名
+CODECS = {
+    'mp3': {'encoder': None, 'format': "mp3", 'extension': ".mp3"},
+    'opus': {'encoder': "libopus", 'format': "opus", 'extension': ".opus"},
+    'aac': {'encoder': "aac", 'format': "ipod", 'extension': ".m4a"},
+}
+
+# 编码配置：格式、比特率、输出声道数（None 保持原声道数）
+# 单人朗读的语音用单声道 48-64k 已经足够，standard 是原来的输出
+ENCODING_PROFILES = {
+    'standard': {'codec': "mp3", 'bitrate': "192k", 'channels': None},
+    'speech': {'codec': "mp3", 'bitrate': "64k", 'channels': 1},
+    'speech-low': {'codec': "mp3", 'bitrate': "48k", 'channels': 1},
+    'opus': {'codec': "opus", 'bitrate': "32k", 'channels': 1},
+    'aac': {'codec': "aac", 'bitrate': "48k", 'channels': 1},
+}
+
+
+def encoding_profile(name):
+    """按名称取编码配置"""
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"未知的编码配置: {name}（可选: {', '.join(ENCODING_PROFILES)}）")
+    return ENCODING_PROFILES[name]
+
+
+def apply_channels(audio, channels):
+    """按编码配置转换声道数，channels 为 None 时不变"""
+    return audio if channels is None or audio.channels == channels else audio.set_channels(channels)
+
+
+def available_backends(codec="mp3"):
+    """当前环境可用的编码后端，按优先顺序排列"""
+    backends = []
+    # ffmpeg-batch 的输出与 pydub 逐字节相同，优先使用；没有 ffmpeg 时使用进程内 LAME
+    if shutil.which("ffmpeg"):
+        backends.append("ffmpeg-batch")
+    if lameenc is not None and codec == "mp3":
+        backends.append("lame")
+    backends.append("pydub")
+    return backends
+
+
+def resolve_backend(name="auto", codec="mp3"):
+    """把 auto 解析为最优的可用后端，指定的后端不可用时抛出异常"""
+    if codec not in CODECS:
+        raise ValueError(f"未知的编码格式: {codec}（可选: {', '.join(CODECS)}）")
+    backends = available_backends(codec)
+    if name == "auto":
+        return backends[0]
+    if name not in ENCODER_BACKENDS:
+        raise ValueError(f"未知的编码后端: {name}（可选: auto, {', '.join(ENCODER_BACKENDS)}）")
+    if name not in backends:
+        raise RuntimeError(f"编码后端 {name} 不可用（可用: {', '.join(backends)}）")
+    return name
+
+
+def create_encoder(name="auto", bitrate="192k", batch_size=DEFAULT_BATCH_SIZE, codec="mp3"):
+    """创建编码器（codec 见 CODECS，输出路径的扩展名由调用方决定）"""
+    backend = resolve_backend(name, codec)
+    if backend == "lame":
+        return LameEncoder(bitrate)
+    if backend == "ffmpeg-batch":
+        return FfmpegBatchEncoder(bitrate, batch_size, codec)
+    return PydubEncoder(bitrate, codec)
+
+
+def ffmpeg_codec_args(codec):
+    """ffmpeg 输出参数中的编码器部分（MP3 使用默认编码器，保持与原来的输出相同）"""
+    encoder = CODECS[codec]['encoder']
+    return ['-c:a', encoder] if encoder else []
+
+
+def bitrate_kbps(bitrate):
+    """'192k' -> 192"""
+    text = str(bitrate).lower()
+    return int(text[:-1]) if text.endswith('k') else int(text) // 1000
+
+
+def as_16bit(audio):
+    """LAME 和管道输入统一使用16bit PCM"""
+    return audio if audio.sample_width == 2 else audio.set_sample_width(2)
+
+
+class Encoder(abc.ABC):
+    """编码器基类：默认逐个片段立即编码，子类实现 encode"""
+
+    name = None
+
+    def __init__(self, bitrate="192k", codec="mp3"):
+        self.bitrate = bitrate
+        self.codec = codec
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, audio, path):
+        """编码一个 AudioSegment 到 path"""
+        try:
+            self.encode(audio, path)
+            return [(path, None)]
+        except Exception as e:
+            return [(path, e)]
+
+    def flush(self):
+        """编码所有未完成的片段"""
+        return []
+
+    def close(self):
+        """释放资源（未 flush 的片段会被丢弃）"""
+
+    @abc.abstractmethod
+    def encode(self, audio, path):
+        """编码一个片段到 path，失败时抛出异常"""
+
+
+class PydubEncoder(Encoder):
+    """原来的导出方式：每个片段一个 ffmpeg 进程"""
+
+    name = "pydub"
+
+    def encode(self, audio, path):
+        # 先写临时文件再替换：已发布的硬链接不会被原地改写
+        tmp_path = path + ".tmp"
+        try:
+            codec = CODECS[self.codec]
+            audio.export(tmp_path, format=codec['format'], codec=codec['encoder'], bitrate=self.bitrate).close()
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class LameEncoder(Encoder):
+    """进程内 LAME 编码"""
+
+    name = "lame"
+
+    def encode(self, audio, path):
+        audio = as_16bit(audio)
+        # lameenc 的编码器对象 flush 后不能复用，每个片段新建一个（开销很小）
+        lame = lameenc.Encoder()
+        lame.set_bit_rate(bitrate_kbps(self.bitrate))
+        lame.set_in_sample_rate(audio.frame_rate)
+        lame.set_channels(audio.channels)
+        lame.set_quality(LAME_QUALITY)
+        data = lame.encode(audio.raw_data) + lame.flush()
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class FfmpegBatchEncoder(Encoder):
+    """攒够一批片段后，用一个 ffmpeg 进程按样本区间切开并分别编码"""
+
+    name = "ffmpeg-batch"
+
+    def __init__(self, bitrate="192k", batch_size=DEFAULT_BATCH_SIZE, codec="mp3"):
+        super().__init__(bitrate, codec)
+        self.batch_size = max(1, batch_size)
+        self.pending = []
+        self.pending_format = None
+
+    def submit(self, audio, path):
+        audio = as_16bit(audio)
+        audio_format = (audio.frame_rate, audio.channels)
+
+        # 同一批的片段必须采样率和声道数相同
+        done = []
+        if self.pending and audio_format != self.pending_format:
+            done = self.flush()
+        self.pending.append((audio.raw_data, path))
+        self.pending_format = audio_format
+        if len(self.pending) >= self.batch_size:
+            done += self.flush()
+        return done
+
+    def flush(self):
+        if not self.pending:
+            return []
+        batch, self.pending = self.pending, []
+        try:
+            self.encode_batch(batch, *self.pending_format)
+            return [(path, None) for _, path in batch]
+        except Exception as e:
+            return [(path, e) for _, path in batch]
+
+    def close(self):
+        self.pending = []
+
+    def encode(self, audio, path):
+        audio = as_16bit(audio)
+        self.encode_batch([(audio.raw_data, path)], audio.frame_rate, audio.channels)
+
+    def encode_batch(self, batch, frame_rate, channels):
+        """拼接后的PCM从标准输入送入，asplit + atrim 切出每个片段"""
+        frame_width = channels * 2
+        filters = [f"[0:a]asplit={len(batch)}" + "".join(f"[s{i}]" for i in range(len(batch)))]
+        outputs = []
+        start = 0
+        for i, (data, path) in enumerate(batch):
+            end = start + len(data) // frame_width
+            filters.append(f"[s{i}]atrim=start_sample={start}:end_sample={end},asetpts=PTS-STARTPTS[o{i}]")
+            outputs += ['-map', f'[o{i}]'] + ffmpeg_codec_args(self.codec) + [
+                '-b:a', self.bitrate, '-f', CODECS[self.codec]['format'], path + ".tmp"
+            ]
+            start = end
+
+        cmd = [
+            shutil.which("ffmpeg") or "ffmpeg", '-v', 'error', '-y',
+            '-f', 's16le', '-ar', str(frame_rate), '-ac', str(channels), '-i', 'pipe:0',
+            '-filter_complex', ";".join(filters)
+        ] + outputs
+        try:
+            result = subprocess.run(
+                cmd,
+                input=b"".join(data for data, _ in batch),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"ffmpeg 编码失败: {result.stderr.decode('utf-8', 'replace').strip()}")
+            for _, path in batch:
+                os.replace(path + ".tmp", path)
+        finally:
+            for _, path in batch:
+                if os.path.exists(path + ".tmp"):
+                    os.remove(path + ".tmp")
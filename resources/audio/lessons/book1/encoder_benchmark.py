@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP3编码后端基准测试
+功能：
+1. 生成一批类似单词音频的合成短片段（0.5-2秒，正弦波 + 噪声）
+2. 依次用各个可用后端编码到临时目录
+3. 输出每个后端的 片段数/秒 以及相对 pydub（原来的导出方式）的加速比
+
+用法: python encoder_benchmark.py [--clips 300] [--backends lame ffmpeg-batch pydub]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from encoder import available_backends, create_encoder
+
+
+def make_clips(count, frame_rate=44100, channels=2, seed=0):
+    """生成合成的16bit短片段"""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for _ in range(count):
+        frames = int(rng.uniform(0.5, 2.0) * frame_rate)
+        t = np.arange(frames) / frame_rate
+        wave = 0.3 * np.sin(2 * np.pi * rng.uniform(150, 400) * t) + 0.02 * rng.standard_normal(frames)
+        samples = (np.clip(wave, -1, 1) * 32767).astype('<i2')
+        data = np.repeat(samples[:, None], channels, axis=1).tobytes()
+        clips.append(AudioSegment(data=data, sample_width=2, frame_rate=frame_rate, channels=channels))
+    return clips
+
+
+def run_backend(name, clips, bitrate, out_dir):
+    """编码全部片段，返回 (耗时秒数, 失败数量)"""
+    failed = 0
+    start = time.perf_counter()
+    with create_encoder(name, bitrate) as encoder:
+        results = []
+        for i, clip in enumerate(clips, 1):
+            results += encoder.submit(clip, os.path.join(out_dir, f"{i}.mp3"))
+        results += encoder.flush()
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for _, error in results if error is not None)
+    return elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MP3编码后端基准测试")
+    parser.add_argument('--clips', type=int, default=300, help="片段数量")
+    parser.add_argument('--bitrate', default="192k", help="MP3比特率")
+    parser.add_argument('--backends', nargs='+', default=available_backends(), help="要测试的后端")
+    args = parser.parse_args()
+
+    clips = make_clips(args.clips)
+    audio_seconds = sum(len(clip) for clip in clips) / 1000
+    print(f"合成片段: {len(clips)} 个，共 {audio_seconds:.1f} 秒音频")
+    print("-" * 60)
+
+    results = {}
+    for name in args.backends:
+        with tempfile.TemporaryDirectory() as out_dir:
+            elapsed, failed = run_backend(name, clips, args.bitrate, out_dir)
+        results[name] = elapsed
+        print(f"{name:<14} {elapsed:8.2f}s  {len(clips) / elapsed:8.1f} 片段/秒  失败 {failed} 个")
+
+    if "pydub" in results:
+        print("-" * 60)
+        for name, elapsed in results.items():
+            if name != "pydub":
+                print(f"{name} 相对 pydub 加速: {results['pydub'] / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频体积与质量报告
+功能：
+1. 扫描目录下所有MP3（默认整个 resources/audio），按所在目录分组并行处理
+2. 用选定的编码配置（见 encoder.py 的 ENCODING_PROFILES）重新编码到临时目录
+3. 比较每个文件的 字节数、时长偏差、峰值电平变化，汇总节省的字节数和每个目录（每课）的平均下载量
+4. 可选保存为JSON，便于切换编码配置前评估
+
+注意：这里是从现有MP3重新编码，比从WAV编码多一次有损转换，质量结果偏保守。
+
+用法: python encoding_report.py [--root 目录] [--profiles speech speech-low opus aac] [--workers 4] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pydub import AudioSegment
+
+from audio_processor import REPO_ROOT
+from decoder import decode_audio
+from encoder import CODECS, ENCODING_PROFILES, apply_channels, create_encoder
+
+
+CLIP_DBFS = -0.1  # 峰值高于此电平视为削波
+
+
+def peak_dbfs(pcm):
+    """16bit PCM 的峰值电平，全静音时为None"""
+    peak = int(np.abs(pcm.samples.astype(np.int32)).max(initial=0))
+    return round(20 * np.log10(peak / 32768), 2) if peak else None
+
+
+def measure(path):
+    """返回 (时长ms, 峰值dBFS)，所有格式都用 ffmpeg 解码，时长的计算方式一致"""
+    with decode_audio(path) as pcm:
+        return len(pcm), peak_dbfs(pcm)
+
+
+def find_directories(root):
+    """返回 [(目录, [MP3文件名])]，按路径排序"""
+    groups = []
+    for directory, _, files in os.walk(root):
+        mp3_files = sorted(f for f in files if f.lower().endswith('.mp3'))
+        if mp3_files:
+            groups.append((directory, mp3_files))
+    return sorted(groups)
+
+
+def report_directory(directory, filenames, profiles, encoder_backend):
+    """重新编码一个目录中的所有文件，返回每个文件的比较结果"""
+    rows = []
+    sources = []
+    for filename in filenames:
+        path = os.path.join(directory, filename)
+        with decode_audio(path) as pcm:
+            sources.append(AudioSegment(
+                data=pcm.read_segment(0, len(pcm)),
+                sample_width=pcm.sample_width,
+                frame_rate=pcm.frame_rate,
+                channels=pcm.channels
+            ))
+            rows.append({
+                'file': path,
+                'bytes': os.path.getsize(path),
+                'channels': pcm.channels,
+                'duration_ms': len(pcm),
+                'peak_dbfs': peak_dbfs(pcm),
+                'profiles': {}
+            })
+
+    with tempfile.TemporaryDirectory(prefix="encoding_report_") as out_dir:
+        for name in profiles:
+            profile = ENCODING_PROFILES[name]
+            extension = CODECS[profile['codec']]['extension']
+            outputs = [os.path.join(out_dir, f"{name}_{i}{extension}") for i in range(len(sources))]
+
+            errors = {}
+            with create_encoder(encoder_backend, profile['bitrate'], codec=profile['codec']) as encoder:
+                results = []
+                for audio, out_path in zip(sources, outputs):
+                    results += encoder.submit(apply_channels(audio, profile['channels']), out_path)
+                results += encoder.flush()
+            for out_path, error in results:
+                if error is not None:
+                    errors[out_path] = str(error)
+
+            for row, out_path in zip(rows, outputs):
+                if out_path in errors:
+                    row['profiles'][name] = {'error': errors[out_path]}
+                    continue
+                duration_ms, peak = measure(out_path)
+                row['profiles'][name] = {
+                    'bytes': os.path.getsize(out_path),
+                    'duration_ms': duration_ms,
+                    'peak_dbfs': peak
+                }
+    return rows
+
+
+def summarize(rows, profiles, directory_count):
+    """汇总每个配置的体积和质量"""
+    original_bytes = sum(row['bytes'] for row in rows)
+    summary = {
+        'original': {
+            'files': len(rows),
+            'bytes': original_bytes,
+            'bytes_per_directory': round(original_bytes / max(1, directory_count))
+        }
+    }
+    for name in profiles:
+        results = [(row, row['profiles'][name]) for row in rows if 'error' not in row['profiles'][name]]
+        total = sum(result['bytes'] for _, result in results)
+        compared_original = sum(row['bytes'] for row, _ in results)
+        drifts = [abs(result['duration_ms'] - row['duration_ms']) for row, result in results]
+        peak_changes = [
+            abs(result['peak_dbfs'] - row['peak_dbfs'])
+            for row, result in results
+            if result['peak_dbfs'] is not None and row['peak_dbfs'] is not None
+        ]
+        summary[name] = {
+            **ENCODING_PROFILES[name],
+            'files': len(results),
+            'failed': len(rows) - len(results),
+            'bytes': total,
+            'bytes_saved': compared_original - total,
+            'saved_percent': round(100 * (compared_original - total) / max(1, compared_original), 1),
+            'bytes_per_directory': round(total / max(1, directory_count)),
+            'duration_drift_ms_mean': round(sum(drifts) / max(1, len(drifts)), 2),
+            'duration_drift_ms_max': max(drifts, default=0),
+            'peak_change_db_max': round(max(peak_changes, default=0.0), 2),
+            'clipped_files': sum(
+                1 for row, result in results
+                if result['peak_dbfs'] is not None and result['peak_dbfs'] > CLIP_DBFS
+                and (row['peak_dbfs'] is None or row['peak_dbfs'] <= CLIP_DBFS)
+            )
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较不同编码配置的音频体积与质量")
+    parser.add_argument('--root', default=os.path.join(REPO_ROOT, "resources", "audio"), help="要扫描的目录")
+    parser.add_argument('--profiles', nargs='+', choices=tuple(ENCODING_PROFILES),
+                        default=["speech", "speech-low", "opus", "aac"], help="要比较的编码配置")
+    parser.add_argument('--encoder', default="auto", help="编码后端（Opus/AAC 不能使用 lame）")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument('--json', help="把汇总和逐文件结果保存为JSON")
+    args = parser.parse_args()
+
+    groups = find_directories(args.root)
+    file_count = sum(len(files) for _, files in groups)
+    print(f"扫描 {args.root}: {len(groups)} 个目录，{file_count} 个MP3")
+
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(report_directory, d, files, args.profiles, args.encoder) for d, files in groups]
+        for done, future in enumerate(futures, 1):
+            rows += future.result()
+            print(f"\r进度: {done}/{len(futures)} 个目录", end="", flush=True)
+    print(f"\n完成，耗时 {time.perf_counter() - start:.1f}s")
+
+    summary = summarize(rows, args.profiles, len(groups))
+    original = summary['original']
+    print("-" * 96)
+    print(f"{'配置':<12}{'格式':>6}{'比特率':>8}{'总大小MB':>10}{'节省MB':>9}{'节省%':>8}"
+          f"{'每目录KB':>10}{'时长偏差ms(均/最大)':>20}{'峰值变化dB':>11}{'削波':>6}")
+    print(f"{'original':<12}{'mp3':>6}{'-':>8}{original['bytes'] / 1e6:>10.2f}{'-':>9}{'-':>8}"
+          f"{original['bytes_per_directory'] / 1024:>10.1f}{'-':>20}{'-':>11}{'-':>6}")
+    for name in args.profiles:
+        item = summary[name]
+        drift = f"{item['duration_drift_ms_mean']:.1f}/{item['duration_drift_ms_max']}"
+        print(f"{name:<12}{item['codec']:>6}{item['bitrate']:>8}{item['bytes'] / 1e6:>10.2f}"
+              f"{item['bytes_saved'] / 1e6:>9.2f}{item['saved_percent']:>8.1f}{item['bytes_per_directory'] / 1024:>10.1f}"
+              f"{drift:>20}{item['peak_change_db_max']:>11.2f}{item['clipped_files']:>6}")
+        if item['failed']:
+            print(f"  ⚠️  {item['failed']} 个文件编码失败，详见JSON")
+
+    if args.json:
+        for row in rows:
+            row['file'] = os.path.relpath(row['file'], args.root)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'root': args.root, 'summary': summary, 'files': rows}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按课程流水线执行步骤0-4
+功能：
+1. 每课是一条独立的任务链：切割 → 筛选 → 排序 → 编码 → 发布，一课切割完成后立即进入筛选，
+   不必等所有课程都切割完；不同课程的不同步骤在同一个进程池中同时执行
+2. 步骤之间是有界队列：下游队列（含正在执行的任务）满了时，上游不再开始新的课程，
+   避免切割远远跑在编码前面、中间WAV堆满磁盘
+3. 空闲进程优先分给靠后的步骤，已经开始的课程先完成
+4. 记录每个任务的开始和结束时间，输出文本甘特图、各步骤忙碌时间、并行度和总耗时（makespan），
+   并保存为 Chrome Trace 格式（chrome://tracing 或 https://ui.perfetto.dev 打开）
+
+每个任务调用 AudioProcessor 的 stepN 方法并只处理一课，输出与 run_all_steps 完全相同。
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+# (阶段名, AudioProcessor 方法, 甘特图中的字符)
+STAGES = (
+    ('split', 'step0_split_audio_files', 'S'),
+    ('filter', 'step1_filter_files', 'F'),
+    ('reorganize', 'step2_reorganize_files', 'R'),
+    ('convert', 'step3_convert_to_mp3', 'C'),
+    ('publish', 'step4_copy_to_target', 'P'),
+)
+DEFAULT_QUEUE_SIZE = 2
+GANTT_WIDTH = 60
+
+
+class LessonPipeline:
+    """把课程逐个送入步骤流水线，记录执行时间线"""
+
+    def __init__(self, processor, run_job, workers=None, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            processor: 主进程的 AudioProcessor，合并各任务的日志和统计
+            run_job: 子进程执行任务的函数（audio_processor.run_worker_job）
+            workers: 进程数，默认 processor.workers
+            queue_size: 每个步骤前的队列容量
+        """
+        self.run_job = run_job
+        self.processor = processor
+        self.logger = processor.logger
+        self.workers = max(1, workers or processor.workers)
+        self.queue_size = max(1, queue_size)   # 每个步骤前最多排队（含正在执行）的课程数
+        self.timeline = []                     # [{'lesson', 'stage', 'start', 'end', 'lane'}]，时间为相对开始的秒数
+        self.makespan = 0.0
+
+    def lessons(self):
+        """源目录中有原始文件的课程号"""
+        return sorted({self.processor.source_prefix(f)[:2] for f in self.processor.find_original_files()})
+
+    def run(self, lessons=None):
+        """执行流水线，返回时间线摘要（见 summary）"""
+        lessons = self.lessons() if lessons is None else sorted(lessons)
+        if not lessons:
+            self.logger.warning("未找到需要处理的原始音频文件（格式: XX-XX.mp3）")
+            return self.summary()
+
+        # 任务内部串行处理一课的文件，并行度来自不同课程、不同步骤同时执行
+        state = self.processor.worker_state()
+        state['workers'] = 1
+
+        ready = [deque() for _ in STAGES]      # 每个步骤前的队列
+        ready[0].extend(lessons)
+        active = [0] * len(STAGES)             # 每个步骤正在执行的任务数
+        running = {}                           # future -> (步骤序号, 课程, 开始时间, 进程槽位)
+        free_lanes = list(range(self.workers))
+        failed = []
+
+        self.logger.info(f"🔀 流水线处理 {len(lessons)} 课: {self.workers} 个进程, 步骤间队列容量 {self.queue_size}")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while running or any(ready):
+                # 从后往前分配空闲进程，下游满了的步骤暂停（背压）
+                for index in reversed(range(len(STAGES))):
+                    while ready[index] and free_lanes and self.has_room(index, ready, active):
+                        lesson = ready[index].popleft()
+                        future = pool.submit(self.run_job, state, STAGES[index][1], ({lesson},))
+                        running[future] = (index, lesson, time.perf_counter() - started, free_lanes.pop(0))
+                        active[index] += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: running[f][2]):
+                    index, lesson, start, lane = running.pop(future)
+                    end = time.perf_counter() - started
+                    active[index] -= 1
+                    free_lanes.append(lane)
+                    free_lanes.sort()
+                    self.timeline.append({'lesson': lesson, 'stage': STAGES[index][0],
+                                          'start': round(start, 6), 'end': round(end, 6), 'lane': lane})
+                    try:
+                        self.processor.merge_worker_result(*future.result())
+                    except Exception as e:
+                        # 出错的课程不再进入后续步骤，其他课程继续
+                        self.logger.error(f"❌ 课程 {lesson} 的 {STAGES[index][0]} 步骤失败: {e}")
+                        failed.append(lesson)
+                        continue
+                    if index + 1 < len(STAGES):
+                        ready[index + 1].append(lesson)
+
+        self.makespan = time.perf_counter() - started
+        self.log_timeline()
+        if failed:
+            raise RuntimeError(f"课程处理失败: {', '.join(sorted(failed))}")
+        return self.summary()
+
+    def has_room(self, index, ready, active):
+        """步骤 index 能否开始新课程：完成后下游队列（含正在执行的任务）不超过容量"""
+        if index + 1 == len(STAGES):
+            return True
+        return len(ready[index + 1]) + active[index + 1] + active[index] < self.queue_size
+
+    def summary(self):
+        """时间线摘要：总耗时、各步骤忙碌时间、平均并行度"""
+        busy = {name: 0.0 for name, _, _ in STAGES}
+        for event in self.timeline:
+            busy[event['stage']] += event['end'] - event['start']
+        total_busy = sum(busy.values())
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'makespan_s': round(self.makespan, 6),
+            'busy_s': {name: round(seconds, 6) for name, seconds in busy.items()},
+            'parallelism': round(total_busy / self.makespan, 3) if self.makespan else 0.0,
+            'overlap_s': round(self.overlap(), 6),
+            'timeline': sorted(self.timeline, key=lambda event: (event['start'], event['lane'])),
+        }
+
+    def overlap(self):
+        """不同步骤同时执行的总时间（秒）"""
+        points = sorted({event['start'] for event in self.timeline} | {event['end'] for event in self.timeline})
+        total = 0.0
+        for begin, end in zip(points, points[1:]):
+            stages = {event['stage'] for event in self.timeline if event['start'] <= begin and event['end'] >= end}
+            if len(stages) > 1:
+                total += end - begin
+        return total
+
+    def log_timeline(self):
+        """输出文本甘特图（每课一行，字母为步骤）和汇总"""
+        if not self.timeline or not self.makespan:
+            return
+        scale = GANTT_WIDTH / self.makespan
+        symbols = {name: symbol for name, _, symbol in STAGES}
+        self.logger.info("流水线时间线（" + ", ".join(f"{symbol}={name}" for name, _, symbol in STAGES)
+                         + f"，每格 {self.makespan / GANTT_WIDTH:.2f}s）:")
+        for lesson in sorted({event['lesson'] for event in self.timeline}):
+            row = [' '] * GANTT_WIDTH
+            for event in self.timeline:
+                if event['lesson'] == lesson:
+                    first = min(int(event['start'] * scale), GANTT_WIDTH - 1)
+                    last = max(first, min(int(event['end'] * scale), GANTT_WIDTH - 1))
+                    for column in range(first, last + 1):
+                        row[column] = symbols[event['stage']]
+            self.logger.info(f"  {lesson} |{''.join(row)}|")
+
+        summary = self.summary()
+        busy = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in summary['busy_s'].items())
+        self.logger.info(f"总耗时(makespan): {self.makespan:.2f}s, 步骤重叠: {summary['overlap_s']:.2f}s, "
+                         f"平均并行度: {summary['parallelism']:.2f}")
+        self.logger.info(f"各步骤忙碌时间: {busy}")
+
+    def save_trace(self, path):
+        """保存为 Chrome Trace 事件格式，每个进程槽位一行"""
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': 'lesson_pipeline'}}]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': lane, 'args': {'name': f'worker {lane}'}}
+                   for lane in range(self.workers)]
+        for event in self.timeline:
+            events.append({
+                'name': f"{event['lesson']} {event['stage']}",
+                'cat': event['stage'],
+                'ph': 'X',
+                'pid': 0,
+                'tid': event['lane'],
+                'ts': round(event['start'] * 1e6),
+                'dur': round((event['end'] - event['start']) * 1e6),
+                'args': {'lesson': event['lesson']},
+            })
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
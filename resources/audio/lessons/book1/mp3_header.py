@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读帧头的MP3信息解析（不解码）
+功能：
+1. 跳过 ID3v2 标签，找到第一个有效的MPEG音频帧（要求下一帧的帧头也有效，避免误判）
+2. 从帧头读取 采样率、声道数、比特率
+3. 有 Xing/Info 或 VBRI 信息帧时按总帧数计算时长，并按 LAME 标签中的编码延迟/填充去掉首尾多出的样本
+   （与 ffmpeg 解码后的长度一致）；没有信息帧时按固定比特率和数据长度估算
+"""
+
+import os
+import struct
+
+
+# (MPEG版本, 层) -> 比特率表（kbps），MPEG2.5 与 MPEG2 相同
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+HEAD_READ_SIZE = 64 * 1024
+
+
+class Mp3HeaderError(ValueError):
+    """文件中找不到有效的MPEG音频帧"""
+
+
+def parse_frame_header(data, offset):
+    """解析 offset 处的4字节帧头，无效时返回None"""
+    if offset + 4 > len(data):
+        return None
+    header, = struct.unpack_from('>I', data, offset)
+    if header >> 21 != 0x7FF:
+        return None
+    version = VERSIONS.get((header >> 19) & 0b11)
+    layer = LAYERS.get((header >> 17) & 0b11)
+    bitrate_index = (header >> 12) & 0b1111
+    rate_index = (header >> 10) & 0b11
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+
+    return {
+        'version': version,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'channels': 1 if (header >> 6) & 0b11 == 0b11 else 2,
+        'samples': samples,
+        'length': length,
+    }
+
+
+def id3v2_size(data):
+    """ID3v2 标签的总长度（不存在时为0）"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def find_first_frame(data, start=0):
+    """第一个后面紧跟另一个有效帧头（或数据结尾）的帧，返回 (偏移, 帧头)"""
+    offset = data.find(b'\xff', start)
+    while 0 <= offset < len(data) - 4:
+        frame = parse_frame_header(data, offset)
+        if frame is not None:
+            following = offset + frame['length']
+            if following + 4 > len(data) or parse_frame_header(data, following) is not None:
+                return offset, frame
+        offset = data.find(b'\xff', offset + 1)
+    raise Mp3HeaderError("找不到有效的MPEG音频帧")
+
+
+def parse_info_frame(data, offset, frame):
+    """解析第一帧中的 Xing/Info（含LAME标签）或 VBRI 信息
+
+    Returns:
+        {'frames', 'bytes', 'delay', 'padding', 'vbr'}，没有信息帧时返回None
+    """
+    if frame['version'] == 1:
+        side_info = 17 if frame['channels'] == 1 else 32
+    else:
+        side_info = 9 if frame['channels'] == 1 else 17
+
+    xing = offset + 4 + side_info
+    tag = data[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        flags, = struct.unpack_from('>I', data, xing + 4)
+        position = xing + 8
+        info = {'frames': None, 'bytes': None, 'delay': 0, 'padding': 0, 'vbr': tag == b'Xing'}
+        if flags & 0x1:
+            info['frames'], = struct.unpack_from('>I', data, position)
+            position += 4
+        if flags & 0x2:
+            info['bytes'], = struct.unpack_from('>I', data, position)
+            position += 4
+        if flags & 0x4:
+            position += 100
+        if flags & 0x8:
+            position += 4
+        # LAME 标签：9字节编码器版本，第21-23字节为 12bit 延迟 + 12bit 填充
+        if data[position:position + 4] in (b'LAME', b'Lavf', b'Lavc') and position + 24 <= len(data):
+            a, b, c = data[position + 21:position + 24]
+            info['delay'] = (a << 4) | (b >> 4)
+            info['padding'] = ((b & 0x0F) << 8) | c
+        return info
+
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI':
+        delay, = struct.unpack_from('>H', data, vbri + 6)
+        total_bytes, frames = struct.unpack_from('>II', data, vbri + 10)
+        return {'frames': frames, 'bytes': total_bytes, 'delay': delay, 'padding': 0, 'vbr': True}
+    return None
+
+
+def read_mp3_info(path):
+    """只读取文件头部，返回 时长、比特率、声道数、采样率等信息
+
+    Returns:
+        {'duration_ms', 'bitrate_kbps', 'channels', 'sample_rate', 'mpeg_version', 'layer', 'vbr'}
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        data = f.read(HEAD_READ_SIZE)
+        tag_size = id3v2_size(data)
+        if tag_size:
+            f.seek(tag_size)
+            data = f.read(HEAD_READ_SIZE)
+        f.seek(max(0, size - 128))
+        has_id3v1 = f.read(3) == b'TAG' and size - 128 >= tag_size
+
+    offset, frame = find_first_frame(data)
+    audio_start = tag_size + offset
+    audio_bytes = size - audio_start - (128 if has_id3v1 else 0)
+    info = parse_info_frame(data, offset, frame)
+
+    if info and info['frames']:
+        samples = info['frames'] * frame['samples'] - info['delay'] - info['padding']
+        duration = max(0, samples) / frame['sample_rate']
+        vbr = info['vbr']
+        if vbr:
+            # 信息帧本身不含音频，不计入平均比特率
+            stream_bytes = info['bytes'] or (audio_bytes - frame['length'])
+            bitrate = stream_bytes * 8 / duration / 1000 if duration else frame['bitrate']
+        else:
+            # 固定比特率文件的信息帧可能使用不同的比特率，取第一个音频帧
+            audio_frame = parse_frame_header(data, offset + frame['length'])
+            bitrate = (audio_frame or frame)['bitrate']
+    else:
+        bitrate = frame['bitrate']
+        duration = audio_bytes * 8 / (bitrate * 1000)
+        vbr = False
+
+    return {
+        'duration_ms': round(duration * 1000),
+        'bitrate_kbps': round(bitrate),
+        'channels': frame['channels'],
+        'sample_rate': frame['sample_rate'],
+        'mpeg_version': frame['version'],
+        'layer': frame['layer'],
+        'vbr': vbr,
+    }
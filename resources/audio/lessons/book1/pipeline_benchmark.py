@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频处理流程基准测试（使用合成音频，可以离线运行）
+功能：
+1. 生成确定性的合成原始音频：每个文件开头2个提示音，之后每个条目是一段类似语音的音节组合（原音+跟读各一次），
+   片段之间是可配置长度的静音；文件名为 XX-XX_original.wav 或 XX-XX.mp3，并生成对应的 words.json
+2. 在临时目录中依次运行 步骤0-4（逐步模式）、融合模式和流水线模式，每个场景在独立的子进程中执行，峰值内存互不影响
+3. 输出每个步骤的 文件数/秒、音频秒数/秒、CPU时间和峰值内存，可选保存为JSON
+
+用法: python pipeline_benchmark.py [--lessons 2] [--sources 2] [--words 15] [--format wav|mp3] [--workers 4]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+FRAME_RATE = 44100
+PROMPT_TONE_HZ = 880
+
+# 逐步模式中每个步骤对应的方法和处理数量的统计项
+STEPS = [
+    ('step0_split', 'step0_split_audio_files', None),
+    ('step1_filter', 'step1_filter_files', ('deleted_files', 'kept_files')),
+    ('step2_reorganize', 'step2_reorganize_files', ('renamed_files',)),
+    ('step3_convert', 'step3_convert_to_mp3', ('converted_files',)),
+    ('step4_copy', 'step4_copy_to_target', ('copied_files',)),
+]
+
+
+def tone(duration, frequency, amplitude=0.3):
+    """带淡入淡出的纯音（提示音）"""
+    n = int(duration * FRAME_RATE)
+    t = np.arange(n) / FRAME_RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t) * np.hanning(n)
+
+
+def speech_burst(rng):
+    """类似语音的片段：1-3个音节，每个音节为带颤音的谐波 + 少量气声，音节之间有短停顿"""
+    parts = []
+    for i in range(rng.integers(1, 4)):
+        if i:
+            parts.append(np.zeros(int(rng.uniform(0.04, 0.15) * FRAME_RATE)))
+        n = int(rng.uniform(0.12, 0.3) * FRAME_RATE)
+        t = np.arange(n) / FRAME_RATE
+        f0 = rng.uniform(100, 250) * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / FRAME_RATE
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 9))
+        syllable = (0.3 * voiced + 0.01 * rng.standard_normal(n)) * np.hanning(n)
+        parts.append(syllable * rng.uniform(0.6, 1.0))
+    return np.concatenate(parts)
+
+
+def generate_source(rng, words, gap_ms, jitter_ms):
+    """生成一个原始文件的PCM（单声道16bit），返回 (字节数据, 时长秒)"""
+    def gap():
+        return np.zeros(int(max(0.0, gap_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000 * FRAME_RATE))
+
+    parts = [gap()]
+    for _ in range(2):
+        parts += [tone(0.3, PROMPT_TONE_HZ), gap()]
+    for _ in range(words):
+        burst = speech_burst(rng)
+        parts += [burst, gap(), burst * rng.uniform(0.8, 1.0), gap()]
+
+    samples = np.concatenate(parts)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+    return pcm, len(samples) / FRAME_RATE
+
+
+def generate_fixtures(out_dir, text_root, args):
+    """生成所有原始文件和课文数据，返回 (文件数, 音频总秒数)"""
+    rng = np.random.default_rng(args.seed)
+    encoder = None
+    if args.format == "mp3":
+        from encoder import create_encoder
+        from pydub import AudioSegment
+        encoder = create_encoder("auto", "128k")
+
+    total_seconds = 0.0
+    count = 0
+    for lesson in range(1, args.lessons + 1):
+        lesson_words = 0
+        for source in range(1, args.sources + 1):
+            prefix = f"{lesson:02d}-{source:02d}"
+            pcm, seconds = generate_source(rng, args.words, args.gap_ms, args.jitter_ms)
+            total_seconds += seconds
+            lesson_words += args.words
+            count += 1
+
+            if encoder is None:
+                with wave.open(os.path.join(out_dir, f"{prefix}_original.wav"), 'wb') as out:
+                    out.setnchannels(1)
+                    out.setsampwidth(2)
+                    out.setframerate(FRAME_RATE)
+                    out.writeframes(pcm)
+            else:
+                audio = AudioSegment(data=pcm, sample_width=2, frame_rate=FRAME_RATE, channels=1)
+                for path, error in encoder.submit(audio, os.path.join(out_dir, f"{prefix}.mp3")) + encoder.flush():
+                    if error is not None:
+                        raise RuntimeError(f"生成 {path} 失败: {error}")
+
+        lesson_dir = os.path.join(text_root, f"lesson{lesson}")
+        os.makedirs(lesson_dir, exist_ok=True)
+        with open(os.path.join(lesson_dir, "words.json"), 'w', encoding='utf-8') as f:
+            json.dump({'words': [{'korean': f"단어{i}"} for i in range(1, lesson_words + 1)]}, f, ensure_ascii=False)
+
+    return count, total_seconds
+
+
+def run_scenario(scenario, work_dir, text_root, options):
+    """在子进程中运行一个场景，返回性能报告中的步骤数据"""
+    from audio_processor import AudioProcessor
+
+    processor = AudioProcessor(source_dir=work_dir, log_level=logging.WARNING, workers=options['workers'])
+    processor.set_split_params(min_silence_len=options['min_silence_len'], silence_thresh=options['silence_thresh'])
+    processor.split_mode = options['split_mode']
+    processor.text_root = text_root
+    processor.book2_root = os.path.join(work_dir, "target")
+    os.makedirs(processor.book2_root, exist_ok=True)
+
+    if scenario == "fused":
+        processor.run_fused_steps()
+        counts = {'fused_convert': processor.stats['converted_files'], 'step4_copy': processor.stats['copied_files']}
+        steps = processor.report.data['steps']
+        for step in steps:
+            step['count'] = counts[step['name']]
+        return steps
+
+    if scenario == "pipelined":
+        processor.run_pipelined_steps()
+        steps = processor.report.data['steps']
+        for step in steps:
+            step['count'] = processor.stats['copied_files']
+        return steps
+
+    # 逐步模式：单独计时每个步骤，处理数量取对应统计项的增量
+    processor.start_report("steps")
+    source_count = len(processor.find_original_files())
+    counts = {}
+    for name, method, counters in STEPS:
+        before = dict(processor.stats)
+        with processor.report_step(name):
+            getattr(processor, method)()
+        counts[name] = source_count if counters is None else sum(processor.stats[c] - before[c] for c in counters)
+
+    steps = processor.report.data['steps']
+    for step in steps:
+        step['count'] = counts[step['name']]
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频处理流程基准测试（合成音频）")
+    parser.add_argument('--lessons', type=int, default=2, help="课程数")
+    parser.add_argument('--sources', type=int, default=2, help="每课原始文件数")
+    parser.add_argument('--words', type=int, default=15, help="每个原始文件的条目数")
+    parser.add_argument('--gap-ms', type=float, default=2000, help="片段之间的静音长度（ms）")
+    parser.add_argument('--jitter-ms', type=float, default=300, help="静音长度的随机浮动（ms）")
+    parser.add_argument('--format', choices=("wav", "mp3"), default="wav", help="原始文件格式")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--workers', type=int, default=1, help="AudioProcessor 并行进程数")
+    parser.add_argument('--split-mode', choices=("silence", "count"), default="silence", help="切割方式")
+    parser.add_argument('--scenarios', nargs='+', choices=("steps", "fused", "pipelined"),
+                        default=["steps", "fused", "pipelined"])
+    parser.add_argument('--json', help="把结果保存为JSON")
+    parser.add_argument('--keep', action='store_true', help="保留临时目录")
+    args = parser.parse_args()
+
+    options = {
+        'workers': args.workers,
+        'split_mode': args.split_mode,
+        # 切割参数与菜单中推荐的值相同
+        'min_silence_len': 1500,
+        'silence_thresh': -35,
+    }
+
+    base_dir = tempfile.mkdtemp(prefix="audio_benchmark_")
+    fixtures = os.path.join(base_dir, "fixtures")
+    text_root = os.path.join(base_dir, "text")
+    os.makedirs(fixtures)
+
+    start = time.perf_counter()
+    file_count, audio_seconds = generate_fixtures(fixtures, text_root, args)
+    print(f"合成原始文件: {file_count} 个 ({args.format})，共 {audio_seconds:.1f} 秒音频，"
+          f"生成耗时 {time.perf_counter() - start:.1f}s")
+    print(f"目录: {base_dir}")
+
+    results = {'config': vars(args), 'source_files': file_count, 'audio_seconds': audio_seconds, 'scenarios': {}}
+    # 每个场景使用全新的子进程，峰值内存从零开始统计
+    context = multiprocessing.get_context("spawn")
+    try:
+        for scenario in args.scenarios:
+            work_dir = os.path.join(base_dir, scenario)
+            shutil.copytree(fixtures, work_dir)
+            # 子进程本身还要创建进程池，所以不能用守护进程的 multiprocessing.Pool
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                steps = pool.submit(run_scenario, scenario, work_dir, text_root, options).result()
+            results['scenarios'][scenario] = steps
+
+            print("-" * 88)
+            print(f"{'场景/步骤':<24}{'耗时s':>9}{'CPU s':>9}{'数量':>7}{'文件/秒':>10}{'音频秒/秒':>12}{'峰值MB':>10}")
+            total_wall = sum(step['wall_s'] for step in steps)
+            for step in steps + [{'name': 'total', 'wall_s': total_wall, 'cpu_s': sum(s['cpu_s'] for s in steps),
+                                  'count': file_count, 'peak_rss_mb': max(s['peak_rss_mb'] or 0 for s in steps)}]:
+                wall = max(step['wall_s'], 1e-9)
+                step['files_per_s'] = round(step['count'] / wall, 3)
+                step['audio_s_per_s'] = round(audio_seconds / wall, 3)
+                print(f"{scenario + '/' + step['name']:<24}{step['wall_s']:>9.3f}{step['cpu_s']:>9.2f}{step['count']:>7}"
+                      f"{step['files_per_s']:>10.1f}{step['audio_s_per_s']:>12.1f}{step['peak_rss_mb'] or 0:>10.1f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
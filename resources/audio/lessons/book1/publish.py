@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布文件到目标目录
+功能：
+1. 先比较再写入：同一个文件（硬链接）、大小和修改时间相同、或大小相同且内容哈希相同时跳过
+2. 需要写入时优先硬链接，其次写时复制（reflink，Linux FICLONE），最后才真正复制
+3. 每个文件先写到临时名再 os.replace，目标目录中任何时刻都不会出现写了一半的文件
+4. 过期文件先全部改名移入暂存目录再一次删除，出错时移回原处，目标目录不会只删掉一部分
+"""
+
+import os
+import shutil
+
+from build_cache import file_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl
+    fcntl = None
+
+
+PUBLISH_MODES = ("link", "copy")
+
+# linux/fs.h: #define FICLONE _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+STALE_DIR_PREFIX = ".stale-"   # remove_stale 的暂存目录（在目标目录内，保证改名不跨文件系统）
+
+
+def is_unchanged(src, dst):
+    """目标文件是否已经与源文件相同（尽量只用 stat 判断，必要时才读取内容）"""
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src)
+
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+
+    if file_digest(src) != file_digest(dst):
+        return False
+    # 内容相同：同步修改时间，下次只需比较 stat
+    os.utime(dst, ns=(dst_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def reflink(src, dst):
+    """写时复制（只复制元数据，数据块共享），不支持时抛出 OSError"""
+    if fcntl is None:
+        raise OSError("当前平台不支持 reflink")
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def place_file(src, tmp_path, mode):
+    """在 tmp_path 生成 src 的副本，返回使用的方式"""
+    if mode == "link":
+        try:
+            os.link(src, tmp_path)
+            return "linked"
+        except OSError:
+            pass  # 跨文件系统或不支持硬链接
+
+    try:
+        reflink(src, tmp_path)
+        return "reflinked"
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    shutil.copy2(src, tmp_path)
+    return "copied"
+
+
+def publish_file(src, dst, mode="link"):
+    """把 src 发布到 dst
+
+    Args:
+        mode: link 优先硬链接；copy 生成独立的文件（优先 reflink）
+
+    Returns:
+        "unchanged" / "linked" / "reflinked" / "copied"
+    """
+    if mode not in PUBLISH_MODES:
+        raise ValueError(f"未知的发布方式: {mode}（可选: {', '.join(PUBLISH_MODES)}）")
+    if is_unchanged(src, dst):
+        return "unchanged"
+
+    tmp_path = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.tmp")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        action = place_file(src, tmp_path, mode)
+        os.replace(tmp_path, dst)
+        return action
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def remove_stale(directory, keep, pattern):
+    """删除目录中匹配 pattern 但不在 keep 中的文件，返回删除的文件名
+
+    过期文件先逐个改名移入暂存目录，全部移走后再整体删除暂存目录；
+    改名出错时已移走的文件会移回原处，目录中的文件要么全部删除，要么保持不变。
+    调用方应在所有文件都发布成功之后再调用。上次运行中断留下的暂存目录会先被删除。
+    """
+    for name in os.listdir(directory):
+        if name.startswith(STALE_DIR_PREFIX):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    stale = [name for name in sorted(os.listdir(directory)) if pattern.match(name) and name not in keep]
+    if not stale:
+        return []
+
+    staging = os.path.join(directory, f"{STALE_DIR_PREFIX}{os.getpid()}")
+    os.mkdir(staging)
+    moved = []
+    try:
+        for name in stale:
+            os.replace(os.path.join(directory, name), os.path.join(staging, name))
+            moved.append(name)
+    except OSError:
+        for name in moved:
+            os.replace(os.path.join(staging, name), os.path.join(directory, name))
+        os.rmdir(staging)
+        raise
+    shutil.rmtree(staging)
+    return stale
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行报告与日志队列
+功能：
+1. 记录每个步骤的墙钟时间、CPU时间（含子进程）和峰值内存
+2. 汇总每个文件的 解码/检测/写出/编码 耗时和读写字节数，保存为JSON，便于跨版本比较
+3. 日志经过队列由后台线程写出，逐文件日志可以按比例抽样输出
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+
+REPORT_VERSION = 1
+
+# 逐文件日志的标记：logger.info(msg, extra=PER_FILE)，抽样时只丢弃带这个标记的记录
+PER_FILE = {'per_file': True}
+
+
+def peak_rss_mb(who=None):
+    """峰值常驻内存（MB），无法获取时返回None
+
+    Args:
+        who: 默认为当前进程；传入 resource.RUSAGE_CHILDREN 时为已结束子进程中的最大值
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # macOS 的单位是字节，Linux 是KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def cpu_seconds():
+    """当前进程及已结束子进程的CPU时间（用户态 + 内核态）"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class SamplingFilter(logging.Filter):
+    """逐文件日志每 every 条只输出1条，其他日志不受影响"""
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = every
+        self.seen = 0
+        self.dropped = 0
+
+    def filter(self, record):
+        if self.every <= 1 or not getattr(record, 'per_file', False):
+            return True
+        self.seen += 1
+        if (self.seen - 1) % self.every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+def start_queued_logging(handlers, level):
+    """根日志器只挂一个队列处理器，真正的写文件和控制台输出在后台线程中进行
+
+    Returns:
+        (QueueListener, SamplingFilter)
+    """
+    queue = SimpleQueue()
+    queue_handler = QueueHandler(queue)
+    sampler = SamplingFilter()
+    queue_handler.addFilter(sampler)
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener, sampler
+
+
+def find_sampler():
+    """已经配置过日志时，取出根日志器上的抽样过滤器"""
+    for handler in logging.getLogger().handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, SamplingFilter):
+                return log_filter
+    return SamplingFilter()
+
+
+def file_entry(step, name, path=None):
+    """新建一条文件计时记录，path 存在时记录读取的字节数"""
+    return {
+        'step': step,
+        'file': name,
+        'bytes_read': os.path.getsize(path) if path and os.path.exists(path) else 0,
+        'bytes_written': 0
+    }
+
+
+@contextmanager
+def timed(entry, phase):
+    """把代码块的耗时累加到 entry['<phase>_s']"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        key = f"{phase}_s"
+        entry[key] = round(entry.get(key, 0) + time.perf_counter() - start, 6)
+
+
+class RunReport:
+    """一次完整运行的性能报告"""
+
+    def __init__(self, mode):
+        self.started = time.perf_counter()
+        self.cpu_started = cpu_seconds()
+        self.data = {
+            'version': REPORT_VERSION,
+            'mode': mode,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'steps': [],
+            'files': []
+        }
+
+    @contextmanager
+    def step(self, name):
+        """记录一个步骤的墙钟时间、CPU时间和结束时的峰值内存"""
+        wall = time.perf_counter()
+        cpu = cpu_seconds()
+        files_before = len(self.data['files'])
+        try:
+            yield
+        finally:
+            self.data['steps'].append({
+                'name': name,
+                'wall_s': round(time.perf_counter() - wall, 6),
+                'cpu_s': round(cpu_seconds() - cpu, 6),
+                'files': len(self.data['files']) - files_before,
+                'peak_rss_mb': peak_rss_mb()
+            })
+
+    def add_files(self, entries):
+        self.data['files'].extend(entries)
+
+    def finish(self, stats, log_dropped=0):
+        """填写总计"""
+        files = self.data['files']
+        self.data['totals'] = {
+            'wall_s': round(time.perf_counter() - self.started, 6),
+            'cpu_s': round(cpu_seconds() - self.cpu_started, 6),
+            'bytes_read': sum(entry['bytes_read'] for entry in files),
+            'bytes_written': sum(entry['bytes_written'] for entry in files),
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_children_mb': peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+            'log_lines_dropped': log_dropped,
+            'stats': dict(stats)
+        }
+        for phase in ('decode', 'detect', 'write', 'encode'):
+            self.data['totals'][f"{phase}_s"] = round(sum(entry.get(f"{phase}_s", 0) for entry in files), 6)
+
+    def save(self, path):
+        """写入JSON（先写临时文件再替换）"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
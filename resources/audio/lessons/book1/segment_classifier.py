@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按特征区分 提示音 / 原音 / 跟读 片段
+功能：
+1. 一个原始文件的所有片段一起计算特征（NumPy 批量FFT）：时长、RMS、频谱质心、纯音度、
+   频带能量分布，以及均匀取样的能量包络
+2. 纯音度高（能量集中在一个频率附近）的片段是提示音；很短或没有谐波峰（宽带）的片段是噪声
+3. 其余片段按前后两段的相似度（时长比、包络形状、频带分布）配对：成对的前一段是原音（保留），
+   后一段是跟读（删除）；配对用动态规划选出相似度总和最大的方案，多出一段噪声或片段数为奇数时
+   不会像按位置“隔一个保留一个”那样整体错位
+4. 每个片段的特征、标签和判断依据写入决策报告，便于检查
+
+原来的规则（删除编号1、2，剩余隔一个保留一个）见 AudioProcessor.select_segments。
+"""
+
+import numpy as np
+
+from silence import SAMPLE_DTYPES
+
+
+FRAME_SIZE = 2048          # 分析帧长度（采样点）
+FRAMES_PER_SEGMENT = 32    # 每个片段均匀取样的帧数，计算量与片段长度无关；也是包络的点数
+BATCH_SEGMENTS = 64        # 每次FFT的片段数，限制临时数组的内存
+BANDS = 24                 # 频带能量分布的频带数（100Hz 到 8kHz 按对数划分）
+
+PROMPT_PURITY = 0.85       # 主频附近的能量占比高于此值视为提示音（纯音）；语音的谐波分散，一般低于0.7
+NOISE_PURITY = 0.05        # 低于此值说明能量均匀分布在各频率（宽带噪声），语音有明显的谐波峰
+MIN_SPEECH_MS = 150        # 比这更短的片段视为噪声
+REPEAT_SIMILARITY = 0.6    # 相邻两段相似度高于此值才可能是 原音 + 跟读
+LEADING_PROMPTS = 2        # 没有检测到纯音提示音时，按原规则把开头几段视为提示音
+
+LABELS = ('prompt', 'noise', 'target', 'repeat')
+KEEP_LABELS = ('target',)
+
+
+def classifier_params():
+    """影响分类结果的参数（用于增量缓存）"""
+    return {
+        'frame_size': FRAME_SIZE,
+        'frames_per_segment': FRAMES_PER_SEGMENT,
+        'bands': BANDS,
+        'prompt_purity': PROMPT_PURITY,
+        'noise_purity': NOISE_PURITY,
+        'min_speech_ms': MIN_SPEECH_MS,
+        'repeat_similarity': REPEAT_SIMILARITY,
+        'leading_prompts': LEADING_PROMPTS,
+        'keep_labels': list(KEEP_LABELS),
+    }
+
+
+def mono_samples(source, start_ms=None, end_ms=None):
+    """把 PcmAudio / AudioSegment 的 [start_ms, end_ms) 转换为 [-1, 1] 的单声道 float32 数组"""
+    if hasattr(source, 'samples'):  # PcmAudio：直接从映射视图取，不复制整段字节
+        start = source.frame_at(0 if start_ms is None else start_ms) * source.channels
+        end = source.frame_at(len(source) if end_ms is None else end_ms) * source.channels
+        samples = source.samples[start:end]
+    else:
+        audio = source[start_ms:end_ms] if start_ms is not None else source
+        samples = np.frombuffer(audio.raw_data, dtype=SAMPLE_DTYPES[audio.sample_width])
+    scale = float(2 ** (source.sample_width * 8 - 1))
+    samples = samples[:len(samples) - len(samples) % source.channels].astype(np.float32) / scale
+    return samples.reshape(-1, source.channels).mean(axis=1)
+
+
+def sample_frames(samples):
+    """在片段中均匀取 FRAMES_PER_SEGMENT 帧（短片段的帧相互重叠），返回 (帧数, FRAME_SIZE)"""
+    if len(samples) < FRAME_SIZE:
+        samples = np.pad(samples, (0, FRAME_SIZE - len(samples)))
+    starts = np.linspace(0, len(samples) - FRAME_SIZE, FRAMES_PER_SEGMENT).astype(np.int64)
+    return samples[starts[:, None] + np.arange(FRAME_SIZE)]
+
+
+def segment_features(segments, frame_rate):
+    """批量计算特征
+
+    Args:
+        segments: [单声道 float32 样本数组]
+        frame_rate: 采样率
+
+    Returns:
+        {'duration_ms', 'rms_db', 'centroid_hz', 'purity': (n,), 'envelope_db': (n, 帧数), 'bands': (n, BANDS)}
+    """
+    count = len(segments)
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1 / frame_rate)
+    edges = np.searchsorted(freqs, np.geomspace(100, min(8000, frame_rate / 2), BANDS + 1))
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+
+    features = {
+        'duration_ms': np.array([1000 * len(s) / frame_rate for s in segments]),
+        'rms_db': np.empty(count),
+        'centroid_hz': np.empty(count),
+        'purity': np.empty(count),
+        'envelope_db': np.empty((count, FRAMES_PER_SEGMENT)),
+        'bands': np.empty((count, BANDS)),
+    }
+    for first in range(0, count, BATCH_SEGMENTS):
+        batch = slice(first, min(first + BATCH_SEGMENTS, count))
+        frames = np.stack([sample_frames(s) for s in segments[batch]])      # (片段, 帧, 采样点)
+        frame_rms = np.sqrt(np.mean(frames ** 2, axis=2))
+        features['envelope_db'][batch] = 20 * np.log10(frame_rms + 1e-6)
+        features['rms_db'][batch] = 20 * np.log10(np.sqrt(np.mean(frame_rms ** 2, axis=1)) + 1e-6)
+
+        power = np.abs(np.fft.rfft(frames * window, axis=2)) ** 2
+        spectrum = power.mean(axis=1)                                       # (片段, 频点)
+        spectrum[:, 0] = 0                                                  # 去掉直流分量
+        total = spectrum.sum(axis=1) + 1e-12
+        features['centroid_hz'][batch] = spectrum @ freqs / total
+
+        # 纯音度：主峰 ±2 个频点（汉宁窗主瓣宽度）内的能量占比
+        peak = spectrum.argmax(axis=1)
+        offsets = np.clip(peak[:, None] + np.arange(-2, 3), 0, spectrum.shape[1] - 1)
+        features['purity'][batch] = np.take_along_axis(spectrum, offsets, axis=1).sum(axis=1) / total
+
+        bands = np.add.reduceat(spectrum, edges[:-1], axis=1)[:, :BANDS]
+        bands = np.log10(bands + 1e-12)
+        features['bands'][batch] = bands - bands.mean(axis=1, keepdims=True)
+    return features
+
+
+def correlation(a, b):
+    """逐行的皮尔逊相关系数，常数行为0"""
+    a = a - a.mean(axis=1, keepdims=True)
+    b = b - b.mean(axis=1, keepdims=True)
+    norm = np.sqrt((a ** 2).sum(axis=1) * (b ** 2).sum(axis=1))
+    return np.divide((a * b).sum(axis=1), norm, out=np.zeros(len(a)), where=norm > 0)
+
+
+def pair_similarity(features, first, second):
+    """片段 first[k] 与 second[k] 的相似度（0-1）：时长比、包络形状、频带分布的平均"""
+    if not len(first):
+        return np.zeros(0)
+    first, second = np.asarray(first), np.asarray(second)
+    duration = features['duration_ms']
+    duration_ratio = np.minimum(duration[first], duration[second]) / np.maximum(duration[first], duration[second])
+    envelope = (correlation(features['envelope_db'][first], features['envelope_db'][second]) + 1) / 2
+    bands = (correlation(features['bands'][first], features['bands'][second]) + 1) / 2
+    return (duration_ratio + envelope + bands) / 3
+
+
+def pair_segments(similarity):
+    """把相邻片段两两配对，返回每段的标签（'target' 或 'repeat'）
+
+    Args:
+        similarity: similarity[k] 为第 k 段与第 k+1 段的相似度
+
+    动态规划：best[k] 为前 k 段的最大得分，成对得分为 相似度 - REPEAT_SIMILARITY，单独一段为0；
+    得分相同时优先成对，所有片段都相似时与原来“隔一个保留一个”的结果一致。
+    """
+    count = len(similarity) + 1
+    best = [0.0] * (count + 1)
+    paired = [False] * (count + 1)
+    for k in range(2, count + 1):
+        best[k] = best[k - 1]
+        score = best[k - 2] + similarity[k - 2] - REPEAT_SIMILARITY
+        if score >= best[k]:
+            best[k] = score
+            paired[k] = True
+
+    labels = [None] * count
+    k = count
+    while k > 0:
+        if paired[k]:
+            labels[k - 2], labels[k - 1] = 'target', 'repeat'
+            k -= 2
+        else:
+            labels[k - 1] = 'target'
+            k -= 1
+    return labels
+
+
+def classify_segments(segments, frame_rate):
+    """给一个原始文件的所有片段（按时间顺序）打标签
+
+    Returns:
+        [{'label', 'reason', 'duration_ms', 'rms_db', 'centroid_hz', 'purity', 'similarity_next'}]
+    """
+    if not segments:
+        return []
+    features = segment_features(segments, frame_rate)
+
+    labels = {}
+    reasons = {}
+    for i in range(len(segments)):
+        if features['duration_ms'][i] < MIN_SPEECH_MS:
+            labels[i], reasons[i] = 'noise', 'short'
+        elif features['purity'][i] >= PROMPT_PURITY:
+            labels[i], reasons[i] = 'prompt', 'tonal'
+        elif features['purity'][i] < NOISE_PURITY:
+            labels[i], reasons[i] = 'noise', 'broadband'
+    if not any(label == 'prompt' for label in labels.values()):
+        # 提示音不是纯音时退回原规则：开头几段是提示音
+        speech = [i for i in range(len(segments)) if i not in labels]
+        for i in speech[:LEADING_PROMPTS]:
+            labels[i], reasons[i] = 'prompt', 'leading'
+
+    # 跳过提示音和噪声，相邻的语音片段两两比较（原音和跟读之间夹着一段噪声时也能配对）
+    speech = [i for i in range(len(segments)) if i not in labels]
+    similarity = pair_similarity(features, speech[:-1], speech[1:])
+    similarity_next = {i: float(value) for i, value in zip(speech, similarity)}
+    pairs = pair_segments(similarity) if speech else []
+    for k, i in enumerate(speech):
+        labels[i] = pairs[k]
+        if pairs[k] == 'repeat':
+            reasons[i] = 'similar'
+        elif k + 1 < len(pairs) and pairs[k + 1] == 'repeat':
+            reasons[i] = 'paired'
+        else:
+            reasons[i] = 'unpaired'
+
+    return [
+        {
+            'label': labels[i],
+            'reason': reasons[i],
+            'duration_ms': round(float(features['duration_ms'][i])),
+            'rms_db': round(float(features['rms_db'][i]), 1),
+            'centroid_hz': round(float(features['centroid_hz'][i])),
+            'purity': round(float(features['purity'][i]), 3),
+            'similarity_next': round(similarity_next[i], 3) if i in similarity_next else None,
+        }
+        for i in range(len(segments))
+    ]
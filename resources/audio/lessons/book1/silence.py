@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 NumPy 的静音检测
+功能：
+1. 一次性把PCM数据转换为每毫秒的能量包络（平方和前缀和）
+2. 在包络上用数组运算检测静音/非静音片段
+3. 返回与 pydub.silence.detect_silence / detect_nonsilent 相同的 [start, end] 毫秒区间
+4. 已知目标片段数时，直接选出最长的若干段静音作为切点，不需要反复调整参数
+
+pydub 对每个窗口都重新切片并计算RMS，长录音上非常慢；
+这里每个窗口的RMS只需要两次前缀和相减。
+"""
+
+import numpy as np
+
+
+# 按采样位深对应的 NumPy 类型（与 audioop 一致，均按有符号整数处理）
+SAMPLE_DTYPES = {
+    1: np.int8,
+    2: np.dtype('<i2'),
+    4: np.dtype('<i4'),
+}
+
+# 分块计算能量时每块的毫秒数，控制临时数组的内存占用
+ENVELOPE_CHUNK_MS = 10000
+
+# 检测静音时每批计算的窗口数
+DETECT_BLOCK_MS = 600000
+
+# 按目标片段数切割时，候选切点（静音区间）的最小长度
+MIN_GAP_MS = 100
+
+
+def db_to_float(db):
+    """dBFS 转换为幅度比例（与 pydub.utils.db_to_float 一致）"""
+    return 10 ** (db / 20)
+
+
+class EnergyEnvelope:
+    """每毫秒的能量包络
+
+    cum_energy[i] 为前 i 毫秒所有采样值平方和（毫秒起点对应的帧号与 pydub 切片的取整方式一致），
+    因此任意毫秒窗口的RMS都可以在 O(1) 内得到，结果与 audioop.rms 相同。
+    每小时音频的包络只占约 30MB，与PCM数据本身相比可以忽略。
+    """
+
+    def __init__(self, cum_energy, frame_rate, channels, sample_width, frame_count, peak=0):
+        self.cum_energy = cum_energy
+        self.frame_rate = frame_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.frame_count = frame_count
+        self.peak = peak
+        self.max_possible_amplitude = (2 ** (sample_width * 8)) / 2
+
+    def __len__(self):
+        """包络长度（毫秒），与 len(AudioSegment) 相同"""
+        return len(self.cum_energy) - 1
+
+    @property
+    def sample_count(self):
+        """包络覆盖的采样数"""
+        return min(self.frames_at(len(self)), self.frame_count) * self.channels
+
+    def frames_at(self, ms):
+        """毫秒位置对应的帧号，与 AudioSegment._parse_position 相同：int(ms * (frame_rate / 1000.0))"""
+        if np.isscalar(ms):
+            return int(ms * (self.frame_rate / 1000.0))
+        return (ms * (self.frame_rate / 1000.0)).astype(np.int64)
+
+    @property
+    def dBFS(self):
+        """整段音频的RMS音量（dBFS）"""
+        if not self.sample_count or not self.cum_energy[-1]:
+            return -float("infinity")
+        rms = int(np.sqrt(float(self.cum_energy[-1]) / self.sample_count))
+        return 20 * np.log10(rms / self.max_possible_amplitude) if rms else -float("infinity")
+
+    @property
+    def max_dBFS(self):
+        """整段音频的峰值音量（dBFS）"""
+        if not self.peak:
+            return -float("infinity")
+        return 20 * np.log10(self.peak / self.max_possible_amplitude)
+
+    @classmethod
+    def from_audio_segment(cls, audio, chunk_ms=ENVELOPE_CHUNK_MS):
+        """从 pydub.AudioSegment 构建包络（直接读取原始数据，不复制）"""
+        return cls.from_pcm(
+            audio.raw_data,
+            sample_width=audio.sample_width,
+            channels=audio.channels,
+            frame_rate=audio.frame_rate,
+            chunk_ms=chunk_ms
+        )
+
+    @classmethod
+    def from_pcm(cls, data, sample_width, channels, frame_rate, chunk_ms=ENVELOPE_CHUNK_MS,
+                 on_chunk_done=None):
+        """从交错排列的PCM数据构建包络
+
+        Args:
+            data: bytes / memoryview / np.ndarray（可以是映射到文件的数组）
+            sample_width: 采样位深（字节）
+            channels: 声道数
+            frame_rate: 采样率(Hz)
+            chunk_ms: 分块大小(毫秒)，块内才会生成临时数组
+            on_chunk_done: 每处理完一块后回调 (sample_start, sample_end)，
+                可用于释放已读过的映射页面
+        """
+        if sample_width not in SAMPLE_DTYPES:
+            raise ValueError(f"不支持的采样位深: {sample_width * 8}bit")
+
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=SAMPLE_DTYPES[sample_width])
+
+        frame_count = len(samples) // channels
+        length_ms = round(1000 * (frame_count / frame_rate))
+
+        # 32bit 采样的平方和会超出 int64，改用浮点（audioop 内部本来就是 double）
+        acc_dtype = np.float64 if sample_width == 4 else np.int64
+
+        envelope = cls(np.zeros(length_ms + 1, dtype=acc_dtype), frame_rate, channels,
+                       sample_width, frame_count)
+        cum_energy = envelope.cum_energy
+        for lo in range(0, length_ms, chunk_ms):
+            hi = min(lo + chunk_ms, length_ms)
+            bounds = np.minimum(envelope.frames_at(np.arange(lo, hi + 1)), frame_count) * channels
+            block = samples[bounds[0]:bounds[-1]].astype(acc_dtype)
+            if len(block):
+                envelope.peak = max(envelope.peak, int(np.abs(block).max()))
+            prefix = np.zeros(len(block) + 1, dtype=acc_dtype)
+            np.cumsum(block * block, out=prefix[1:])
+            # 先写入每毫秒能量，最后整体做一次前缀和
+            cum_energy[lo + 1:hi + 1] = np.diff(prefix[bounds - bounds[0]])
+            del block, prefix
+            if on_chunk_done is not None:
+                on_chunk_done(int(bounds[0]), int(bounds[-1]))
+
+        np.cumsum(cum_energy, out=cum_energy)
+        return envelope
+
+    def window_rms(self, window_ms, starts=None):
+        """计算从每个起点开始、长度为 window_ms 的窗口RMS（与 audioop.rms 一致，取整）"""
+        if starts is None:
+            starts = np.arange(len(self) - window_ms + 1)
+        ends = starts + window_ms
+        sums = (self.cum_energy[ends] - self.cum_energy[starts]).astype(np.float64)
+        # pydub 在切片末尾不足时用静音帧补齐，所以分母按未截断的帧数计算
+        counts = (self.frames_at(ends) - self.frames_at(starts)) * self.channels
+        rms = np.zeros(len(starts), dtype=np.float64)
+        np.divide(sums, counts, out=rms, where=counts > 0)
+        return np.floor(np.sqrt(rms))
+
+    def window_start_blocks(self, min_silence_len, seek_step=1):
+        """按批生成所有窗口起点（与 pydub 相同，保证最后一个窗口也被检查）"""
+        seg_len = len(self)
+        if seg_len < min_silence_len:
+            return
+
+        # 分批生成，避免长录音一次生成多个与包络等长的临时数组
+        last_slice_start = seg_len - min_silence_len
+        span = DETECT_BLOCK_MS * seek_step
+        for lo in range(0, last_slice_start + 1, span):
+            yield np.arange(lo, min(lo + span, last_slice_start + 1), seek_step)
+
+        if last_slice_start % seek_step:
+            yield np.array([last_slice_start])
+
+    def silent_starts(self, min_silence_len, silence_thresh, seek_step=1):
+        """返回所有静音窗口的起点（毫秒）"""
+        thresh = db_to_float(silence_thresh) * self.max_possible_amplitude
+        silent = [
+            starts[self.window_rms(min_silence_len, starts) <= thresh]
+            for starts in self.window_start_blocks(min_silence_len, seek_step)
+        ]
+        return np.concatenate(silent) if silent else np.zeros(0, dtype=np.int64)
+
+    def detect_silence(self, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+        """返回所有静音区间 [start, end]（毫秒），与 pydub.silence.detect_silence 相同"""
+        starts = self.silent_starts(min_silence_len, silence_thresh, seek_step)
+        range_starts, range_ends = merge_silent_starts(starts, min_silence_len, seek_step)
+        return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
+    def detect_nonsilent(self, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+        """返回所有非静音区间 [start, end]（毫秒），与 pydub.silence.detect_nonsilent 相同"""
+        silent_ranges = self.detect_silence(min_silence_len, silence_thresh, seek_step)
+        return invert_ranges(silent_ranges, len(self))
+
+    def analyze_grid(self, thresholds, min_silence_lens, seek_step=1):
+        """在同一个包络上统计多组 静音长度×阈值 的检测结果
+
+        每个静音长度只计算一次窗口RMS，所有阈值共用，
+        因此 20×10 的网格耗时与一次 pydub 检测相当甚至更短。
+
+        Returns:
+            {(min_silence_len, silence_thresh): (片段数, 非静音总时长ms)}
+        """
+        results = {}
+        for min_silence_len in min_silence_lens:
+            limits = [db_to_float(t) * self.max_possible_amplitude for t in thresholds]
+            silent = [[] for _ in thresholds]
+            for starts in self.window_start_blocks(min_silence_len, seek_step):
+                rms = self.window_rms(min_silence_len, starts)
+                for collected, limit in zip(silent, limits):
+                    collected.append(starts[rms <= limit])
+
+            for thresh, collected in zip(thresholds, silent):
+                starts = np.concatenate(collected) if collected else np.zeros(0, dtype=np.int64)
+                range_starts, range_ends = merge_silent_starts(starts, min_silence_len, seek_step)
+                results[(min_silence_len, thresh)] = nonsilent_summary(range_starts, range_ends, len(self))
+        return results
+
+
+def merge_silent_starts(starts, min_silence_len, seek_step=1):
+    """把静音窗口起点合并为静音区间，返回 (起点数组, 终点数组)"""
+    if len(starts) == 0:
+        return starts, starts
+
+    # 相邻静音窗口之间既不连续、又有缺口时才断开（与 pydub 的合并规则一致）
+    gaps = np.diff(starts)
+    breaks = np.flatnonzero((gaps != seek_step) & (gaps > min_silence_len))
+    range_starts = starts[np.concatenate(([0], breaks + 1))]
+    range_ends = starts[np.concatenate((breaks, [len(starts) - 1]))] + min_silence_len
+    return range_starts, range_ends
+
+
+def nonsilent_summary(range_starts, range_ends, len_seg):
+    """不生成区间列表，直接统计非静音片段数和总时长（与 invert_ranges 的结果一致）"""
+    if len(range_starts) == 0:
+        return 1, len_seg
+
+    if range_starts[0] == 0 and range_ends[0] == len_seg:
+        return 0, 0
+
+    # 非静音区间：[0, s0], [e0, s1], ..., [e_last, len]，其中 [0, 0] 会被丢弃
+    count = len(range_starts) - (1 if range_starts[0] == 0 else 0)
+    total = int(range_starts[0]) + int((range_starts[1:] - range_ends[:-1]).sum())
+    if range_ends[-1] != len_seg:
+        count += 1
+        total += len_seg - int(range_ends[-1])
+    return count, total
+
+
+def invert_ranges(silent_ranges, len_seg):
+    """把静音区间转换为非静音区间（与 pydub.silence.detect_nonsilent 的处理一致）"""
+    # 没有静音，整段都是非静音
+    if not silent_ranges:
+        return [[0, len_seg]]
+
+    # 整段都是静音
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == len_seg:
+        return []
+
+    prev_end_i = 0
+    nonsilent_ranges = []
+    for start_i, end_i in silent_ranges:
+        nonsilent_ranges.append([prev_end_i, start_i])
+        prev_end_i = end_i
+
+    if end_i != len_seg:
+        nonsilent_ranges.append([prev_end_i, len_seg])
+
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+
+    return nonsilent_ranges
+
+
+def select_cut_gaps(sources, cut_count):
+    """在多个音源的内部静音区间中选出最长的 cut_count 个作为切点（top-k 切点选择）
+
+    用 min_silence_len=L 检测到的静音区间，与用 MIN_GAP_MS 检测后保留长度不小于 L 的区间大致相同，
+    所以按长度选出前 k 个近似于自动找到恰好切出目标片段数的静音长度，只需一次检测。
+    两者并不完全相同：pydub 判断的是长度为 min_silence_len 的窗口整体的 RMS，再合并相邻的静音窗口，
+    区间边界按 seek_step 取整；短窗口中夹着的一小段较响的声音，在长窗口中可能被平均掉。
+    长度相同时按音源顺序和位置先后选择，结果是确定的。
+
+    Args:
+        sources: [(静音区间列表, 音频长度ms), ...]，静音区间用 min_silence_len=MIN_GAP_MS 检测
+        cut_count: 需要的切点总数
+
+    Returns:
+        (每个音源选中的静音区间列表, 选中的最短静音长度, 未选中的最长静音长度)
+        候选不足时选中全部，未选中的最长长度为0
+    """
+    candidates = []
+    for index, (silent_ranges, len_seg) in enumerate(sources):
+        for start, end in silent_ranges:
+            # 接触首尾的静音只会被裁掉，不能作为切点
+            if start > 0 and end < len_seg:
+                candidates.append((-(end - start), index, start, end))
+    candidates.sort()
+
+    chosen = [[] for _ in sources]
+    for _, index, start, end in candidates[:max(0, cut_count)]:
+        chosen[index].append([start, end])
+
+    weakest = -candidates[cut_count - 1][0] if 0 < cut_count <= len(candidates) else 0
+    strongest_rejected = -candidates[cut_count][0] if 0 <= cut_count < len(candidates) else 0
+    return [sorted(ranges) for ranges in chosen], weakest, strongest_rejected
+
+
+def split_at_gaps(silent_ranges, len_seg, chosen):
+    """只在选中的静音处切开，首尾静音照常裁掉，返回非静音区间"""
+    edges = [r for r in silent_ranges if r[0] == 0 or r[1] == len_seg]
+    return invert_ranges(sorted(edges + chosen), len_seg)
+
+
+def detect_silence(audio_segment, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+    """pydub.silence.detect_silence 的向量化替代"""
+    envelope = EnergyEnvelope.from_audio_segment(audio_segment)
+    return envelope.detect_silence(min_silence_len, silence_thresh, seek_step)
+
+
+def detect_nonsilent(audio_segment, min_silence_len=1000, silence_thresh=-16, seek_step=1):
+    """pydub.silence.detect_nonsilent 的向量化替代，参数和返回值完全相同"""
+    envelope = EnergyEnvelope.from_audio_segment(audio_segment)
+    return envelope.detect_nonsilent(min_silence_len, silence_thresh, seek_step)
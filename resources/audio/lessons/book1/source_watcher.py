@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视模式：原始文件放入源目录后自动处理对应课程
+功能：
+1. Linux 上通过 inotify（可选依赖 inotify_simple，见 requirements-optional.txt）等待目录变化，不可用时定时轮询
+2. 防抖：文件的大小和修改时间在 debounce 秒内不再变化才认为写完，正在上传的文件不会被处理
+3. 新增、修改、删除的原始文件按课程放入有界队列，后台线程每次取出所有排队的课程，
+   调用 AudioProcessor.process_lessons（切割 → 筛选 → 编码 → 发布）；
+   同一时间只处理一批，文件级的并行度由 AudioProcessor.workers 决定
+4. 启动时先处理一次所有课程，增量缓存会跳过没有变化的课程
+
+用法: python audio_processor.py --watch [--debounce 2] [--poll-interval 1]
+"""
+
+import os
+import queue
+import threading
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # 没有安装 inotify_simple 或不是 Linux 时使用轮询
+    INotify = None
+
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_MAX_QUEUE = 32
+RESCAN_INTERVAL = 60.0  # 使用 inotify 时也定期重新扫描，防止漏掉事件
+
+
+class SourceWatcher:
+    """监视 processor.source_dir 中的原始文件（XX-XX.mp3 / XX-XX_original.wav）"""
+
+    def __init__(self, processor, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL,
+                 max_queue=DEFAULT_MAX_QUEUE, use_inotify=True):
+        self.processor = processor
+        self.logger = processor.logger
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.queue = queue.Queue(maxsize=max_queue)   # 队列满时监视线程等待，形成背压
+        self.queued = set()                           # 已在队列中的课程，避免重复排队
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.batches = 0
+
+        self.known = {}      # 已处理的文件状态 {文件名: (大小, 修改时间)}
+        self.changing = {}   # 等待写完的文件 {文件名: (状态, 最后一次变化的时间)}
+
+        self.inotify = None
+        if use_inotify and INotify is not None:
+            try:
+                self.inotify = INotify()
+                self.inotify.add_watch(
+                    processor.source_dir,
+                    flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+                )
+            except OSError as e:
+                self.logger.warning(f"inotify 不可用，改为轮询: {e}")
+                self.inotify = None
+
+    def snapshot(self):
+        """当前原始文件的状态 {文件名: (大小, 修改时间)}"""
+        state = {}
+        for filename in self.processor.find_original_files():
+            try:
+                stat = os.stat(os.path.join(self.processor.source_dir, filename))
+            except FileNotFoundError:
+                continue  # 扫描期间被删除
+            state[filename] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def lesson_of(self, filename):
+        """原始文件所属的课程号，如 "02-01.mp3" → "02" """
+        return self.processor.source_prefix(filename)[:2]
+
+    def poll_changes(self, now):
+        """比较目录状态，返回已经写完（或已删除）且需要处理的文件名"""
+        current = self.snapshot()
+        ready = set()
+        for filename in set(current) | set(self.known) | set(self.changing):
+            state = current.get(filename)
+            if filename in self.changing:
+                last_state, since = self.changing[filename]
+                if state != last_state:
+                    self.changing[filename] = (state, now)
+                elif now - since >= self.debounce:
+                    del self.changing[filename]
+                    if state != self.known.get(filename):
+                        ready.add(filename)
+                    if state is None:
+                        self.known.pop(filename, None)
+                    else:
+                        self.known[filename] = state
+            elif state != self.known.get(filename):
+                self.changing[filename] = (state, now)
+                self.logger.info(f"👀 检测到变化: {filename}，等待写入完成")
+        return ready
+
+    def enqueue(self, lesson):
+        """把课程放入队列（已在队列中时忽略）"""
+        with self.lock:
+            if lesson in self.queued:
+                return
+            self.queued.add(lesson)
+        self.queue.put(lesson)
+
+    def wait_timeout(self):
+        """下一次检查前的等待时间"""
+        if self.changing:
+            return min(self.poll_interval, self.debounce)
+        return RESCAN_INTERVAL if self.inotify else self.poll_interval
+
+    def wait(self, timeout):
+        """等待目录事件或超时"""
+        if self.inotify is not None:
+            # 事件本身不需要解析，醒来后统一扫描目录；分段等待以便及时响应 stop()
+            deadline = time.monotonic() + timeout
+            while not self.stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.inotify.read(timeout=int(min(remaining, 1.0) * 1000)):
+                    return
+        else:
+            self.stop_event.wait(timeout)
+
+    def consume(self):
+        """后台线程：每次取出所有排队的课程一起处理"""
+        while not self.stop_event.is_set():
+            try:
+                lessons = {self.queue.get(timeout=0.2)}
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    lessons.add(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.lock:
+                self.queued -= lessons
+
+            try:
+                self.processor.process_lessons(lessons)
+            except Exception as e:
+                self.logger.error(f"❌ 处理课程 {', '.join(sorted(lessons))} 失败: {e}")
+            self.batches += 1
+
+    def run(self, catch_up=True):
+        """开始监视，直到 stop() 或 Ctrl+C"""
+        backend = "inotify" if self.inotify else f"轮询（每 {self.poll_interval}s）"
+        self.logger.info(f"👀 监视目录: {os.path.abspath(self.processor.source_dir)} "
+                         f"({backend}, 防抖 {self.debounce}s)")
+
+        self.known = self.snapshot()
+        consumer = threading.Thread(target=self.consume, name="lesson-consumer", daemon=True)
+        consumer.start()
+        if catch_up:
+            for lesson in sorted({self.lesson_of(filename) for filename in self.known}):
+                self.enqueue(lesson)
+
+        try:
+            while not self.stop_event.is_set():
+                self.wait(self.wait_timeout())
+                for filename in sorted(self.poll_changes(time.monotonic())):
+                    self.logger.info(f"📥 文件就绪: {filename}")
+                    self.enqueue(self.lesson_of(filename))
+        except KeyboardInterrupt:
+            self.logger.info("收到中断，等待当前批次完成后退出")
+        finally:
+            self.stop_event.set()
+            consumer.join()
+            if self.inotify is not None:
+                self.inotify.close()
+            self.logger.info(f"监视结束，共处理 {self.batches} 批")
+
+    def stop(self):
+        self.stop_event.set()
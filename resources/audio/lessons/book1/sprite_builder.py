@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程音频拼接（audio sprite）
+功能：
+1. 把每课 words.json（或 listening.json / dialogue.json）引用的小MP3按顺序拼成一个文件，
+   片段之间插入静音，避免MP3编码延迟和播放器定位误差导致串音
+2. 在每个条目的 audio 后面写入 start_ms / end_ms，并在顶层写入 sprite 路径，前端一次请求即可播放整课
+3. 使用 encoder.py 中与处理流程相同的编码器；原来的单个MP3保持不变，作为前端的回退
+4. 拼接文件比所有片段都新、且JSON中的偏移完整时跳过该课
+
+不在 npm run build 中运行：会原地改写已提交的课文JSON，需要时手动运行（npm run sprites），
+再把生成的 *_sprite.mp3 和写入了 start_ms / end_ms 的JSON一起提交。
+JSON中没有偏移或拼接文件加载失败时，前端回退到单独的MP3。
+
+用法: python sprite_builder.py [--books book2 book3] [--kinds words] [--bitrate 192k] [--force]
+"""
+
+import argparse
+import json
+import os
+
+from pydub import AudioSegment
+
+from audio_processor import REPO_ROOT
+from decoder import decode_mp3
+from encoder import ENCODER_BACKENDS, create_encoder, resolve_backend
+
+
+# 可以拼接的内容：课文文件、条目列表字段
+SPRITE_KINDS = {
+    'words': ("words.json", "words"),
+    'listening': ("listening.json", "exercises"),
+    'dialogue': ("dialogue.json", "sentences"),
+}
+
+SPRITE_GAP_MS = 300
+SPRITE_FRAME_RATE = 44100
+
+
+def sprite_path_for(text_dir, kind):
+    """resources/text/lessons/bookN/lessonM → resources/audio/lessons/bookN/lessonM/<kind>_sprite.mp3（相对仓库根目录）"""
+    lesson = os.path.basename(text_dir)
+    book = os.path.basename(os.path.dirname(text_dir))
+    return f"resources/audio/lessons/{book}/{lesson}/{kind}_sprite.mp3"
+
+
+def with_offsets(entry, start_ms, end_ms):
+    """在 audio 字段后面插入 start_ms / end_ms，保持其他字段的顺序"""
+    updated = {}
+    for key, value in entry.items():
+        if key in ('start_ms', 'end_ms'):
+            continue
+        updated[key] = value
+        if key == 'audio' and start_ms is not None:
+            updated['start_ms'] = start_ms
+            updated['end_ms'] = end_ms
+    return updated
+
+
+def load_clip(path):
+    """解码一个片段为16bit AudioSegment"""
+    with decode_mp3(path, SPRITE_FRAME_RATE) as pcm:
+        audio = AudioSegment(
+            data=pcm.read_segment(0, len(pcm)),
+            sample_width=pcm.sample_width,
+            frame_rate=pcm.frame_rate,
+            channels=pcm.channels
+        )
+    return audio.set_sample_width(2)
+
+
+class SpriteBuilder:
+    def __init__(self, repo_root=REPO_ROOT, encoder_backend="auto", bitrate="192k", force=False):
+        self.repo_root = repo_root
+        self.encoder_backend = encoder_backend
+        self.bitrate = bitrate
+        self.force = force
+        self.stats = {'built': 0, 'skipped': 0, 'clips': 0, 'missing': 0}
+
+    def lesson_dirs(self, books):
+        """按书和课程编号排序的课程目录"""
+        text_root = os.path.join(self.repo_root, "resources", "text", "lessons")
+        for book in books:
+            book_dir = os.path.join(text_root, book)
+            if not os.path.isdir(book_dir):
+                print(f"⚠️  跳过不存在的目录: {book_dir}")
+                continue
+            lessons = [d for d in os.listdir(book_dir) if d.startswith("lesson") and d[6:].isdigit()]
+            for lesson in sorted(lessons, key=lambda d: int(d[6:])):
+                yield os.path.join(book_dir, lesson)
+
+    def build_lesson(self, text_dir, kind):
+        """拼接一课的音频并更新JSON，返回 built / skipped / None（没有可用片段）"""
+        filename, key = SPRITE_KINDS[kind]
+        json_path = os.path.join(text_dir, filename)
+        if not os.path.exists(json_path):
+            return None
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = data.get(key, [])
+        clips = []
+        for index, entry in enumerate(entries):
+            audio = entry.get('audio')
+            if not audio:
+                continue
+            clip_path = os.path.join(self.repo_root, audio)
+            if os.path.exists(clip_path):
+                clips.append((index, clip_path))
+            else:
+                self.stats['missing'] += 1
+        if not clips:
+            return None
+
+        sprite_rel = sprite_path_for(text_dir, kind)
+        sprite_path = os.path.join(self.repo_root, sprite_rel)
+        if not self.force and self.is_current(data, entries, clips, sprite_rel, sprite_path):
+            self.stats['skipped'] += 1
+            return "skipped"
+
+        # 全部是单声道时输出单声道，否则统一为立体声
+        decoded = [(index, load_clip(clip_path)) for index, clip_path in clips]
+        channels = max(audio.channels for _, audio in decoded)
+        decoded = [(index, audio.set_channels(channels)) for index, audio in decoded]
+
+        gap = AudioSegment.silent(duration=SPRITE_GAP_MS, frame_rate=SPRITE_FRAME_RATE).set_channels(channels)
+        pieces = [gap.raw_data]
+        position_frames = int(gap.frame_count())
+        offsets = {}
+        for index, audio in decoded:
+            start_ms = round(position_frames * 1000 / SPRITE_FRAME_RATE)
+            position_frames += int(audio.frame_count())
+            offsets[index] = (start_ms, round(position_frames * 1000 / SPRITE_FRAME_RATE))
+            pieces += [audio.raw_data, gap.raw_data]
+            position_frames += int(gap.frame_count())
+
+        sprite = AudioSegment(data=b"".join(pieces), sample_width=2, frame_rate=SPRITE_FRAME_RATE, channels=channels)
+        os.makedirs(os.path.dirname(sprite_path), exist_ok=True)
+        with create_encoder(self.encoder_backend, self.bitrate) as encoder:
+            results = encoder.submit(sprite, sprite_path) + encoder.flush()
+        for path, error in results:
+            if error is not None:
+                raise RuntimeError(f"编码 {path} 失败: {error}")
+
+        data[key] = [with_offsets(entry, *offsets.get(index, (None, None))) for index, entry in enumerate(entries)]
+        data['sprite'] = sprite_rel
+        self.write_json(json_path, data)
+
+        self.stats['built'] += 1
+        self.stats['clips'] += len(clips)
+        return "built"
+
+    @staticmethod
+    def is_current(data, entries, clips, sprite_rel, sprite_path):
+        """拼接文件比所有片段都新，且JSON中每个片段都有偏移"""
+        if data.get('sprite') != sprite_rel or not os.path.exists(sprite_path):
+            return False
+        sprite_mtime = os.path.getmtime(sprite_path)
+        return all(
+            os.path.getmtime(clip_path) <= sprite_mtime and 'start_ms' in entries[index]
+            for index, clip_path in clips
+        )
+
+    @staticmethod
+    def write_json(path, data):
+        """与仓库中JSON文件相同的格式（缩进2，保留中文和韩文），内容不变时不写入"""
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把每课的小MP3拼接为一个音频文件，并在JSON中写入偏移")
+    parser.add_argument('--books', nargs='+', default=["book1", "book2", "book3"], help="要处理的书")
+    parser.add_argument('--kinds', nargs='+', default=["words"], choices=tuple(SPRITE_KINDS), help="要拼接的内容")
+    parser.add_argument('--encoder', default="auto", choices=("auto",) + ENCODER_BACKENDS, help="MP3编码后端")
+    parser.add_argument('--bitrate', default="192k", help="MP3比特率（默认与处理流程相同）")
+    parser.add_argument('--force', action='store_true', help="忽略已有的拼接文件，全部重新生成")
+    args = parser.parse_args()
+
+    builder = SpriteBuilder(encoder_backend=args.encoder, bitrate=args.bitrate, force=args.force)
+    print(f"编码后端: {resolve_backend(args.encoder)}, 比特率: {args.bitrate}")
+    for text_dir in builder.lesson_dirs(args.books):
+        for kind in args.kinds:
+            try:
+                result = builder.build_lesson(text_dir, kind)
+            except Exception as e:
+                print(f"❌ {os.path.relpath(text_dir, builder.repo_root)} {kind}: {e}")
+                continue
+            if result == "built":
+                print(f"✅ 生成: {sprite_path_for(text_dir, kind)}")
+
+    stats = builder.stats
+    print(f"完成 - 生成 {stats['built']} 个, 未变化跳过 {stats['skipped']} 个, "
+          f"拼接片段 {stats['clips']} 个, 缺失音频 {stats['missing']} 个")
+
+
+if __name__ == "__main__":
+    main()
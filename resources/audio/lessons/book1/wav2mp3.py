@@ -1,26 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量把目录树中的WAV转换为MP3（同目录、同名）
+功能：
+1. 用 os.scandir 递归扫描指定的根目录（默认当前目录），跳过隐藏目录
+2. 按目录分批交给进程池并行编码（编码后端和配置见 encoder.py）
+3. 可以中断后重新运行：MP3 比 WAV 新时跳过；先写 .part 临时文件，校验通过后原子替换为最终文件，
+   上次中断留下的 .part 文件在扫描时清理
+4. 校验：只读帧头（mp3_header.py）确认MP3有效且时长与WAV一致，之后才删除WAV（--keep-source 保留）
+5. 运行中显示进度、吞吐量和预计剩余时间
+
+用法: python wav2mp3.py [根目录 ...] [--profile standard] [--encoder auto] [--workers 4] [--keep-source] [--force]
+"""
+
+import argparse
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from pydub import AudioSegment
 
-# 设置要遍历的根目录为当前目录
-root_dir = os.getcwd()
+from encoder import ENCODER_BACKENDS, ENCODING_PROFILES, apply_channels, create_encoder, encoding_profile
+from mp3_header import read_mp3_info
+from wav_stream import MappedWav
 
-# 遍历所有子目录和文件
-for foldername, subfolders, filenames in os.walk(root_dir):
-    for filename in filenames:
-        if filename.lower().endswith(".wav"):
-            wav_path = os.path.join(foldername, filename)
-            mp3_path = os.path.join(foldername, os.path.splitext(filename)[0] + ".mp3")
 
-            try:
-                # 加载 wav 文件并导出为 mp3
-                sound = AudioSegment.from_wav(wav_path)
-                sound.export(mp3_path, format="mp3")
-                print(f"✅ 转换成功: {wav_path} → {mp3_path}")
+PART_SUFFIX = ".mp3.part"
+BATCH_FILES = 16           # 每个任务最多处理的文件数（同一目录），ffmpeg-batch 一次编码一批
+VERIFY_TOLERANCE_MS = 100  # MP3 与 WAV 允许的时长差（编码延迟/填充，无信息帧时按码率估算）
+
+
+def scan_wav_files(roots):
+    """递归查找WAV，返回 [(目录, [(文件名, 大小)])]；同时删除上次中断留下的临时文件"""
+    groups = {}
+    leftovers = 0
+    pending = list(roots)
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        pending.append(entry.path)
+                elif entry.name.endswith((PART_SUFFIX, PART_SUFFIX + ".tmp")):
+                    os.remove(entry.path)
+                    leftovers += 1
+                elif entry.name.lower().endswith('.wav') and entry.is_file():
+                    groups.setdefault(directory, []).append((entry.name, entry.stat().st_size))
+    return sorted((directory, sorted(files)) for directory, files in groups.items()), leftovers
+
+
+def make_batches(groups, size=BATCH_FILES):
+    """同一目录的文件按 size 个一批"""
+    batches = []
+    for directory, files in groups:
+        for i in range(0, len(files), size):
+            batches.append((directory, files[i:i + size]))
+    return batches
+
+
+def mp3_path_for(wav_path):
+    return os.path.splitext(wav_path)[0] + ".mp3"
+
+
+def is_up_to_date(wav_path, mp3_path):
+    """MP3 存在且不比 WAV 旧"""
+    try:
+        return os.stat(mp3_path).st_mtime_ns >= os.stat(wav_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def verify_mp3(mp3_path, expected_ms):
+    """检查MP3帧头有效且时长与WAV一致，不一致时抛出 ValueError"""
+    duration_ms = read_mp3_info(mp3_path)['duration_ms']
+    if abs(duration_ms - expected_ms) > VERIFY_TOLERANCE_MS:
+        raise ValueError(f"时长不一致: MP3 {duration_ms}ms, WAV {expected_ms}ms")
+
+
+def wav_duration_ms(wav_path):
+    """只读WAV头得到时长（与 len(AudioSegment) 相同），MappedWav 不支持的位深时完整读取"""
+    try:
+        with MappedWav(wav_path) as wav:
+            return len(wav)
+    except ValueError:
+        return len(AudioSegment.from_wav(wav_path))
 
-                # 删除原始 wav 文件
+
+def transcode_batch(directory, files, profile_name, backend, keep_source, force):
+    """转换一批文件，返回 [(WAV路径, 状态, 读取字节数, 写出字节数, 错误)]
+
+    状态: converted 已转换 / skipped 已是最新 / failed 失败
+    """
+    profile = encoding_profile(profile_name)
+    results = []
+    pending = {}  # .part 路径 -> (WAV路径, WAV大小, WAV时长)
+
+    def finish(part_path, error):
+        wav_path, size, expected_ms = pending.pop(part_path)
+        mp3_path = mp3_path_for(wav_path)
+        try:
+            if error is not None:
+                raise error
+            verify_mp3(part_path, expected_ms)
+            os.replace(part_path, mp3_path)
+            if not keep_source:
                 os.remove(wav_path)
-                print(f"🗑️ 已删除: {wav_path}")
+            results.append((wav_path, 'converted', size, os.path.getsize(mp3_path), None))
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            results.append((wav_path, 'failed', 0, 0, str(e)))
+
+    with create_encoder(backend, profile['bitrate']) as encoder:
+        for filename, size in files:
+            wav_path = os.path.join(directory, filename)
+            mp3_path = mp3_path_for(wav_path)
+            try:
+                expected_ms = wav_duration_ms(wav_path)
+                if not force and is_up_to_date(wav_path, mp3_path):
+                    try:
+                        # 上次可能在删除WAV之前中断，校验通过才删除
+                        verify_mp3(mp3_path, expected_ms)
+                        if not keep_source:
+                            os.remove(wav_path)
+                        results.append((wav_path, 'skipped', 0, 0, None))
+                        continue
+                    except ValueError:
+                        pass  # 已有的MP3无效，重新编码
 
+                audio = apply_channels(AudioSegment.from_wav(wav_path), profile['channels'])
+                part_path = os.path.splitext(wav_path)[0] + PART_SUFFIX
+                pending[part_path] = (wav_path, size, expected_ms)
+                done = encoder.submit(audio, part_path)
             except Exception as e:
-                print(f"❌ 转换失败: {wav_path}")
-                print(f"错误信息: {e}")
+                results.append((wav_path, 'failed', 0, 0, str(e)))
+                continue
+            for part_path, error in done:
+                finish(part_path, error)
+        for part_path, error in encoder.flush():
+            finish(part_path, error)
+    return results
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量把目录树中的WAV转换为MP3")
+    parser.add_argument('roots', nargs='*', default=[os.getcwd()], help="要扫描的根目录（默认当前目录）")
+    parser.add_argument('--profile', default="standard",
+                        choices=tuple(name for name, profile in ENCODING_PROFILES.items() if profile['codec'] == "mp3"),
+                        help="编码配置（默认 standard：原声道192k）")
+    parser.add_argument('--encoder', default="auto", choices=("auto",) + ENCODER_BACKENDS,
+                        help="MP3编码后端（默认 auto：ffmpeg-batch > lame > pydub）")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument('--keep-source', action='store_true', help="转换并校验后保留WAV")
+    parser.add_argument('--force', action='store_true', help="MP3已是最新时也重新编码")
+    args = parser.parse_args()
+
+    for root in args.roots:
+        if not os.path.isdir(root):
+            parser.error(f"目录不存在: {root}")
+
+    groups, leftovers = scan_wav_files(args.roots)
+    batches = make_batches(groups)
+    total_files = sum(len(files) for _, files in batches)
+    total_bytes = sum(size for _, files in batches for _, size in files)
+    print(f"扫描 {', '.join(args.roots)}: {len(groups)} 个目录，{total_files} 个WAV ({total_bytes / 1e6:.1f} MB)"
+          + (f"，清理临时文件 {leftovers} 个" if leftovers else ""))
+    if not batches:
+        return 0
+
+    start = time.perf_counter()
+    counts = {'converted': 0, 'skipped': 0, 'failed': 0}
+    failures = []
+    done_bytes = read_bytes = written_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(transcode_batch, directory, files, args.profile, args.encoder, args.keep_source, args.force):
+                sum(size for _, size in files)
+            for directory, files in batches
+        }
+        for future in as_completed(futures):
+            for wav_path, status, file_read, file_written, error in future.result():
+                counts[status] += 1
+                read_bytes += file_read
+                written_bytes += file_written
+                if error:
+                    failures.append((wav_path, error))
+            done_files = sum(counts.values())
+            done_bytes += futures[future]
+
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            rate = done_bytes / elapsed
+            eta = (total_bytes - done_bytes) / rate if rate else 0
+            print(f"\r进度: {done_files}/{total_files} 个文件, {rate / 1e6:.1f} MB/s, "
+                  f"{done_files / elapsed:.1f} 个/s, 剩余约 {format_eta(eta)}", end="", flush=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n完成，耗时 {elapsed:.1f}s - 转换: {counts['converted']} 个, 已是最新: {counts['skipped']} 个, "
+          f"失败: {counts['failed']} 个, WAV {read_bytes / 1e6:.1f} MB → MP3 {written_bytes / 1e6:.1f} MB")
+    for wav_path, error in failures:
+        print(f"❌ 转换失败: {wav_path}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
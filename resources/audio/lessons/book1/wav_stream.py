@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存映射方式读取长WAV文件
+功能：
+1. 只解析RIFF头，data块通过 mmap 映射，不整体读入内存
+2. 分块构建能量包络，处理完的页面立即归还给系统
+3. 从映射视图直接导出片段，输出与 AudioSegment.export(format="wav") 逐字节相同
+
+PcmAudio 也可以直接包装解码得到的内存PCM数据（见 decoder.py），切割流程不区分来源。
+"""
+
+import mmap
+import os
+import struct
+import wave
+
+import numpy as np
+
+from silence import ENVELOPE_CHUNK_MS, EnergyEnvelope, SAMPLE_DTYPES
+
+
+class PcmAudio:
+    """交错排列的PCM数据（只支持16/32bit，其他位深请使用 AudioSegment）"""
+
+    SUPPORTED_WIDTHS = (2, 4)
+
+    def __init__(self, data, channels, frame_rate, sample_width, data_offset=0, data_size=None):
+        if sample_width not in self.SUPPORTED_WIDTHS:
+            raise ValueError(f"不支持 {sample_width * 8}bit 音频")
+
+        self._buffer = data
+        self.channels = channels
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.frame_width = channels * sample_width
+        self.data_offset = data_offset
+        self.data_size = len(data) - data_offset if data_size is None else data_size
+        self.frame_count = self.data_size // self.frame_width
+        self.samples = np.frombuffer(
+            data,
+            dtype=SAMPLE_DTYPES[sample_width],
+            count=self.data_size // sample_width,
+            offset=data_offset
+        )
+
+    def __len__(self):
+        """音频长度（毫秒），与 len(AudioSegment) 相同"""
+        return round(1000 * (self.frame_count / self.frame_rate))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """释放数据（必须先丢弃所有视图）"""
+        self.samples = None
+        self._buffer = None
+
+    def release_before(self, sample_end):
+        """已处理完 sample_end 之前的数据（内存数据无需处理）"""
+
+    def envelope(self, chunk_ms=ENVELOPE_CHUNK_MS):
+        """分块构建能量包络"""
+        return EnergyEnvelope.from_pcm(
+            self.samples,
+            sample_width=self.sample_width,
+            channels=self.channels,
+            frame_rate=self.frame_rate,
+            chunk_ms=chunk_ms,
+            on_chunk_done=lambda start, end: self.release_before(end)
+        )
+
+    def frame_at(self, ms):
+        """毫秒位置对应的帧号（与 AudioSegment 切片的取整方式一致）"""
+        return int(min(ms, len(self)) * (self.frame_rate / 1000.0))
+
+    def segment_view(self, start_ms, end_ms):
+        """返回 [start_ms, end_ms) 的PCM字节视图（不复制）和应有的字节数"""
+        start = self.frame_at(start_ms) * self.frame_width
+        end = self.frame_at(end_ms) * self.frame_width
+        view = memoryview(self._buffer)[self.data_offset + start:self.data_offset + min(end, self.data_size)]
+        return view, end - start
+
+    def read_segment(self, start_ms, end_ms):
+        """读取 [start_ms, end_ms) 的PCM数据（与 AudioSegment 切片相同，末尾不足时补静音）"""
+        view, expected = self.segment_view(start_ms, end_ms)
+        try:
+            data = bytes(view)
+        finally:
+            view.release()
+
+        self.release_before(self.frame_at(end_ms) * self.channels)
+        return data + b'\x00' * (expected - len(data))
+
+    def export_segment(self, start_ms, end_ms, out_path):
+        """把片段直接写成WAV文件"""
+        view, expected = self.segment_view(start_ms, end_ms)
+        try:
+            with wave.open(out_path, 'wb') as out:
+                out.setnchannels(self.channels)
+                out.setsampwidth(self.sample_width)
+                out.setframerate(self.frame_rate)
+                out.setnframes(expected // self.frame_width)
+                out.writeframesraw(view)
+                # 与 pydub 一致：末尾不足的帧用静音补齐
+                missing = expected - len(view)
+                if missing > 0:
+                    out.writeframesraw(b'\x00' * missing)
+        finally:
+            view.release()
+
+        self.release_before(self.frame_at(end_ms) * self.channels)
+
+    def export_wav(self, out_path):
+        """把全部数据写成WAV文件"""
+        view = memoryview(self._buffer)[self.data_offset:self.data_offset + self.frame_count * self.frame_width]
+        try:
+            with wave.open(out_path, 'wb') as out:
+                out.setnchannels(self.channels)
+                out.setsampwidth(self.sample_width)
+                out.setframerate(self.frame_rate)
+                out.setnframes(self.frame_count)
+                out.writeframesraw(view)
+        finally:
+            view.release()
+
+
+class MappedWav(PcmAudio):
+    """内存映射的PCM WAV文件；temporary 为True时关闭后删除文件"""
+
+    def __init__(self, path, temporary=False):
+        self.path = path
+        self.temporary = temporary
+        self._mmap = None
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            channels, frame_rate, sample_width, data_offset = self._parse_headers()
+            super().__init__(self._mmap, channels, frame_rate, sample_width, data_offset)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_headers(self):
+        """解析RIFF块，定位fmt和data（与 pydub.audio_segment.read_wav_audio 的规则一致）"""
+        mm = self._mmap
+        if len(mm) < 12 or mm[0:4] != b'RIFF' or mm[8:12] != b'WAVE':
+            raise ValueError(f"不是有效的WAV文件: {self.path}")
+
+        fmt = None
+        data_offset = None
+        pos = 12
+        while pos + 8 <= len(mm):
+            chunk_id = mm[pos:pos + 4]
+            chunk_size = struct.unpack_from('<I', mm, pos + 4)[0]
+            if chunk_id == b'fmt ':
+                fmt = pos + 8
+            if chunk_id == b'data':
+                # data块按到文件末尾处理（pydub 会先修正头部的长度字段）
+                data_offset = pos + 8
+                break
+            pos += 8 + chunk_size + (chunk_size & 1)
+
+        if fmt is None or data_offset is None:
+            raise ValueError(f"WAV文件缺少fmt或data块: {self.path}")
+
+        audio_format, channels, frame_rate = struct.unpack_from('<HHI', mm, fmt)
+        bits_per_sample = struct.unpack_from('<H', mm, fmt + 14)[0]
+        if audio_format not in (1, 0xFFFE):
+            raise ValueError(f"不支持的WAV编码: 0x{audio_format:X}")
+        if bits_per_sample // 8 not in self.SUPPORTED_WIDTHS:
+            raise ValueError(f"内存映射模式不支持 {bits_per_sample}bit 音频")
+
+        return channels, frame_rate, bits_per_sample // 8, data_offset
+
+    def close(self):
+        """释放映射（必须先丢弃所有视图）"""
+        super().close()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if not self._file.closed:
+            self._file.close()
+            if self.temporary:
+                os.remove(self.path)
+
+    def release_before(self, sample_end):
+        """通知系统丢弃 sample_end 之前的所有页面，使常驻内存不随文件长度增长
+
+        缺页时内核会顺带映射相邻页面（包括从不读取的静音区间），
+        所以每次都从文件开头释放，而不是只释放刚处理过的区间。
+        """
+        if not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        end = self.data_offset + sample_end * self.sample_width
+        end -= end % mmap.PAGESIZE
+        if end > 0:
+            self._mmap.madvise(mmap.MADV_DONTNEED, 0, end)
@@ -0,0 +1,566 @@
+"""
+生成分片的搜索倒排索引（代替客户端启动时下载整个 search_index.json 再逐条 includes）
+
+1. 读取所有课程的 dialogue / grammar / words / listening / reading JSON，条目与 search_index.json 相同
+2. 每个条目的 content + preview 规范化（NFC、小写、只保留文字和数字：韩文音节、汉字、字母、数字）后，
+   取所有单字和相邻两字（bigram）作为索引词，倒排表为按编号排序的条目编号
+3. 按索引词的第一个字分片：分片号 = 码位 % 分片数，客户端不需要分片目录就能算出要下载哪个分片；
+   条目内容按编号每 DOC_CHUNK 条一个文件
+4. 查询时只下载查询词中各 bigram 所在的分片，求倒排表交集，再下载候选条目所在的文件，
+   用原来的 includes 规则确认（结果与逐条过滤完全相同）
+5. 增量生成：缓存（CACHE_PATH）中记录每课源文件的 大小、修改时间、SHA-256 和分好的索引词，
+   只有内容变化的课程重新读取和分词，其他课程直接用缓存合并倒排表；只写出内容变化的分片和条目文件。
+   输出与完整重新生成逐字节相同（--force 忽略缓存）
+6. 紧凑格式：类型、课本标题、课程标题放进 meta.json 的字符串表，条目文件按列存储（编号数组），
+   content / preview 拼接成一个字符串加长度数组（客户端累加得到偏移），不重复字段名；每个文件另外生成 .gz
+   预压缩版本（只生成和发布 .gz，不生成 .br），生成后输出与 search_index.json 相比的大小报告
+7. 韩文输入法组字中的查询：生成时把含韩文的字段预先分解为字母（자모：한국어 → ㅎㅏㄴㄱㅜㄱㅇㅓ，
+   复合元音和复合收音拆开）和初声（ㅎㄱㅇ），分别建立 jamo / choseong 索引（字母 bigram、初声单字和 bigram）；
+   只由辅音组成的查询（ㅎㄱㅇ）查初声，其他含韩文的查询按字母匹配，缺收音的最后一个字（한구 → 한국）、
+   未组完的字母（한ㄱ）都能查到；查询时只分解候选条目，不分解所有条目
+
+输出（resources/data/search/）:
+  meta.json          版本、条目数、分片数、每个条目文件的条数、字符串表（启动时只下载这个文件）
+  shards/<n>.json    {索引词: [条目编号, ...]}
+  jamo/<n>.json      {字母 bigram: [条目编号, ...]}
+  choseong/<n>.json  {初声单字或 bigram: [条目编号, ...]}
+  docs/<n>.json      第 n 个文件包含编号 n*DOC_CHUNK 起的条目，格式见 compact_chunk
+  *.json.gz          预压缩版本（客户端优先下载 .gz 并用 DecompressionStream 解压）
+
+用法（在仓库根目录运行）:
+  python3 scripts/build_search_index.py [--shards 64] [--force] [--query 번호|ㅂㅎ|버호]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import unicodedata
+
+TEXT_ROOT = 'resources/text/lessons'
+BOOKS_JSON = 'resources/data/books.json'
+OUTPUT_DIR = 'resources/data/search'
+CACHE_PATH = '.search_index_cache.json'
+CACHE_VERSION = 1
+INDEX_VERSION = 3
+LEGACY_INDEX = 'resources/data/search_index.json'
+DEFAULT_SHARDS = 64
+DOC_CHUNK = 128
+INDEXES = ('shards', 'jamo', 'choseong')   # 索引目录：原文、字母、初声
+
+# 韩文音节 = 0xAC00 + (初声 * 21 + 中声) * 28 + 收音，字母用兼容字母（输入法输入的 ㄱ、ㅏ）
+HANGUL_BASE = 0xAC00
+HANGUL_COUNT = 11172
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = ('ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅗㅏ', 'ㅗㅐ', 'ㅗㅣ', 'ㅛ', 'ㅜ',
+             'ㅜㅓ', 'ㅜㅔ', 'ㅜㅣ', 'ㅠ', 'ㅡ', 'ㅡㅣ', 'ㅣ')
+JONGSEONG = ('', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ', 'ㄹㅌ',
+             'ㄹㅍ', 'ㄹㅎ', 'ㅁ', 'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+# 单独输入的复合字母也拆开（输入法组字时 닭 会先显示 달 再显示 닭）
+COMPOUND_JAMO = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ', 'ㄾ': 'ㄹㅌ',
+    'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+
+# 课程文件 -> (类型, 条目列表字段, content 字段, preview 字段)，顺序与 generate_search_index.cjs 相同
+SOURCES = (
+    ('dialogue.json', '课文', 'sentences', 'korean', 'chinese'),
+    ('grammar.json', '语法', 'points', 'title', 'explanation'),
+    ('words.json', '单词', 'words', 'korean', 'chinese'),
+    ('listening.json', '听力', 'exercises', 'title', 'script'),
+    ('reading.json', '阅读', 'passages', 'title', 'content'),
+)
+
+
+def read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def book_title(book):
+    """与 generate_search_index.cjs 相同：如 "初级1"、"中级2" """
+    if not book.get('level') or not book.get('id'):
+        return f"Book{book.get('id', '')}"
+    return f"{book['level']}{'1' if book['id'] % 2 == 1 else '2'}"
+
+
+def number_in(name):
+    digits = re.sub(r'[^0-9]', '', name)
+    return int(digits) if digits else 0
+
+
+def lesson_dirs(text_root=TEXT_ROOT):
+    """按 课本、课程 排序返回 [(课本号, 课程号, 目录)]"""
+    lessons = []
+    for book_dir in sorted(os.listdir(text_root), key=number_in):
+        book_path = f'{text_root}/{book_dir}'
+        if not os.path.isdir(book_path):
+            continue
+        for lesson_dir in sorted(os.listdir(book_path), key=number_in):
+            lesson_path = f'{book_path}/{lesson_dir}'
+            if os.path.isdir(lesson_path):
+                lessons.append((number_in(book_dir), number_in(lesson_dir), lesson_path))
+    return lessons
+
+
+def read_lesson(lesson_path, book_id, lesson_id, title):
+    """读取一课的所有条目（按 SOURCES 的类型顺序）"""
+    documents = []
+    for filename, kind, key, content_key, preview_key in SOURCES:
+        data = read_json(f'{lesson_path}/{filename}')
+        entries = data.get(key) if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            documents.append({
+                'type': kind,
+                'content': entry.get(content_key) or '',
+                'preview': entry.get(preview_key) or '',
+                'bookId': book_id,
+                'lessonId': lesson_id,
+                'bookTitle': title,
+                'lessonTitle': f'第{lesson_id}课',
+            })
+    return documents
+
+
+def book_titles(books_json=BOOKS_JSON):
+    return {book['id']: book_title(book) for book in read_json(books_json) or []}
+
+
+def normalize(text):
+    """NFC + 小写，只保留文字和数字（与 src/searchIndex.ts 的 normalize 相同）"""
+    return ''.join(c for c in unicodedata.normalize('NFC', text).lower() if c.isalnum())
+
+
+def text_grams(text):
+    """规范化后的所有单字和相邻两字"""
+    chars = normalize(text)
+    return set(chars) | {chars[i:i + 2] for i in range(len(chars) - 1)}
+
+
+def query_grams(query):
+    """查询需要的索引词：一个字时用单字，否则用所有相邻两字"""
+    chars = normalize(query)
+    if len(chars) < 2:
+        return {chars} if chars else set()
+    return {chars[i:i + 2] for i in range(len(chars) - 1)}
+
+
+def is_syllable(char):
+    return 0 <= ord(char) - HANGUL_BASE < HANGUL_COUNT
+
+
+def is_jamo(char):
+    """兼容字母 ㄱ-ㅣ"""
+    return 'ㄱ' <= char <= 'ㅣ'
+
+
+def is_consonant(char):
+    return 'ㄱ' <= char <= 'ㅎ'
+
+
+def decompose(text):
+    """音节和复合字母分解为基本字母，其他字符不变（与 src/hangul.ts 的 decompose 相同）"""
+    chars = []
+    for char in text:
+        if is_syllable(char):
+            index = ord(char) - HANGUL_BASE
+            chars.append(CHOSEONG[index // 588] + JUNGSEONG[index % 588 // 28] + JONGSEONG[index % 28])
+        else:
+            chars.append(COMPOUND_JAMO.get(char, char))
+    return ''.join(chars)
+
+
+def choseong(text):
+    """音节替换为初声，其他字符不变"""
+    return ''.join(CHOSEONG[(ord(char) - HANGUL_BASE) // 588] if is_syllable(char) else char for char in text)
+
+
+def jamo_grams(text):
+    """规范化、分解后含韩文字母的相邻两字母"""
+    chars = decompose(normalize(text))
+    return {chars[i:i + 2] for i in range(len(chars) - 1) if is_jamo(chars[i]) or is_jamo(chars[i + 1])}
+
+
+def choseong_grams(text):
+    """规范化后初声的单字和相邻两字（只取辅音）"""
+    chars = choseong(normalize(text))
+    return ({char for char in chars if is_consonant(char)}
+            | {chars[i:i + 2] for i in range(len(chars) - 1) if is_consonant(chars[i]) and is_consonant(chars[i + 1])})
+
+
+def query_mode(query):
+    """'choseong'：只由辅音组成；'jamo'：含韩文且分解后至少两个字母；其他为 'exact'"""
+    chars = normalize(query)
+    if chars and all(is_consonant(char) for char in chars):
+        return 'choseong'
+    if any(is_syllable(char) or is_jamo(char) for char in chars) and len(decompose(chars)) >= 2:
+        return 'jamo'
+    return 'exact'
+
+
+def mode_grams(query, mode):
+    """查询在对应索引中需要的索引词"""
+    if mode == 'choseong':
+        chars = normalize(query)
+        return {chars} if len(chars) < 2 else {chars[i:i + 2] for i in range(len(chars) - 1)}
+    if mode == 'jamo':
+        return jamo_grams(query)
+    return query_grams(query)
+
+
+def matches(doc, query, mode):
+    """确认候选条目：exact 为原来的 includes；jamo / choseong 比较规范化后的字母 / 初声"""
+    if mode == 'exact':
+        return query in doc['content'] or query in doc['preview']
+    if mode == 'jamo':
+        target = decompose(normalize(query))
+        return any(target in decompose(normalize(doc[key])) for key in ('content', 'preview'))
+    target = normalize(query)
+    return any(target in choseong(normalize(doc[key])) for key in ('content', 'preview'))
+
+
+def shard_of(gram, shard_count):
+    return ord(gram[0]) % shard_count
+
+
+def document_grams(doc):
+    """条目在 INDEXES 各索引中的索引词（content 和 preview 分别取词，不产生跨字段的 bigram），排序后便于缓存"""
+    fields = (doc['content'], doc['preview'])
+    return [
+        sorted(text_grams(fields[0]) | text_grams(fields[1])),
+        sorted(jamo_grams(fields[0]) | jamo_grams(fields[1])),
+        sorted(choseong_grams(fields[0]) | choseong_grams(fields[1])),
+    ]
+
+
+def build_index(documents, shard_count=DEFAULT_SHARDS, grams=None):
+    """返回 {索引目录: [{索引词: [条目编号]}]}（每个分片一个字典，倒排表按编号排序）
+
+    grams: 每个条目已经分好的索引词（增量生成时来自缓存），None 时重新分词
+    """
+    indexes = {name: [{} for _ in range(shard_count)] for name in INDEXES}
+    for doc_id, doc in enumerate(documents):
+        for name, doc_grams in zip(INDEXES, grams[doc_id] if grams is not None else document_grams(doc)):
+            shards = indexes[name]
+            for gram in doc_grams:
+                shards[shard_of(gram, shard_count)].setdefault(gram, []).append(doc_id)
+    return {name: [dict(sorted(shard.items())) for shard in shards] for name, shards in indexes.items()}
+
+
+def encode_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_bytes(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def string_table(documents):
+    """类型、课本标题、课程标题（按第一次出现的顺序）"""
+    strings = {}
+    for doc in documents:
+        for key in ('type', 'bookTitle', 'lessonTitle'):
+            strings.setdefault(doc[key], len(strings))
+    return strings
+
+
+def utf16_length(text):
+    """JavaScript 字符串长度（UTF-16 码元数），客户端按它切分 text"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def compact_chunk(documents, strings):
+    """按列存储一组条目
+
+    type / bookTitle / lessonTitle 为字符串表的下标，bookId / lessonId 为编号；
+    text 为所有 content、preview 依次拼接，lengths 为每段的长度（UTF-16 码元数）：累加得到偏移 offsets，
+    第 k 个条目的 content 为 text[offsets[2k]:offsets[2k+1]]，preview 为 text[offsets[2k+1]:offsets[2k+2]]。
+    存长度而不是偏移：数字小、重复多，gzip 后约为偏移数组的三分之一
+    """
+    chunk = {key: [] for key in ('type', 'bookId', 'bookTitle', 'lessonId', 'lessonTitle')}
+    texts = []
+    lengths = []
+    for doc in documents:
+        for key in ('type', 'bookTitle', 'lessonTitle'):
+            chunk[key].append(strings[doc[key]])
+        chunk['bookId'].append(doc['bookId'])
+        chunk['lessonId'].append(doc['lessonId'])
+        for key in ('content', 'preview'):
+            texts.append(doc[key])
+            lengths.append(utf16_length(doc[key]))
+    chunk['text'] = ''.join(texts)
+    chunk['lengths'] = lengths
+    return chunk
+
+
+def expand_chunk(chunk, strings):
+    """compact_chunk 的逆操作，返回 [条目]"""
+    text = chunk['text'].encode('utf-16-le')
+    offsets = [0]
+    for length in chunk['lengths']:
+        offsets.append(offsets[-1] + length)
+    field = lambda i: text[2 * offsets[i]:2 * offsets[i + 1]].decode('utf-16-le')
+    return [
+        {
+            'type': strings[chunk['type'][k]],
+            'content': field(2 * k),
+            'preview': field(2 * k + 1),
+            'bookId': chunk['bookId'][k],
+            'lessonId': chunk['lessonId'][k],
+            'bookTitle': strings[chunk['bookTitle'][k]],
+            'lessonTitle': strings[chunk['lessonTitle'][k]],
+        }
+        for k in range(len(chunk['type']))
+    ]
+
+
+def compress(data):
+    """预压缩版本 {扩展名: 内容}；只有 .gz，gzip 不写时间戳，相同输入得到相同字节"""
+    return {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+
+
+def index_files(documents, indexes):
+    """输出目录中的所有文件 {相对路径: 内容}，包括预压缩版本"""
+    strings = string_table(documents)
+    files = {f'{name}/{shard_id}.json': encode_json(shard)
+             for name, shards in indexes.items() for shard_id, shard in enumerate(shards)}
+    for chunk_id, start in enumerate(range(0, len(documents), DOC_CHUNK)):
+        files[f'docs/{chunk_id}.json'] = encode_json(compact_chunk(documents[start:start + DOC_CHUNK], strings))
+    files['meta.json'] = encode_json({
+        'version': INDEX_VERSION,
+        'documents': len(documents),
+        'shards': len(indexes['shards']),
+        'docChunk': DOC_CHUNK,
+        'strings': list(strings),
+    })
+    for name, data in list(files.items()):
+        for suffix, compressed in compress(data).items():
+            files[name + suffix] = compressed
+    return files
+
+
+def write_index(output_dir, files, previous=None):
+    """写出索引，返回 (写出的文件数, {相对路径: SHA-256})
+
+    previous: 上次写出的 {相对路径: SHA-256}，提供时只写内容变化的文件并删除多余的文件（meta.json 最后写），
+              否则先写到临时目录再整体替换，客户端不会读到新旧混合的文件
+    """
+    digests = {name: hashlib.sha256(data).hexdigest() for name, data in files.items()}
+    if previous is not None and os.path.exists(f'{output_dir}/meta.json'):
+        changed = [name for name in files if previous.get(name) != digests[name]
+                   or not os.path.exists(f'{output_dir}/{name}')]
+        for name in sorted(changed, key=lambda n: n.startswith('meta.json')):
+            write_bytes(f'{output_dir}/{name}', files[name])
+        for name in set(previous) - set(files):
+            if os.path.exists(f'{output_dir}/{name}'):
+                os.remove(f'{output_dir}/{name}')
+        return len(changed), digests
+
+    tmp_dir = output_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for name in INDEXES + ('docs',):
+        os.makedirs(f'{tmp_dir}/{name}')
+    for name, data in files.items():
+        write_bytes(f'{tmp_dir}/{name}', data)
+
+    old_dir = output_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(files), digests
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def lesson_fingerprint(lesson_path, cached):
+    """课程源文件的 {文件名: [大小, 修改时间, SHA-256]}；大小和修改时间与缓存相同时不读取文件"""
+    fingerprint = {}
+    for filename, *_ in SOURCES:
+        path = f'{lesson_path}/{filename}'
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        previous = cached.get(filename)
+        if previous and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+            fingerprint[filename] = previous
+        else:
+            fingerprint[filename] = [stat.st_size, stat.st_mtime_ns, file_digest(path)]
+    return fingerprint
+
+
+def load_cache(path, shard_count, titles):
+    """读取缓存；缓存或索引格式的版本、分片数、课本标题不同时返回空缓存"""
+    data = read_json(path) if path else None
+    if (not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('index') != INDEX_VERSION
+            or data.get('shards') != shard_count or data.get('titles') != titles):
+        return {'lessons': {}, 'output': None}
+    return data
+
+
+def build(text_root=TEXT_ROOT, books_json=BOOKS_JSON, output_dir=OUTPUT_DIR,
+          shard_count=DEFAULT_SHARDS, cache_path=CACHE_PATH, force=False):
+    """增量生成索引，返回统计"""
+    titles = {str(book_id): title for book_id, title in book_titles(books_json).items()}
+    cache = {'lessons': {}, 'output': None} if force else load_cache(cache_path, shard_count, titles)
+
+    lessons = {}
+    documents = []
+    grams = []
+    reread = 0
+    for book_id, lesson_id, lesson_path in lesson_dirs(text_root):
+        cached = cache['lessons'].get(lesson_path, {})
+        fingerprint = lesson_fingerprint(lesson_path, cached.get('files', {}))
+        # 只比较内容哈希：文件被 touch 但内容未变时不需要重新分词
+        if cached and {k: v[2] for k, v in fingerprint.items()} == {k: v[2] for k, v in cached['files'].items()}:
+            entry = dict(cached, files=fingerprint)
+        else:
+            title = titles.get(str(book_id), book_title({'id': book_id}))
+            lesson_documents = read_lesson(lesson_path, book_id, lesson_id, title)
+            entry = {
+                'files': fingerprint,
+                'documents': lesson_documents,
+                'grams': [document_grams(doc) for doc in lesson_documents],
+            }
+            reread += 1
+        lessons[lesson_path] = entry
+        documents += entry['documents']
+        grams += entry['grams']
+
+    removed = len(set(cache['lessons']) - set(lessons))
+    stats = {'lessons': len(lessons), 'reread': reread, 'removed': removed, 'documents': len(documents), 'written': 0}
+    if reread or removed or cache['output'] is None or not os.path.exists(f'{output_dir}/meta.json'):
+        indexes = build_index(documents, shard_count, grams)
+        stats['written'], output = write_index(output_dir, index_files(documents, indexes), cache['output'])
+        stats['indexes'] = indexes
+    else:
+        output = cache['output']
+
+    if cache_path:
+        data = {'version': CACHE_VERSION, 'index': INDEX_VERSION, 'shards': shard_count, 'titles': titles, 'output': output, 'lessons': lessons}
+        write_bytes(cache_path, encode_json(data))
+    return stats
+
+
+def search(output_dir, query):
+    """按客户端的方式查询已生成的索引，返回 (结果, 读取的分片数, 读取的条目文件数)"""
+    meta = read_json(f'{output_dir}/meta.json')
+    mode = query_mode(query)
+    grams = mode_grams(query, mode)
+    if not grams:
+        return [], 0, 0
+    index = INDEXES[('exact', 'jamo', 'choseong').index(mode)]
+    shard_ids = {shard_of(gram, meta['shards']) for gram in grams}
+    shards = {shard_id: read_json(f'{output_dir}/{index}/{shard_id}.json') for shard_id in shard_ids}
+
+    candidates = None
+    for gram in sorted(grams, key=lambda g: len(shards[shard_of(g, meta['shards'])].get(g, []))):
+        postings = set(shards[shard_of(gram, meta['shards'])].get(gram, []))
+        candidates = postings if candidates is None else candidates & postings
+        if not candidates:
+            return [], len(shards), 0
+
+    chunk_ids = {doc_id // meta['docChunk'] for doc_id in candidates}
+    chunks = {chunk_id: expand_chunk(read_json(f'{output_dir}/docs/{chunk_id}.json'), meta['strings'])
+              for chunk_id in chunk_ids}
+    results = []
+    for doc_id in sorted(candidates):
+        doc = chunks[doc_id // meta['docChunk']][doc_id % meta['docChunk']]
+        if matches(doc, query, mode):
+            results.append(doc)
+    return results, len(shards), len(chunks)
+
+
+def size_report(output_dir, legacy_path=LEGACY_INDEX):
+    """输出目录各部分及 search_index.json 的 原始 / gzip 字节数: {名称: {'json', '.gz'}}"""
+    report = {}
+    for part in ('meta',) + INDEXES + ('docs',):
+        sizes = report.setdefault(part, {'json': 0, '.gz': 0})
+        directory = output_dir if part == 'meta' else f'{output_dir}/{part}'
+        for entry in os.scandir(directory):
+            if part == 'meta' and not entry.name.startswith('meta.json'):
+                continue
+            for key in sizes:
+                if entry.name.endswith('.json' if key == 'json' else '.json' + key):
+                    sizes[key] += entry.stat().st_size
+    if os.path.exists(legacy_path):
+        with open(legacy_path, 'rb') as f:
+            legacy = f.read()
+        report['legacy'] = {'json': len(legacy), '.gz': len(compress(legacy)['.gz'])}
+        # 与 search_index.json 内容相同的部分：meta + 全部条目文件
+        report['entries'] = {key: report['meta'][key] + report['docs'][key] for key in report['docs']}
+    return report
+
+
+def log_size_report(report):
+    columns = ('json', '.gz')
+    names = {'meta': 'meta.json', 'shards': '分片', 'jamo': '字母分片', 'choseong': '初声分片', 'docs': '条目文件', 'legacy': 'search_index.json', 'entries': 'meta + 条目文件'}
+    print('大小报告 (KB):' + ''.join(f'{column:>9}' for column in columns))
+    for part, sizes in report.items():
+        print(' ' * 13 + ''.join(f'{sizes[column] / 1024:9.1f}' for column in columns) + f'  {names[part]}')
+    if 'legacy' in report:
+        saved = ', '.join(f"{column} 节省 {1 - report['entries'][column] / report['legacy'][column]:.0%}"
+                          for column in columns if report['legacy'][column])
+        print(f'  条目数据与 search_index.json 相比: {saved}')
+    print('  (只发布 .json 和 .gz 预压缩文件，不生成 .br)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成分片的搜索倒排索引')
+    parser.add_argument('--text-root', default=TEXT_ROOT)
+    parser.add_argument('--books', default=BOOKS_JSON)
+    parser.add_argument('--output', default=OUTPUT_DIR)
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS, help='分片数')
+    parser.add_argument('--cache', default=CACHE_PATH, help='增量生成的缓存文件，空字符串表示不使用缓存')
+    parser.add_argument('--force', action='store_true', help='忽略缓存，全部重新生成')
+    parser.add_argument('--query', help='生成后用索引查询一次并输出结果（检查用）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build(args.text_root, args.books, args.output, max(1, args.shards), args.cache, args.force)
+    elapsed = time.perf_counter() - start
+
+    summary = (f"课程 {stats['lessons']} 个 (重新读取 {stats['reread']}, 删除 {stats['removed']}), "
+               f"条目 {stats['documents']} 个, 写出文件 {stats['written']} 个, 耗时 {elapsed * 1000:.0f}ms")
+    if 'indexes' in stats:
+        for name, shards in stats['indexes'].items():
+            sizes = [len(encode_json(shard)) for shard in shards]
+            summary += (f"\n{name}: 索引词 {sum(len(shard) for shard in shards)} 个, "
+                        f"倒排项 {sum(len(ids) for shard in shards for ids in shard.values())} 个, "
+                        f"分片 {len(shards)} 个 (平均 {sum(sizes) / len(sizes) / 1024:.1f} KB, "
+                        f"最大 {max(sizes) / 1024:.1f} KB)")
+        summary += f"\n启动下载 {os.path.getsize(args.output + '/meta.json')} 字节"
+    else:
+        summary += "\n索引没有变化"
+    print(summary)
+    log_size_report(size_report(args.output))
+
+    if args.query:
+        results, shard_count, chunk_count = search(args.output, args.query)
+        print(f'查询 "{args.query}": {len(results)} 个结果 (下载分片 {shard_count} 个, 条目文件 {chunk_count} 个)')
+        for doc in results[:20]:
+            print(f"  [{doc['type']}] {doc['bookTitle']} {doc['lessonTitle']}: {doc['content'][:40]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
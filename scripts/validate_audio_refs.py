@@ -0,0 +1,221 @@
+"""
+校验课文JSON中的 audio 路径与音频目录是否一致
+
+1. 只扫描一次 resources/audio/lessons，建立音频文件索引
+2. 并行读取所有 dialogue.json / words.json / listening.json，检查每个 audio 字段（以及拼接音频的 sprite 字段）
+3. 报告三类问题：
+   - missing: JSON 引用的音频不存在
+   - orphaned: 课程音频目录中没有被任何 JSON 引用的MP3
+   - count_mismatch: 课程音频目录（如 .../lesson1/words/）中的片段数与JSON条目数不同
+4. 有问题时退出码为1；--baseline 中记录的已知问题不算失败，只有新出现的问题会让构建失败
+
+用法（在仓库根目录运行）:
+  python3 scripts/validate_audio_refs.py [--report report.json | --report -] [--baseline scripts/audio_refs_baseline.json]
+  python3 scripts/validate_audio_refs.py --update-baseline   # 修复或确认问题后重新记录已知问题
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+TEXT_ROOT = 'resources/text/lessons'
+AUDIO_ROOT = 'resources/audio/lessons'
+DEFAULT_BASELINE = 'scripts/audio_refs_baseline.json'
+REPORT_VERSION = 1
+
+# 课文文件 -> (条目列表字段, 对应的音频子目录)
+KINDS = {
+    'dialogue.json': ('sentences', 'dialogue'),
+    'words.json': ('words', 'words'),
+    'listening.json': ('exercises', 'listening'),
+}
+CLIP_NAME = re.compile(r'^\d+\.mp3$')
+
+
+def index_audio_tree(root):
+    """一次遍历音频目录，返回 所有MP3路径的集合 和 {子目录: 片段数}（只统计 数字.mp3）"""
+    files = set()
+    clip_counts = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        clips = 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith('.mp3'):
+                    files.add(entry.path.replace(os.sep, '/'))
+                    clips += bool(CLIP_NAME.match(entry.name))
+        clip_counts[directory.replace(os.sep, '/')] = clips
+    return files, clip_counts
+
+
+def collect_refs(value, pointer=''):
+    """递归收集 audio / sprite 字段，返回 [(JSON指针, 路径)]"""
+    refs = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in ('audio', 'sprite') and isinstance(item, str):
+                if item:
+                    refs.append((f'{pointer}/{key}', item))
+            else:
+                refs += collect_refs(item, f'{pointer}/{key}')
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            refs += collect_refs(item, f'{pointer}/{i}')
+    return refs
+
+
+def read_lesson(lesson_dir):
+    """读取一课的课文JSON，返回 [(文件路径, 条目列表字段, 条目数, 引用列表, 错误)]"""
+    results = []
+    for filename, (key, _) in KINDS.items():
+        path = f'{lesson_dir}/{filename}'
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            results.append((path, key, 0, [], str(e)))
+            continue
+        entries = data.get(key) if isinstance(data, dict) else None
+        count = len(entries) if isinstance(entries, list) else 0
+        results.append((path, key, count, collect_refs(data), None))
+    return results
+
+
+def lesson_dirs(root):
+    """resources/text/lessons/bookN/lessonM"""
+    dirs = []
+    for book in sorted(os.listdir(root)):
+        book_dir = f'{root}/{book}'
+        if os.path.isdir(book_dir):
+            dirs += [f'{book_dir}/{name}' for name in sorted(os.listdir(book_dir)) if name.startswith('lesson')]
+    return dirs
+
+
+def validate(text_root=TEXT_ROOT, audio_root=AUDIO_ROOT, workers=1):
+    """返回报告（问题按类型分组）"""
+    files, clip_counts = index_audio_tree(audio_root)
+    lessons = lesson_dirs(text_root)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            lesson_results = list(pool.map(read_lesson, lessons, chunksize=max(1, len(lessons) // (workers * 2))))
+    else:
+        lesson_results = [read_lesson(lesson) for lesson in lessons]
+
+    issues = {'missing': [], 'orphaned': [], 'count_mismatch': [], 'invalid_json': []}
+    referenced = set()
+    ref_count = 0
+    for lesson_dir, results in zip(lessons, lesson_results):
+        book, lesson = lesson_dir.split('/')[-2:]
+        for path, key, count, refs, error in results:
+            if error:
+                issues['invalid_json'].append({'json': path, 'error': error})
+                continue
+            ref_count += len(refs)
+            for pointer, audio in refs:
+                referenced.add(audio)
+                if audio not in files:
+                    issues['missing'].append({'json': path, 'pointer': pointer, 'audio': audio})
+
+            clip_dir = f'{audio_root}/{book}/{lesson}/{KINDS[os.path.basename(path)][1]}'
+            clips = clip_counts.get(clip_dir, 0)
+            if clips != count and (clips or any(p.startswith(f'/{key}/') for p, _ in refs)):
+                issues['count_mismatch'].append({'json': path, 'audio_dir': clip_dir, 'entries': count, 'clips': clips})
+
+    # 只检查课程下按内容分类的目录，book1 目录中的处理脚本和日志不算
+    lesson_audio = re.compile(rf'^{re.escape(audio_root)}/[^/]+/lesson\d+/')
+    for audio in sorted(files - referenced):
+        if lesson_audio.match(audio):
+            issues['orphaned'].append({'audio': audio})
+
+    return {
+        'version': REPORT_VERSION,
+        'summary': {
+            'lessons': len(lessons),
+            'json_files': sum(len(results) for results in lesson_results),
+            'audio_files': len(files),
+            'references': ref_count,
+            **{name: len(items) for name, items in issues.items()},
+        },
+        'issues': issues,
+    }
+
+
+def issue_key(kind, issue):
+    """基线中用来识别同一个问题的键"""
+    if kind == 'orphaned':
+        return f"{kind}:{issue['audio']}"
+    if kind == 'missing':
+        return f"{kind}:{issue['json']}#{issue['pointer']}"
+    return f"{kind}:{issue['json']}"
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return set(json.load(f).get('known_issues', []))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='校验课文JSON中的音频引用')
+    parser.add_argument('--text-root', default=TEXT_ROOT)
+    parser.add_argument('--audio-root', default=AUDIO_ROOT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数')
+    parser.add_argument('--report', help='保存JSON报告的路径，- 表示输出到标准输出')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='已知问题列表，其中的问题不会导致失败')
+    parser.add_argument('--update-baseline', action='store_true', help='把当前所有问题写入基线')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = validate(args.text_root, args.audio_root, max(1, args.workers))
+    known = load_baseline(args.baseline)
+
+    new_issues = []
+    current = set()
+    for kind, items in report['issues'].items():
+        for issue in items:
+            key = issue_key(kind, issue)
+            current.add(key)
+            issue['known'] = key in known
+            if not issue['known']:
+                new_issues.append(key)
+    report['summary']['new_issues'] = len(new_issues)
+    report['summary']['fixed_known_issues'] = len(known - current)
+    report['summary']['elapsed_s'] = round(time.perf_counter() - start, 3)
+
+    if args.report == '-':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        summary = report['summary']
+        print(f"课程 {summary['lessons']} 个, JSON {summary['json_files']} 个, 音频 {summary['audio_files']} 个, "
+              f"引用 {summary['references']} 个, 耗时 {summary['elapsed_s']}s")
+        print(f"缺失 {summary['missing']}, 孤立 {summary['orphaned']}, 数量不符 {summary['count_mismatch']}, "
+              f"JSON错误 {summary['invalid_json']} (新问题 {summary['new_issues']}, "
+              f"已修复的已知问题 {summary['fixed_known_issues']})")
+        for key in new_issues:
+            print(f'❌ {key}')
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f'报告已保存: {args.report}')
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'known_issues': sorted(current)}, f, ensure_ascii=False, indent=2)
+        print(f'基线已更新: {args.baseline} ({len(current)} 个已知问题)', file=sys.stderr)
+        return 0
+    return 1 if new_issues else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
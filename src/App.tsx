@@ -3,10 +3,12 @@ import { ChevronLeft, Play, Pause, Book as BookIcon, ChevronDown, ChevronUp, Eye
 import type { Book } from './data/books';
 import SettingsModal from './components/SettingsModal';
 import SearchBar from './components/SearchBar';
+import SearchPage from './components/SearchPage';
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 import EmptyContent from './components/EmptyContent';
 import BackToTopButton from './components/BackToTopButton';
+import { SearchClient } from './searchClient';
 
 // 定义字体大小映射
 const fontSizeMapping: { [key: string]: string } = {
@@ -44,11 +46,15 @@ interface LessonContent {
     }[];
   };
   单词: {
+    // 本课单词的拼接音频（sprite_builder.py 生成），start_ms/end_ms 为每个单词在其中的位置
+    sprite?: string;
     words: {
       korean: string;
       chinese: string;
       etymology: string;
       audio: string;
+      start_ms?: number;
+      end_ms?: number;
     }[];
   };
   阅读: {
@@ -109,14 +115,6 @@ interface Lesson {
   };
 }
 
-const SEARCH_TYPES = [
-  { label: '全部', value: '全部' },
-  { label: '课文', value: '课文' },
-  { label: '语法', value: '语法' },
-  { label: '单词', value: '单词' },
-  { label: '阅读', value: '阅读' },
-];
-
 const App = () => {
   const [currentView, setCurrentView] = useState('home'); // 'home', 'bookList', 'lesson', 'content'
   const [selectedBook, setSelectedBook] = useState<Book | null>(null);
@@ -127,6 +125,11 @@ const App = () => {
   const [showReadingTranslation, setShowReadingTranslation] = useState<Record<number, boolean>>({});
   const [showBackToTop, setShowBackToTop] = useState(false);
   const audioRef = useRef<HTMLAudioElement | null>(null);
+  const spriteRef = useRef<HTMLAudioElement | null>(null);
+  // 拼接音频片段的结束检测（requestAnimationFrame 循环），停止播放时由 stopCurrentAudio 取消
+  const spriteFrameRef = useRef<number | null>(null);
+  // 正在播放的拼接音频片段的 resolve，停止播放时由 stopCurrentAudio 调用
+  const spriteResolveRef = useRef<((played: boolean) => void) | null>(null);
   const [content, setContent] = useState<LessonContent | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
@@ -152,18 +155,14 @@ const App = () => {
     return saved || 'default';
   });
 
-  // 搜索相关状态
-  const [searchCache, setSearchCache] = useState<Record<string, any>>({});
-  // 搜索索引相关状态
-  const [searchIndex, setSearchIndex] = useState<any[] | null>(null);
+  // 搜索在 Web Worker 中执行（索引、排序和结果缓存都在 Worker 中）
+  const searchClientRef = useRef<SearchClient | null>(null);
   const [searchIndexLoading, setSearchIndexLoading] = useState(true);
   const [searchIndexError, setSearchIndexError] = useState<string | null>(null);
 
   const [isSearchPage, setIsSearchPage] = useState(false);
   const [searchInput, setSearchInput] = useState('');
   const [searchResults, setSearchResults] = useState<SearchResult[]>([]);
-  const [searchType, setSearchType] = useState('全部');
-  const searchInputRef = useRef<HTMLInputElement>(null);
 
   // 监听滚动，控制返回顶部按钮显隐
   useEffect(() => {
@@ -197,18 +196,19 @@ const App = () => {
       .then(setLessonsData);
   }, []);
 
-  // 加载search_index.json
+  // 启动搜索 Worker 并加载索引（只下载 meta.json，分片在查询时按需下载）
   useEffect(() => {
+    const client = new SearchClient();
+    searchClientRef.current = client;
     setSearchIndexLoading(true);
     setSearchIndexError(null);
-    fetch('/resources/data/search_index.json')
-      .then(r => {
-        if (!r.ok) throw new Error('索引文件加载失败');
-        return r.json();
-      })
-      .then(setSearchIndex)
+    client.ready
       .catch(() => setSearchIndexError('搜索索引加载失败'))
       .finally(() => setSearchIndexLoading(false));
+    return () => {
+      searchClientRef.current = null;
+      client.terminate();
+    };
   }, []);
 
   // 2. 监听selectedLesson变化，动态加载内容
@@ -273,6 +273,13 @@ const App = () => {
     loadContent();
   }, [selectedLesson]);
 
+  // 预加载本课单词的拼接音频
+  useEffect(() => {
+    const sprite = content?.单词.sprite;
+    spriteRef.current = sprite ? new window.Audio(sprite) : null;
+    if (spriteRef.current) spriteRef.current.preload = 'auto';
+  }, [content]);
+
   // Toast状态
   const showToast = (msg: string) => {
     setToast({ show: true, message: msg });
@@ -309,6 +316,57 @@ const App = () => {
     });
   };
 
+  // 播放拼接音频中的一段，失败时返回false，由调用方回退到单独的音频文件
+  const playSpriteClip = (start: number, end: number) => {
+    stopCurrentAudio();
+    const sprite = spriteRef.current;
+    if (!sprite) return Promise.resolve(false);
+    return new Promise<boolean>((resolve) => {
+      const settle = (played: boolean) => {
+        if (spriteResolveRef.current !== settle) return;   // 已被停止或新的播放取代
+        spriteResolveRef.current = null;
+        sprite.onerror = null;
+        sprite.ontimeupdate = null;
+        resolve(played);
+      };
+      const fail = () => {
+        if (spriteResolveRef.current !== settle) return;
+        audioRef.current = null;
+        settle(false);
+      };
+      spriteResolveRef.current = settle;
+      audioRef.current = sprite;
+      sprite.onerror = fail;
+      sprite.currentTime = start / 1000;
+      // 按播放位置而不是计时器判断结束：缓冲或解码卡顿时计时器会提前截断片段
+      // 每帧检查一次；页面在后台时 requestAnimationFrame 会暂停，由 timeupdate 兜底
+      const endTime = end / 1000;
+      const check = () => {
+        if (spriteResolveRef.current !== settle) return;
+        if (sprite.currentTime < endTime && !sprite.ended) return;
+        if (spriteFrameRef.current !== null) {
+          window.cancelAnimationFrame(spriteFrameRef.current);
+          spriteFrameRef.current = null;
+        }
+        sprite.pause();
+        audioRef.current = null;
+        settle(true);
+      };
+      const tick = () => {
+        spriteFrameRef.current = null;
+        check();
+        if (spriteResolveRef.current === settle) {
+          spriteFrameRef.current = window.requestAnimationFrame(tick);
+        }
+      };
+      sprite.play().then(() => {
+        if (spriteResolveRef.current !== settle) return;
+        sprite.ontimeupdate = check;
+        tick();
+      }).catch(fail);
+    });
+  };
+
   // 播放全文
   const playAllText = async () => {
     if (activeTab !== '课文' || !content?.课文.sentences) return;
@@ -347,11 +405,16 @@ const App = () => {
   };
 
   // 单词播放
-  const playWord = async (audio: string, idx: number) => {
+  const playWord = async (word: LessonContent['单词']['words'][number], idx: number) => {
     setPlayingWordIdx(idx);
     setIsPlayingAll(false);
-    await playAudioWithFeedback(audio);
-    setPlayingWordIdx(null);
+    const played = word.start_ms !== undefined && word.end_ms !== undefined
+      && await playSpriteClip(word.start_ms, word.end_ms);
+    if (!played) {
+      await playAudioWithFeedback(word.audio);
+    }
+    // 被另一个单词的播放打断时，不清除新单词的高亮
+    setPlayingWordIdx(current => (current === idx ? null : current));
   };
 
   const toggleGrammar = (index: number) => {
@@ -370,11 +433,20 @@ const App = () => {
 
   // 停止当前音频
   const stopCurrentAudio = () => {
+    if (spriteFrameRef.current !== null) {
+      window.cancelAnimationFrame(spriteFrameRef.current);
+      spriteFrameRef.current = null;
+    }
+    if (spriteRef.current) {
+      spriteRef.current.ontimeupdate = null;
+    }
     if (audioRef.current) {
       audioRef.current.pause();
       audioRef.current.currentTime = 0;
       audioRef.current = null;
     }
+    // 片段被停止时也要结束等待，否则单词会一直保持高亮（true：不再回退到单独的音频文件）
+    spriteResolveRef.current?.(true);
   };
 
   // 应用字体大小
@@ -413,32 +485,30 @@ const App = () => {
     localStorage.setItem('theme', theme);
   }, [theme]);
 
-  // 搜索函数
+  // 搜索函数：被新查询取代时返回空数组
   const handleSearch = async (query: string): Promise<SearchResult[]> => {
     if (!query.trim()) return [];
     if (searchIndexLoading) {
       showToast('索引加载中，请稍候...');
       return [];
     }
-    if (searchIndexError || !searchIndex) {
+    const client = searchClientRef.current;
+    if (searchIndexError || !client) {
       showToast('搜索索引加载失败，请刷新页面');
       return [];
     }
-    // 检查缓存
-    if (searchCache[query]) {
-      return searchCache[query];
+    try {
+      return (await client.search<SearchResult>(query)) ?? [];
+    } catch {
+      showToast('搜索索引加载失败，请检查网络');
+      return [];
     }
-    // 本地过滤
-    const results = searchIndex.filter(item =>
-      item.content.includes(query) || item.preview.includes(query)
-    );
-    setSearchCache(prev => ({
-      ...prev,
-      [query]: results
-    }));
-    return results;
   };
 
+  // 搜索页的查询：加载状态和错误由搜索页显示，不弹提示（被新查询取代时为 null，失败时 reject）
+  const searchFromPage = (query: string): Promise<SearchResult[] | null> =>
+    searchClientRef.current?.search<SearchResult>(query) ?? Promise.resolve(null);
+
   // 处理搜索结果点击
   const handleSearchResultClick = (result: SearchResult) => {
     const book = books.find(b => b.id === result.bookId);
@@ -456,131 +526,6 @@ const App = () => {
     setActiveTab(result.type);
   };
 
-  // 搜索页组件
-  const SearchPage = () => {
-    // 过滤结果
-    const filteredResults = searchType === '全部'
-      ? searchResults
-      : searchResults.filter(r => r.type === searchType);
-
-    const [isComposing, setIsComposing] = useState(false);
-    const [inputValue, setInputValue] = useState(searchInput);
-
-    useEffect(() => {
-      // 自动聚焦
-      searchInputRef.current?.focus();
-    }, []);
-
-    // 提交搜索
-    const handleSearchSubmit = async () => {
-      setSearchInput(inputValue);
-      const results = await handleSearch(inputValue);
-      setSearchResults(results);
-      setSearchType('全部');
-    };
-
-    return (
-      <div className="fixed inset-0 z-50 bg-white/90 backdrop-blur-sm flex flex-col transition-all duration-300 animate-fade-in">
-        {/* 顶部搜索栏 */}
-        <div className="w-full max-w-3xl mx-auto px-4 pt-8 pb-2 flex flex-col items-center">
-          <div className="w-full flex items-center gap-2">
-            <button
-              className="mr-2 text-gray-400 hover:text-gray-600 focus:outline-none"
-              onClick={() => setIsSearchPage(false)}
-              aria-label="返回"
-            >
-              <ChevronLeft className="h-6 w-6" />
-            </button>
-            {/* 标签+输入框一行 */}
-            <div className="flex flex-1 items-center bg-white border border-gray-300 rounded-lg overflow-hidden">
-              {/* 标签 */}
-              <button
-                className={`h-full px-3 py-1 text-sm font-semibold rounded-none focus:outline-none transition-all whitespace-nowrap
-                  ${searchType === '全部' ? 'bg-gray-100 text-gray-500' :
-                    searchType === '课文' ? 'bg-blue-100 text-blue-600' :
-                    searchType === '语法' ? 'bg-green-100 text-green-600' :
-                    searchType === '单词' ? 'bg-yellow-100 text-yellow-700' :
-                    searchType === '阅读' ? 'bg-pink-100 text-pink-600' :
-                    'bg-gray-100 text-gray-500'}
-                `}
-                style={{ borderRight: '1px solid #e5e7eb', height: '40px' }}
-                onClick={() => {
-                  // 弹出下拉菜单或循环切换
-                  const idx = SEARCH_TYPES.findIndex(t => t.value === searchType);
-                  const next = SEARCH_TYPES[(idx + 1) % SEARCH_TYPES.length];
-                  setSearchType(next.value);
-                }}
-                tabIndex={0}
-              >
-                {SEARCH_TYPES.find(t => t.value === searchType)?.label || '全部'}
-              </button>
-              {/* 输入框 */}
-              <input
-                ref={searchInputRef}
-                className="flex-1 px-4 py-2 text-lg bg-white border-0 outline-none focus:ring-0"
-                placeholder="搜索课文、语法、单词、阅读..."
-                value={inputValue}
-                onChange={e => setInputValue(e.target.value)}
-                onCompositionStart={() => setIsComposing(true)}
-                onCompositionEnd={() => setIsComposing(false)}
-                onKeyDown={e => {
-                  if (e.key === 'Enter' && !isComposing) {
-                    handleSearchSubmit();
-                  }
-                  if (e.key === 'Escape') setIsSearchPage(false);
-                }}
-                style={{ minWidth: 0 }}
-              />
-              {/* 搜索按钮 */}
-              <button
-                className="px-3 text-blue-500 hover:text-blue-700 focus:outline-none"
-                onClick={handleSearchSubmit}
-                tabIndex={-1}
-                type="button"
-              >
-                <svg className="h-5 w-5" fill="none" stroke="currentColor" strokeWidth="2" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" d="M21 21l-4.35-4.35m0 0A7.5 7.5 0 104.5 4.5a7.5 7.5 0 0012.15 12.15z" /></svg>
-              </button>
-            </div>
-          </div>
-        </div>
-        {/* 结果区 */}
-        <div className="flex-1 w-full max-w-3xl mx-auto px-4 pb-8 overflow-y-auto mt-2">
-          {inputValue.trim() === '' ? (
-            <div className="text-gray-400 text-center mt-16">请输入关键词进行搜索</div>
-          ) : filteredResults.length === 0 ? (
-            <div className="text-gray-400 text-center mt-16">未找到相关内容</div>
-          ) : (
-            <div className="space-y-4 mt-4">
-              {filteredResults.map((result, idx) => (
-                <div
-                  key={idx}
-                  className="bg-white rounded-lg shadow-sm p-4 cursor-pointer hover:shadow-md transition-all border border-gray-100"
-                  onClick={() => {
-                    setIsSearchPage(false);
-                    handleSearchResultClick(result);
-                  }}
-                >
-                  <div className="flex items-center gap-2 mb-1">
-                    <span className={`px-2 py-0.5 rounded-full text-xs font-semibold ${
-                      result.type === '课文' ? 'bg-blue-100 text-blue-600' :
-                      result.type === '语法' ? 'bg-green-100 text-green-600' :
-                      result.type === '单词' ? 'bg-yellow-100 text-yellow-700' :
-                      result.type === '阅读' ? 'bg-pink-100 text-pink-600' :
-                      'bg-gray-100 text-gray-500'
-                    }`}>{result.type}</span>
-                    <span className="text-gray-700 font-medium truncate">{result.bookTitle} {result.lessonTitle}</span>
-                  </div>
-                  <div className="text-gray-900 font-semibold truncate">{result.preview}</div>
-                  <div className="text-gray-500 text-sm truncate">{result.content}</div>
-                </div>
-              ))}
-            </div>
-          )}
-        </div>
-      </div>
-    );
-  };
-
   // 首页
   const HomePage = () => (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-100 flex flex-col items-center justify-center">
@@ -828,7 +773,7 @@ const App = () => {
                   className={`bg-white rounded-lg p-4 shadow-sm flex justify-between items-center cursor-pointer transition-all
                     ${playingWordIdx === index ? 'ring-2 ring-blue-400 bg-blue-100' : 'hover:bg-blue-50'}
                   `}
-                  onClick={() => playWord(word.audio, index)}
+                  onClick={() => playWord(word, index)}
                 >
                   <div>
                     <div className="flex items-center gap-2">
@@ -943,7 +888,23 @@ const App = () => {
 
   // 渲染当前视图
   const renderView = () => {
-    if (isSearchPage) return <SearchPage />;
+    if (isSearchPage) {
+      return (
+        <SearchPage
+          initialQuery={searchInput}
+          initialResults={searchResults}
+          onSearch={searchFromPage}
+          onResultClick={handleSearchResultClick}
+          loading={searchIndexLoading}
+          error={searchIndexError}
+          onClose={(query, results) => {
+            setSearchInput(query);
+            setSearchResults(results);
+            setIsSearchPage(false);
+          }}
+        />
+      );
+    }
     switch (currentView) {
       case 'home':
         return <HomePage />;
@@ -0,0 +1,197 @@
+import React, { useState, useRef, useEffect, startTransition } from 'react';
+import { ChevronLeft } from 'lucide-react';
+
+interface SearchResult {
+  type: '课文' | '语法' | '单词' | '阅读';
+  content: string;
+  preview: string;
+  bookId: number;
+  lessonId: number;
+  bookTitle: string;
+  lessonTitle: string;
+}
+
+interface SearchPageProps {
+  initialQuery: string;
+  initialResults: SearchResult[];
+  // 查询：被新查询取代时为 null，失败时 reject
+  onSearch: (query: string) => Promise<SearchResult[] | null>;
+  onResultClick: (result: SearchResult) => void;
+  // 关闭时把查询和结果交给上层，下次打开时恢复
+  onClose: (query: string, results: SearchResult[]) => void;
+  loading?: boolean;
+  error?: string | null;
+}
+
+const SEARCH_TYPES = [
+  { label: '全部', value: '全部' },
+  { label: '课文', value: '课文' },
+  { label: '语法', value: '语法' },
+  { label: '单词', value: '单词' },
+  { label: '阅读', value: '阅读' },
+];
+
+// 搜索页：输入时即查询（查询在 Web Worker 中执行，输入法组字中也会查询），结果以低优先级更新，不阻塞输入
+// 索引加载中、加载失败或查询失败时在结果区显示一次状态，不逐次提示
+const SearchPage: React.FC<SearchPageProps> = ({
+  initialQuery, initialResults, onSearch, onResultClick, onClose, loading = false, error = null,
+}) => {
+  const [inputValue, setInputValue] = useState(initialQuery);
+  const [results, setResults] = useState<SearchResult[]>(initialResults);
+  const [searchError, setSearchError] = useState<string | null>(null);
+  const [attempt, setAttempt] = useState(0);
+  const [searchType, setSearchType] = useState('全部');
+  const [isComposing, setIsComposing] = useState(false);
+  const inputRef = useRef<HTMLInputElement>(null);
+
+  // 过滤结果
+  const filteredResults = searchType === '全部'
+    ? results
+    : results.filter(r => r.type === searchType);
+
+  useEffect(() => {
+    // 自动聚焦
+    inputRef.current?.focus();
+  }, []);
+
+  // 输入变化时查询；输入再次变化后不再显示旧查询的结果（Worker 中的旧查询也会被取代）
+  // 索引加载完成后自动查询加载期间输入的内容
+  useEffect(() => {
+    setSearchError(null);
+    if (!inputValue.trim() || loading || error) {
+      setResults([]);
+      return;
+    }
+    let active = true;
+    onSearch(inputValue).then(
+      found => {
+        if (active && found) startTransition(() => setResults(found));
+      },
+      () => {
+        if (!active) return;
+        setResults([]);
+        setSearchError('搜索失败，请检查网络后按回车重试');
+      }
+    );
+    return () => {
+      active = false;
+    };
+  }, [inputValue, loading, error, attempt]);
+
+  // 回车：重新查询（上次下载失败时重试）并显示全部类型
+  const handleSearchSubmit = () => {
+    setSearchType('全部');
+    if (inputValue.trim()) setAttempt(n => n + 1);
+  };
+
+  const close = () => onClose(inputValue, results);
+
+  return (
+    <div className="fixed inset-0 z-50 bg-white/90 backdrop-blur-sm flex flex-col transition-all duration-300 animate-fade-in">
+      {/* 顶部搜索栏 */}
+      <div className="w-full max-w-3xl mx-auto px-4 pt-8 pb-2 flex flex-col items-center">
+        <div className="w-full flex items-center gap-2">
+          <button
+            className="mr-2 text-gray-400 hover:text-gray-600 focus:outline-none"
+            onClick={close}
+            aria-label="返回"
+          >
+            <ChevronLeft className="h-6 w-6" />
+          </button>
+          {/* 标签+输入框一行 */}
+          <div className="flex flex-1 items-center bg-white border border-gray-300 rounded-lg overflow-hidden">
+            {/* 标签 */}
+            <button
+              className={`h-full px-3 py-1 text-sm font-semibold rounded-none focus:outline-none transition-all whitespace-nowrap
+                ${searchType === '全部' ? 'bg-gray-100 text-gray-500' :
+                  searchType === '课文' ? 'bg-blue-100 text-blue-600' :
+                  searchType === '语法' ? 'bg-green-100 text-green-600' :
+                  searchType === '单词' ? 'bg-yellow-100 text-yellow-700' :
+                  searchType === '阅读' ? 'bg-pink-100 text-pink-600' :
+                  'bg-gray-100 text-gray-500'}
+              `}
+              style={{ borderRight: '1px solid #e5e7eb', height: '40px' }}
+              onClick={() => {
+                // 弹出下拉菜单或循环切换
+                const idx = SEARCH_TYPES.findIndex(t => t.value === searchType);
+                const next = SEARCH_TYPES[(idx + 1) % SEARCH_TYPES.length];
+                setSearchType(next.value);
+              }}
+              tabIndex={0}
+            >
+              {SEARCH_TYPES.find(t => t.value === searchType)?.label || '全部'}
+            </button>
+            {/* 输入框 */}
+            <input
+              ref={inputRef}
+              className="flex-1 px-4 py-2 text-lg bg-white border-0 outline-none focus:ring-0"
+              placeholder={loading ? '索引加载中...' : '搜索课文、语法、单词、阅读...'}
+              value={inputValue}
+              onChange={e => setInputValue(e.target.value)}
+              onCompositionStart={() => setIsComposing(true)}
+              onCompositionEnd={() => setIsComposing(false)}
+              onKeyDown={e => {
+                if (e.key === 'Enter' && !isComposing) {
+                  handleSearchSubmit();
+                }
+                if (e.key === 'Escape') close();
+              }}
+              style={{ minWidth: 0 }}
+            />
+            {/* 搜索按钮 */}
+            <button
+              className="px-3 text-blue-500 hover:text-blue-700 focus:outline-none"
+              onClick={handleSearchSubmit}
+              tabIndex={-1}
+              type="button"
+            >
+              <svg className="h-5 w-5" fill="none" stroke="currentColor" strokeWidth="2" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" d="M21 21l-4.35-4.35m0 0A7.5 7.5 0 104.5 4.5a7.5 7.5 0 0012.15 12.15z" /></svg>
+            </button>
+          </div>
+        </div>
+      </div>
+      {/* 结果区 */}
+      <div className="flex-1 w-full max-w-3xl mx-auto px-4 pb-8 overflow-y-auto mt-2">
+        {error ? (
+          <div className="text-red-500 text-center mt-16">{error}，请刷新页面</div>
+        ) : inputValue.trim() === '' ? (
+          <div className="text-gray-400 text-center mt-16">请输入关键词进行搜索</div>
+        ) : loading ? (
+          <div className="text-gray-400 text-center mt-16">索引加载中...</div>
+        ) : searchError ? (
+          <div className="text-red-500 text-center mt-16">{searchError}</div>
+        ) : filteredResults.length === 0 ? (
+          <div className="text-gray-400 text-center mt-16">未找到相关内容</div>
+        ) : (
+          <div className="space-y-4 mt-4">
+            {filteredResults.map((result, idx) => (
+              <div
+                key={idx}
+                className="bg-white rounded-lg shadow-sm p-4 cursor-pointer hover:shadow-md transition-all border border-gray-100"
+                onClick={() => {
+                  close();
+                  onResultClick(result);
+                }}
+              >
+                <div className="flex items-center gap-2 mb-1">
+                  <span className={`px-2 py-0.5 rounded-full text-xs font-semibold ${
+                    result.type === '课文' ? 'bg-blue-100 text-blue-600' :
+                    result.type === '语法' ? 'bg-green-100 text-green-600' :
+                    result.type === '单词' ? 'bg-yellow-100 text-yellow-700' :
+                    result.type === '阅读' ? 'bg-pink-100 text-pink-600' :
+                    'bg-gray-100 text-gray-500'
+                  }`}>{result.type}</span>
+                  <span className="text-gray-700 font-medium truncate">{result.bookTitle} {result.lessonTitle}</span>
+                </div>
+                <div className="text-gray-900 font-semibold truncate">{result.preview}</div>
+                <div className="text-gray-500 text-sm truncate">{result.content}</div>
+              </div>
+            ))}
+          </div>
+        )}
+      </div>
+    </div>
+  );
+};
+
+export default SearchPage;
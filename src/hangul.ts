@@ -0,0 +1,49 @@
+// 韩文字母分解（与 scripts/build_search_index.py 的 decompose / choseong 相同）
+// 音节 = 0xAC00 + (初声 * 21 + 中声) * 28 + 收音，字母用兼容字母（输入法输入的 ㄱ、ㅏ），复合元音和复合收音拆开
+
+const HANGUL_BASE = 0xac00;
+const HANGUL_COUNT = 11172;
+const CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ';
+const JUNGSEONG = [
+  'ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅗㅏ', 'ㅗㅐ', 'ㅗㅣ', 'ㅛ', 'ㅜ',
+  'ㅜㅓ', 'ㅜㅔ', 'ㅜㅣ', 'ㅠ', 'ㅡ', 'ㅡㅣ', 'ㅣ',
+];
+const JONGSEONG = [
+  '', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ', 'ㄹㅌ',
+  'ㄹㅍ', 'ㄹㅎ', 'ㅁ', 'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ',
+];
+// 单独输入的复合字母也拆开（输入法组字时 닭 会先显示 달 再显示 닭）
+const COMPOUND_JAMO: Record<string, string> = {
+  'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ', 'ㄾ': 'ㄹㅌ',
+  'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+  'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+};
+
+const syllableIndex = (char: string): number => {
+  const index = char.codePointAt(0)! - HANGUL_BASE;
+  return index >= 0 && index < HANGUL_COUNT ? index : -1;
+};
+
+export const isSyllable = (char: string): boolean => syllableIndex(char) >= 0;
+
+// 兼容字母 ㄱ-ㅣ
+export const isJamo = (char: string): boolean => char >= 'ㄱ' && char <= 'ㅣ';
+
+export const isConsonant = (char: string): boolean => char >= 'ㄱ' && char <= 'ㅎ';
+
+// 音节和复合字母分解为基本字母，其他字符不变
+export const decompose = (chars: string[]): string[] =>
+  chars.flatMap(char => {
+    const index = syllableIndex(char);
+    if (index < 0) return Array.from(COMPOUND_JAMO[char] ?? char);
+    return Array.from(
+      CHOSEONG[Math.floor(index / 588)] + JUNGSEONG[Math.floor((index % 588) / 28)] + JONGSEONG[index % 28]
+    );
+  });
+
+// 音节替换为初声，其他字符不变
+export const choseong = (chars: string[]): string[] =>
+  chars.map(char => {
+    const index = syllableIndex(char);
+    return index < 0 ? char : CHOSEONG[Math.floor(index / 588)];
+  });
@@ -0,0 +1,55 @@
+// 主线程的搜索接口：把查询交给 searchWorker.ts，只处理最新一次查询的结果
+
+import type { SearchEntry } from './searchIndex';
+import type { WorkerRequest, WorkerResponse } from './searchWorker';
+
+interface PendingSearch {
+  id: number;
+  resolve: (results: SearchEntry[] | null) => void;
+  reject: (error: Error) => void;
+}
+
+export class SearchClient {
+  private worker: Worker;
+  private nextId = 1;
+  private pending: PendingSearch | null = null;
+  readonly ready: Promise<void>;
+
+  constructor() {
+    this.worker = new Worker(new URL('./searchWorker.ts', import.meta.url), { type: 'module' });
+    this.ready = new Promise<void>((resolve, reject) => {
+      this.worker.addEventListener('message', (event: MessageEvent<WorkerResponse>) => {
+        const message = event.data;
+        if (message.type === 'ready') resolve();
+        else if (message.type === 'error') reject(new Error(message.message));
+        else this.handle(message);
+      });
+      this.worker.addEventListener('error', () => reject(new Error('搜索线程启动失败')));
+    });
+  }
+
+  private handle(message: Extract<WorkerResponse, { id: number }>) {
+    const pending = this.pending;
+    if (!pending || pending.id !== message.id) return;   // 已被新查询取代
+    this.pending = null;
+    if (message.type === 'failed') pending.reject(new Error(message.message));
+    else pending.resolve(message.results);
+  }
+
+  // 查询：返回排序后的结果，被新查询取代时为 null
+  // T 为调用方对条目更具体的类型（如 type 为固定的几种）
+  search<T extends SearchEntry = SearchEntry>(query: string): Promise<T[] | null> {
+    this.pending?.resolve(null);
+    return new Promise<T[] | null>((resolve, reject) => {
+      const id = this.nextId++;
+      this.pending = { id, resolve: results => resolve(results as T[] | null), reject };
+      this.worker.postMessage({ type: 'search', id, query } satisfies WorkerRequest);
+    });
+  }
+
+  terminate() {
+    this.pending?.resolve(null);
+    this.pending = null;
+    this.worker.terminate();
+  }
+}
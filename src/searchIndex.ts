@@ -0,0 +1,250 @@
+// 分片倒排索引的客户端（索引由 scripts/build_search_index.py 生成）
+// 启动时只下载 meta.json；查询时只下载用到的分片和候选条目所在的文件，下载过的文件会缓存
+// 浏览器支持 DecompressionStream 时优先下载预压缩的 .json.gz，失败时退回 .json
+// 只由辅音组成的查询（ㅎㄱㅇ）查初声索引，其他含韩文的查询按字母查（输入法组字中的 한구、한ㄱ 也能查到 한국）
+// 排序、缓存和取消在 searchWorker.ts 中完成，这里只返回每个命中条目的匹配程度
+
+import { choseong, decompose, isConsonant, isJamo, isSyllable } from './hangul';
+
+export interface SearchEntry {
+  type: string;
+  content: string;
+  preview: string;
+  bookId: number;
+  lessonId: number;
+  bookTitle: string;
+  lessonTitle: string;
+}
+
+// 匹配程度：整个字段相同 > 字段以查询开头 > 字段包含查询
+export const MATCH_EXACT = 0;
+export const MATCH_PREFIX = 1;
+export const MATCH_SUBSTRING = 2;
+
+export interface SearchHit {
+  id: number;       // 条目编号（条目顺序）
+  match: number;    // MATCH_*
+  entry: SearchEntry;
+}
+
+interface IndexMeta {
+  version: number;
+  documents: number;
+  shards: number;
+  docChunk: number;
+  strings: string[];
+}
+
+// 按列存储的条目文件（格式见 build_search_index.py 的 compact_chunk）
+export interface CompactChunk {
+  type: number[];
+  bookId: number[];
+  bookTitle: number[];
+  lessonId: number[];
+  lessonTitle: number[];
+  text: string;
+  lengths: number[];
+}
+
+type Shard = Record<string, number[]>;
+
+// exact：原来的 includes；jamo：规范化后按字母匹配；choseong：规范化后按初声匹配
+export type QueryMode = 'exact' | 'jamo' | 'choseong';
+
+// 各查询方式使用的索引目录
+const INDEX_DIRS: Record<QueryMode, string> = { exact: 'shards', jamo: 'jamo', choseong: 'choseong' };
+
+const INDEX_ROOT = '/resources/data/search';
+const INDEX_VERSION = 3;
+const MATCH_BATCH = 2048;   // 每匹配这么多候选条目让出一次事件循环，使新查询能取消当前查询
+
+// NFC + 小写，只保留文字和数字（与 build_search_index.py 的 normalize 相同）
+const normalize = (text: string): string[] =>
+  Array.from(text.normalize('NFC').toLowerCase()).filter(c => /[\p{L}\p{N}]/u.test(c));
+
+// 相邻两字，keep 为 false 的不要
+const bigrams = (chars: string[], keep: (a: string, b: string) => boolean = () => true): string[] => {
+  const grams = new Set<string>();
+  for (let i = 0; i < chars.length - 1; i++) {
+    if (keep(chars[i], chars[i + 1])) grams.add(chars[i] + chars[i + 1]);
+  }
+  return Array.from(grams);
+};
+
+// 查询需要的索引词：一个字时用单字，否则用所有相邻两字
+export const queryGrams = (query: string): string[] => {
+  const chars = normalize(query);
+  return chars.length < 2 ? chars : bigrams(chars);
+};
+
+export const queryMode = (query: string): QueryMode => {
+  const chars = normalize(query);
+  if (chars.length > 0 && chars.every(isConsonant)) return 'choseong';
+  if (chars.some(c => isSyllable(c) || isJamo(c)) && decompose(chars).length >= 2) return 'jamo';
+  return 'exact';
+};
+
+// 查询在对应索引中需要的索引词（与 build_search_index.py 的 mode_grams 相同）
+const modeGrams = (query: string, mode: QueryMode): string[] => {
+  if (mode === 'jamo') return bigrams(decompose(normalize(query)), (a, b) => isJamo(a) || isJamo(b));
+  return queryGrams(query);
+};
+
+// 字段与查询的匹配程度，不匹配时为 -1
+const matchLevel = (text: string, target: string): number => {
+  if (text === target) return MATCH_EXACT;
+  if (text.startsWith(target)) return MATCH_PREFIX;
+  return text.includes(target) ? MATCH_SUBSTRING : -1;
+};
+
+// 确认候选条目，返回 content、preview 中较好的匹配程度
+const matcher = (query: string, mode: QueryMode): ((entry: SearchEntry) => number) => {
+  const best = (a: number, b: number) => (a < 0 ? b : b < 0 ? a : Math.min(a, b));
+  if (mode === 'exact') return entry => best(matchLevel(entry.content, query), matchLevel(entry.preview, query));
+  const form = mode === 'jamo' ? decompose : choseong;
+  const target = (mode === 'jamo' ? decompose(normalize(query)) : normalize(query)).join('');
+  return entry => best(
+    matchLevel(form(normalize(entry.content)).join(''), target),
+    matchLevel(form(normalize(entry.preview)).join(''), target)
+  );
+};
+
+// 两个有序编号列表的交集
+const intersect = (a: number[], b: number[]): number[] => {
+  const result: number[] = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      result.push(a[i]);
+      i++;
+      j++;
+    } else if (a[i] < b[j]) {
+      i++;
+    } else {
+      j++;
+    }
+  }
+  return result;
+};
+
+const fetchPlainJson = async <T>(url: string): Promise<T> => {
+  const r = await fetch(url);
+  if (!r.ok) throw new Error(`加载失败: ${url}`);
+  return r.json();
+};
+
+const fetchJson = async <T>(url: string): Promise<T> => {
+  if (typeof DecompressionStream === 'undefined') return fetchPlainJson<T>(url);
+  try {
+    const r = await fetch(`${url}.gz`);
+    if (!r.ok || !r.body) throw new Error(`加载失败: ${url}.gz`);
+    return await new Response(r.body.pipeThrough(new DecompressionStream('gzip'))).json();
+  } catch {
+    // 服务器没有 .gz 文件，或已经按 Content-Encoding 解压过
+    return fetchPlainJson<T>(url);
+  }
+};
+
+// 展开按列存储的条目
+export const expandChunk = (chunk: CompactChunk, strings: string[]): SearchEntry[] => {
+  const entries: SearchEntry[] = [];
+  let offset = 0;
+  for (let k = 0; k < chunk.type.length; k++) {
+    const contentEnd = offset + chunk.lengths[2 * k];
+    const previewEnd = contentEnd + chunk.lengths[2 * k + 1];
+    entries.push({
+      type: strings[chunk.type[k]],
+      content: chunk.text.slice(offset, contentEnd),
+      preview: chunk.text.slice(contentEnd, previewEnd),
+      bookId: chunk.bookId[k],
+      lessonId: chunk.lessonId[k],
+      bookTitle: strings[chunk.bookTitle[k]],
+      lessonTitle: strings[chunk.lessonTitle[k]],
+    });
+    offset = previewEnd;
+  }
+  return entries;
+};
+
+export class ShardedSearchIndex {
+  private shards = new Map<string, Promise<Shard>>();
+  private chunks = new Map<number, Promise<SearchEntry[]>>();
+
+  private constructor(private meta: IndexMeta, private root: string) {}
+
+  static async load(root = INDEX_ROOT): Promise<ShardedSearchIndex> {
+    const meta = await fetchJson<IndexMeta>(`${root}/meta.json`);
+    if (meta.version !== INDEX_VERSION) throw new Error('搜索索引版本不匹配');
+    return new ShardedSearchIndex(meta, root);
+  }
+
+  private shardOf(gram: string): number {
+    return gram.codePointAt(0)! % this.meta.shards;
+  }
+
+  private loadShard(dir: string, id: number): Promise<Shard> {
+    const key = `${dir}/${id}`;
+    if (!this.shards.has(key)) {
+      const promise = fetchJson<Shard>(`${this.root}/${key}.json`);
+      // 失败时不缓存，下次查询重新下载
+      promise.catch(() => this.shards.delete(key));
+      this.shards.set(key, promise);
+    }
+    return this.shards.get(key)!;
+  }
+
+  private loadChunk(id: number): Promise<SearchEntry[]> {
+    if (!this.chunks.has(id)) {
+      const promise = fetchJson<CompactChunk>(`${this.root}/docs/${id}.json`)
+        .then(chunk => expandChunk(chunk, this.meta.strings));
+      promise.catch(() => this.chunks.delete(id));
+      this.chunks.set(id, promise);
+    }
+    return this.chunks.get(id)!;
+  }
+
+  // 结果与逐条用 matcher 过滤相同（exact 时即 content.includes(query) || preview.includes(query)），按条目顺序排列
+  // 每次下载之后和每批匹配之间检查 cancelled()，返回 true 时放弃查询并返回 null（已下载的文件仍然缓存）
+  async search(query: string, cancelled: () => boolean = () => false): Promise<SearchHit[] | null> {
+    const mode = queryMode(query);
+    const grams = modeGrams(query, mode);
+    if (grams.length === 0) return [];
+
+    const shardIds = Array.from(new Set(grams.map(g => this.shardOf(g))));
+    const shards = new Map<number, Shard>();
+    await Promise.all(shardIds.map(async id => shards.set(id, await this.loadShard(INDEX_DIRS[mode], id))));
+    if (cancelled()) return null;
+
+    // 从最短的倒排表开始求交集
+    const postings = grams
+      .map(g => shards.get(this.shardOf(g))![g] || [])
+      .sort((a, b) => a.length - b.length);
+    let candidates = postings[0];
+    for (let i = 1; i < postings.length && candidates.length > 0; i++) {
+      candidates = intersect(candidates, postings[i]);
+    }
+    if (candidates.length === 0) return [];
+
+    const { docChunk } = this.meta;
+    const chunkIds = Array.from(new Set(candidates.map(id => Math.floor(id / docChunk))));
+    const chunks = new Map<number, SearchEntry[]>();
+    await Promise.all(chunkIds.map(async id => chunks.set(id, await this.loadChunk(id))));
+    if (cancelled()) return null;
+
+    const match = matcher(query, mode);
+    const hits: SearchHit[] = [];
+    for (let start = 0; start < candidates.length; start += MATCH_BATCH) {
+      if (start > 0) {
+        await new Promise(resolve => setTimeout(resolve, 0));
+        if (cancelled()) return null;
+      }
+      for (const id of candidates.slice(start, start + MATCH_BATCH)) {
+        const entry = chunks.get(Math.floor(id / docChunk))![id % docChunk];
+        const level = match(entry);
+        if (level >= 0) hits.push({ id, match: level, entry });
+      }
+    }
+    return hits;
+  }
+}
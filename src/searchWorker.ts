@@ -0,0 +1,77 @@
+// 搜索 Web Worker：持有分片索引，在主线程之外查询、排序，输入时不阻塞页面渲染
+// 1. 排序：匹配程度（整个字段相同 > 开头相同 > 包含）→ 类型（单词 > 语法 > 课文 > 听力 > 阅读）→ 条目顺序
+// 2. 新查询到达后，旧查询在下一次下载完成或下一批匹配之前放弃，不再排序和发送结果（下载的分片仍然缓存）
+// 3. 最近 CACHE_SIZE 个查询的排序结果保存在 LRU 缓存中
+// 消息格式见 searchClient.ts
+
+import { ShardedSearchIndex, type SearchEntry, type SearchHit } from './searchIndex';
+
+export type WorkerRequest = { type: 'search'; id: number; query: string };
+
+export type WorkerResponse =
+  | { type: 'ready' }
+  | { type: 'error'; message: string }
+  | { type: 'results'; id: number; results: SearchEntry[] }
+  | { type: 'failed'; id: number; message: string };
+
+const CACHE_SIZE = 64;
+const TYPE_ORDER = ['单词', '语法', '课文', '听力', '阅读'];
+
+const post = (message: WorkerResponse) => self.postMessage(message);
+
+const typeRank = (type: string): number => {
+  const index = TYPE_ORDER.indexOf(type);
+  return index < 0 ? TYPE_ORDER.length : index;
+};
+
+const rank = (hits: SearchHit[]): SearchEntry[] =>
+  hits
+    .slice()
+    .sort((a, b) => a.match - b.match || typeRank(a.entry.type) - typeRank(b.entry.type) || a.id - b.id)
+    .map(hit => hit.entry);
+
+// Map 按插入顺序迭代：命中时重新插入，超出容量时删除最早的
+const cache = new Map<string, SearchEntry[]>();
+
+const cacheGet = (query: string): SearchEntry[] | undefined => {
+  const results = cache.get(query);
+  if (results) {
+    cache.delete(query);
+    cache.set(query, results);
+  }
+  return results;
+};
+
+const cacheSet = (query: string, results: SearchEntry[]) => {
+  cache.delete(query);
+  cache.set(query, results);
+  if (cache.size > CACHE_SIZE) cache.delete(cache.keys().next().value!);
+};
+
+const indexPromise = ShardedSearchIndex.load();
+indexPromise.then(
+  () => post({ type: 'ready' }),
+  (e: unknown) => post({ type: 'error', message: e instanceof Error ? e.message : String(e) })
+);
+
+let latest = 0;
+
+self.onmessage = async (event: MessageEvent<WorkerRequest>) => {
+  const { id, query } = event.data;
+  latest = id;
+
+  const cached = cacheGet(query);
+  if (cached) {
+    post({ type: 'results', id, results: cached });
+    return;
+  }
+  try {
+    const hits = await (await indexPromise).search(query, () => id !== latest);
+    if (hits === null || id !== latest) return;
+    const results = rank(hits);
+    cacheSet(query, results);
+    post({ type: 'results', id, results });
+  } catch (e) {
+    if (id === latest) post({ type: 'failed', id, message: e instanceof Error ? e.message : String(e) });
+  }
+};
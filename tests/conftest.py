@@ -0,0 +1,55 @@
+"""测试共用设置：音频脚本和文本脚本不是包，直接把所在目录加入 sys.path"""
+
+import os
+import sys
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_DIR = os.path.join(ROOT, 'resources', 'audio', 'lessons', 'book1')
+SCRIPTS_DIR = os.path.join(ROOT, 'scripts')
+
+for path in (AUDIO_DIR, SCRIPTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# 测试只用 pydub 生成和分析内存中的音频，不需要 ffmpeg
+warnings.filterwarnings('ignore', message="Couldn't find ffmpeg", category=RuntimeWarning)
+
+
+def make_sources(source_dir, text_root, lessons=1, sources=2, words=4, audio_format='wav', seed=0):
+    """用 pipeline_benchmark 生成确定性的合成原始音频和 words.json，返回 (文件数, 音频秒数)"""
+    import argparse
+
+    import pipeline_benchmark
+
+    args = argparse.Namespace(lessons=lessons, sources=sources, words=words, gap_ms=2000, jitter_ms=300,
+                              format=audio_format, seed=seed)
+    os.makedirs(source_dir, exist_ok=True)
+    return pipeline_benchmark.generate_fixtures(source_dir, text_root, args)
+
+
+def make_processor(source_dir, text_root, workers=1):
+    """与 pipeline_benchmark 相同配置的处理器（日志写到源目录的 log/ 下）"""
+    import logging
+
+    from audio_processor import AudioProcessor
+
+    processor = AudioProcessor(source_dir=source_dir, log_level=logging.WARNING, workers=workers)
+    processor.set_split_params(min_silence_len=1500, silence_thresh=-35)
+    processor.text_root = text_root
+    processor.book2_root = os.path.join(source_dir, "target")
+    os.makedirs(processor.book2_root, exist_ok=True)
+    return processor
+
+
+def output_files(directory, suffixes=('.wav', '.mp3')):
+    """目录中的输出文件 {相对路径: 内容}（不含日志和缓存）"""
+    files = {}
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != 'log']
+        for name in names:
+            if name.endswith(suffixes):
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, directory)] = f.read()
+    return files
@@ -0,0 +1,71 @@
+"""融合模式的增量缓存：输入不变时跳过，源文件内容、切割参数、编码配置任何一个变化都重新生成"""
+
+import os
+
+import pytest
+
+from conftest import make_processor, make_sources, output_files
+
+pytest.importorskip('pydub')
+pytest.importorskip('lameenc')
+
+
+@pytest.fixture
+def sources(tmp_path):
+    source_dir = str(tmp_path / "source")
+    text_root = str(tmp_path / "text")
+    make_sources(source_dir, text_root, lessons=2, sources=1, words=3)
+    return source_dir, text_root
+
+
+def run_fused(sources, configure=None):
+    """运行一次融合模式的步骤0-3，返回 (转换的文件数, 输出文件)"""
+    processor = make_processor(*sources)
+    processor.encoder_backend = "lame"
+    if configure:
+        configure(processor)
+    processor.fused_convert_to_mp3()
+    return processor.stats['converted_files'], output_files(sources[0], ('.mp3',))
+
+
+def test_unchanged_inputs_hit_cache(sources):
+    converted, first = run_fused(sources)
+    assert converted == len(first) > 0
+    converted, second = run_fused(sources)
+    assert converted == 0
+    assert second == first
+
+
+def test_changed_source_byte_rebuilds_only_that_lesson(sources):
+    _, first = run_fused(sources)
+    path = os.path.join(sources[0], "02-01_original.wav")
+    with open(path, 'r+b') as f:
+        f.seek(-1000, os.SEEK_END)   # PCM数据中的一个字节，时长和文件大小不变
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0x01]))
+
+    converted, second = run_fused(sources)
+    lesson2 = [name for name in first if name.startswith("02")]
+    assert converted == len(lesson2)
+    assert {name: data for name, data in second.items() if name.startswith("01")} == \
+           {name: data for name, data in first.items() if name.startswith("01")}
+
+
+def test_changed_split_parameter_rebuilds(sources):
+    _, first = run_fused(sources)
+    converted, _ = run_fused(sources, lambda p: p.set_split_params(min_silence_len=1400, silence_thresh=-35))
+    assert converted == len(first)
+
+
+def test_changed_encoding_profile_rebuilds(sources):
+    _, first = run_fused(sources)
+    converted, second = run_fused(sources, lambda p: p.set_encoding_profile("speech"))
+    assert converted == len(first)
+    assert second.keys() == first.keys()
+    assert all(second[name] != first[name] for name in first)
+
+    # 换回原来的配置也要重新生成，不能沿用 speech 的输出
+    converted, third = run_fused(sources)
+    assert converted == len(first)
+    assert third == first
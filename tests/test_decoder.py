@@ -0,0 +1,70 @@
+"""MP3原始音频分块解码成WAV后内存映射：PCM和切割边界与以前整体解码、导出WAV再读取的结果相同"""
+
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip('lameenc')
+
+import decoder
+from conftest import make_processor, make_sources
+from wav_stream import MappedWav
+
+
+@pytest.fixture(scope='module')
+def mp3_sources(tmp_path_factory):
+    root = tmp_path_factory.mktemp('decoder')
+    source_dir = str(root / 'source')
+    text_root = str(root / 'text')
+    make_sources(source_dir, text_root, audio_format='mp3')
+    names = sorted(f for f in os.listdir(source_dir) if f.endswith('.mp3'))
+    assert names
+    return source_dir, text_root, names
+
+
+def legacy_segments(processor, path, wav_path):
+    """以前的做法：整段解码到内存，导出WAV，再映射读取"""
+    with decoder.decode_mp3(path) as decoded:
+        decoded.export_wav(wav_path)
+    with MappedWav(wav_path) as source:
+        return processor.detect_segments(os.path.basename(path), source)
+
+
+def check_backend(mp3_sources, tmp_path, use_pcm_cache):
+    source_dir, text_root, names = mp3_sources
+    processor = make_processor(source_dir, text_root)
+    processor.use_pcm_cache = use_pcm_cache
+    for name in names:
+        path = os.path.join(source_dir, name)
+        wav_path = str(tmp_path / (name + '.wav'))
+        expected = legacy_segments(processor, path, wav_path)
+        assert expected
+
+        source = processor.open_source_audio(path)
+        try:
+            assert isinstance(source, MappedWav)
+            with open(wav_path, 'rb') as expected_wav, open(source.path, 'rb') as streamed_wav:
+                assert streamed_wav.read() == expected_wav.read()
+            assert processor.detect_segments(name, source) == expected
+        finally:
+            source.close()
+        if use_pcm_cache:
+            assert os.path.exists(source.path)
+        else:
+            assert not os.path.exists(source.path)
+
+
+@pytest.mark.parametrize('use_pcm_cache', [False, True])
+def test_streamed_decode_matches_legacy(mp3_sources, tmp_path, use_pcm_cache):
+    if decoder.miniaudio is None:
+        pytest.skip('需要 miniaudio')
+    check_backend(mp3_sources, tmp_path, use_pcm_cache)
+
+
+def test_streamed_ffmpeg_decode_matches_legacy(mp3_sources, tmp_path, monkeypatch):
+    if shutil.which('ffmpeg') is None:
+        pytest.skip('需要 ffmpeg')
+    monkeypatch.setattr(decoder, 'miniaudio', None)
+    monkeypatch.setattr(decoder, 'PIPE_READ_SIZE', 1001)   # 块边界不对齐帧
+    check_backend(mp3_sources, tmp_path, use_pcm_cache=False)
@@ -0,0 +1,52 @@
+"""ffmpeg-batch 一次编码一批片段，输出与 pydub 逐个导出的MP3逐字节相同"""
+
+import shutil
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from encoder import FfmpegBatchEncoder, PydubEncoder
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='需要 ffmpeg')
+
+
+def make_segments(count=5, frame_rate=44100, channels=2, seed=0):
+    """长度不同的合成片段（正弦音加噪声）"""
+    rng = np.random.default_rng(seed)
+    segments = []
+    for i in range(count):
+        frames = int(frame_rate * (0.3 + 0.37 * i))
+        t = np.arange(frames) / frame_rate
+        tone = 0.3 * np.sin(2 * np.pi * (220 + 110 * i) * t)
+        samples = (tone[:, None] + 0.02 * rng.standard_normal((frames, channels))) * 32767
+        pcm = np.clip(samples, -32768, 32767).astype('<i2')
+        segments.append(AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels))
+    return segments
+
+
+def encode_all(encoder, segments, directory):
+    paths = [str(directory / f'{i:02d}.mp3') for i in range(len(segments))]
+    with encoder:
+        done = []
+        for audio, path in zip(segments, paths):
+            done += encoder.submit(audio, path)
+        done += encoder.flush()
+    assert sorted(done) == sorted((path, None) for path in paths)
+    outputs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            outputs.append(f.read())
+    return outputs
+
+
+@pytest.mark.parametrize('channels,bitrate', [(2, '192k'), (1, '64k')])
+def test_batch_matches_pydub(tmp_path, channels, bitrate):
+    segments = make_segments(channels=channels)
+    (tmp_path / 'pydub').mkdir()
+    (tmp_path / 'batch').mkdir()
+    expected = encode_all(PydubEncoder(bitrate), segments, tmp_path / 'pydub')
+    # batch_size 小于片段数，覆盖多批次
+    actual = encode_all(FfmpegBatchEncoder(bitrate, batch_size=3), segments, tmp_path / 'batch')
+    assert all(expected)
+    assert actual == expected
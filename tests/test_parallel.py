@@ -0,0 +1,34 @@
+"""步骤0和步骤3并行执行（workers>1）时，输出文件和统计与串行执行逐字节相同"""
+
+import pytest
+
+from conftest import make_processor, make_sources, output_files
+
+pytest.importorskip('pydub')
+pytest.importorskip('lameenc')   # 进程内编码，不需要 ffmpeg
+
+
+def run_steps(tmp_path, workers):
+    source_dir = str(tmp_path / f"workers{workers}")
+    text_root = str(tmp_path / f"text{workers}")
+    make_sources(source_dir, text_root, lessons=2, sources=2, words=3)
+    processor = make_processor(source_dir, text_root, workers=workers)
+    processor.encoder_backend = "lame"
+
+    processor.step0_split_audio_files()
+    split = output_files(source_dir, ('.wav',))
+    processor.step1_filter_files()
+    processor.step2_reorganize_files()
+    processor.step3_convert_to_mp3()
+    return split, output_files(source_dir, ('.mp3',)), dict(processor.stats)
+
+
+def test_parallel_matches_serial(tmp_path):
+    serial_split, serial_mp3, serial_stats = run_steps(tmp_path, 1)
+    parallel_split, parallel_mp3, parallel_stats = run_steps(tmp_path, 2)
+
+    assert len(serial_split) > 4
+    assert serial_mp3
+    assert parallel_split == serial_split
+    assert parallel_mp3 == serial_mp3
+    assert parallel_stats == serial_stats
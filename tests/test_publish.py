@@ -0,0 +1,116 @@
+"""发布到目标目录：未变化时跳过、不能硬链接时退回复制、过期文件整体删除"""
+
+import os
+import re
+
+import pytest
+
+import publish
+from publish import is_unchanged, publish_file, remove_stale
+
+PUBLISHED_NAME = re.compile(r"\d+\.mp3$")
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    return src, dst
+
+
+def test_republish_is_noop(dirs):
+    src, dst = dirs
+    write(src / '1.mp3', b'abc')
+    assert publish_file(str(src / '1.mp3'), str(dst / '1.mp3')) == 'linked'
+    assert publish_file(str(src / '1.mp3'), str(dst / '1.mp3')) == 'unchanged'
+    assert sorted(os.listdir(dst)) == ['1.mp3']
+
+
+def test_copy_republish_is_noop(dirs):
+    src, dst = dirs
+    write(src / '1.mp3', b'abc')
+    assert publish_file(str(src / '1.mp3'), str(dst / '1.mp3'), 'copy') in ('reflinked', 'copied')
+    inode = os.stat(dst / '1.mp3').st_ino
+    assert publish_file(str(src / '1.mp3'), str(dst / '1.mp3'), 'copy') == 'unchanged'
+    assert os.stat(dst / '1.mp3').st_ino == inode
+
+
+def test_is_unchanged_compares_content(dirs):
+    src, dst = dirs
+    write(src / '1.mp3', b'abc')
+    write(dst / '1.mp3', b'abc')
+    os.utime(dst / '1.mp3', ns=(0, 0))
+    assert is_unchanged(str(src / '1.mp3'), str(dst / '1.mp3'))
+    # 内容相同时同步修改时间
+    assert os.stat(dst / '1.mp3').st_mtime_ns == os.stat(src / '1.mp3').st_mtime_ns
+
+    write(dst / '1.mp3', b'abd')
+    os.utime(dst / '1.mp3', ns=(0, 0))
+    assert not is_unchanged(str(src / '1.mp3'), str(dst / '1.mp3'))
+    assert not is_unchanged(str(src / '1.mp3'), str(dst / '2.mp3'))
+
+
+def test_link_falls_back_to_copy(dirs, monkeypatch):
+    src, dst = dirs
+    write(src / '1.mp3', b'abc')
+
+    def no_link(src, dst):
+        raise OSError('跨文件系统')
+
+    monkeypatch.setattr(os, 'link', no_link)
+    assert publish_file(str(src / '1.mp3'), str(dst / '1.mp3')) in ('reflinked', 'copied')
+    assert read(dst / '1.mp3') == b'abc'
+    assert os.stat(dst / '1.mp3').st_ino != os.stat(src / '1.mp3').st_ino
+    assert sorted(os.listdir(dst)) == ['1.mp3']
+
+    # 也不支持 reflink 时真正复制
+    monkeypatch.setattr(publish, 'reflink', no_link)
+    assert publish_file(str(src / '1.mp3'), str(dst / '2.mp3')) == 'copied'
+    assert read(dst / '2.mp3') == b'abc'
+
+
+def test_remove_stale(dirs):
+    _, dst = dirs
+    for name in ('1.mp3', '2.mp3', '3.mp3', 'notes.txt'):
+        write(dst / name, b'x')
+    assert remove_stale(str(dst), {'1.mp3'}, PUBLISHED_NAME) == ['2.mp3', '3.mp3']
+    assert sorted(os.listdir(dst)) == ['1.mp3', 'notes.txt']
+    assert remove_stale(str(dst), {'1.mp3'}, PUBLISHED_NAME) == []
+
+
+def test_remove_stale_is_all_or_nothing(dirs, monkeypatch):
+    _, dst = dirs
+    for name in ('1.mp3', '2.mp3', '3.mp3'):
+        write(dst / name, b'x')
+    replace = os.replace
+
+    def failing_replace(src, target):
+        if src.endswith('3.mp3') and '.stale-' in target:
+            raise OSError('模拟失败')
+        replace(src, target)
+
+    monkeypatch.setattr(os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        remove_stale(str(dst), set(), PUBLISHED_NAME)
+    assert sorted(os.listdir(dst)) == ['1.mp3', '2.mp3', '3.mp3']
+
+
+def test_remove_stale_clears_interrupted_staging(dirs):
+    _, dst = dirs
+    (dst / '.stale-1').mkdir()
+    write(dst / '.stale-1' / '2.mp3', b'x')
+    write(dst / '1.mp3', b'x')
+    assert remove_stale(str(dst), {'1.mp3'}, PUBLISHED_NAME) == []
+    assert sorted(os.listdir(dst)) == ['1.mp3']
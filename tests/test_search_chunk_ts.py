@@ -0,0 +1,66 @@
+"""按列存储的条目文件：Python 的 compact_chunk 写出的内容由 src/searchIndex.ts 的 expandChunk 还原为原来的条目"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import build_search_index as index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXT_ROOT = os.path.join(ROOT, index.TEXT_ROOT)
+JITI = os.path.join(ROOT, 'node_modules', 'jiti', 'bin', 'jiti.js')
+
+# UTF-16 长度与字符数不同的文本（代理对、组合字符），以及空字段
+EDGE_CASES = [
+    ('', ''),
+    ('😀 이모지', '表情 😀😀'),
+    ('𠮷野家', ''),
+    ('한국어', 'é 组合字符'),
+    ('', '只有预览'),
+]
+
+
+def all_documents():
+    titles = index.book_titles(os.path.join(ROOT, index.BOOKS_JSON))
+    documents = []
+    for book_id, lesson_id, lesson_path in index.lesson_dirs(TEXT_ROOT):
+        title = titles.get(book_id, index.book_title({'id': book_id}))
+        documents += index.read_lesson(lesson_path, book_id, lesson_id, title)
+    for k, (content, preview) in enumerate(EDGE_CASES):
+        documents.append({'type': '测试', 'content': content, 'preview': preview, 'bookId': 99, 'lessonId': k,
+                          'bookTitle': '测试册', 'lessonTitle': f'第{k}课'})
+    return documents
+
+
+def test_expand_chunk_ts_round_trip(tmp_path):
+    node = shutil.which('node')
+    if node is None or not os.path.exists(JITI):
+        pytest.skip('需要 node 和 node_modules/jiti')
+
+    documents = all_documents()
+    strings = index.string_table(documents)
+    chunks = [index.compact_chunk(documents[start:start + index.DOC_CHUNK], strings)
+              for start in range(0, len(documents), index.DOC_CHUNK)]
+    assert [doc for chunk in chunks for doc in index.expand_chunk(chunk, list(strings))] == documents
+
+    input_path = tmp_path / 'chunks.json'
+    # 与 index_files 写出的条目文件使用相同的编码
+    input_path.write_bytes(index.encode_json({'strings': list(strings), 'chunks': chunks}))
+    script = tmp_path / 'chunk_check.ts'
+    script.write_text(
+        f"import {{ readFileSync }} from 'fs';\n"
+        f"import {{ expandChunk }} from {json.dumps(os.path.join(ROOT, 'src', 'searchIndex'))};\n"
+        f"const data = JSON.parse(readFileSync({json.dumps(str(input_path))}, 'utf8'));\n"
+        "console.log(JSON.stringify(data.chunks.flatMap((chunk: any) => expandChunk(chunk, data.strings))));\n",
+        encoding='utf-8'
+    )
+    result = subprocess.run([node, JITI, str(script)], capture_output=True, text=True, encoding='utf-8', cwd=ROOT)
+    assert result.returncode == 0, result.stderr
+
+    actual = json.loads(result.stdout)
+    assert len(actual) == len(documents)
+    mismatches = [(expected, entry) for expected, entry in zip(documents, actual) if expected != entry]
+    assert not mismatches, mismatches[:5]
@@ -0,0 +1,128 @@
+"""韩文输入法组字中的查询：words.json 的每个单词按 初声 / 缺收音 / 未组完的字母 都能查到；
+Python 的 decompose / choseong 与 src/hangul.ts 相同"""
+
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import build_search_index as index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEXT_ROOT = os.path.join(ROOT, index.TEXT_ROOT)
+JITI = os.path.join(ROOT, 'node_modules', 'jiti', 'bin', 'jiti.js')
+
+
+def word_entries():
+    """所有 words.json 条目（read_lesson 生成的格式），顺序与索引相同"""
+    titles = index.book_titles(os.path.join(ROOT, index.BOOKS_JSON))
+    entries = []
+    for book_id, lesson_id, lesson_path in index.lesson_dirs(TEXT_ROOT):
+        title = titles.get(book_id, index.book_title({'id': book_id}))
+        for doc in index.read_lesson(lesson_path, book_id, lesson_id, title):
+            if doc['type'] == '单词':
+                entries.append(doc)
+    return entries
+
+
+def syllable_head(text):
+    """规范化后开头连续的韩文音节"""
+    chars = index.normalize(text)
+    end = 0
+    while end < len(chars) and index.is_syllable(chars[end]):
+        end += 1
+    return chars[:end]
+
+
+def partial_forms(word):
+    """输入法组字过程中会出现的查询：{名称: 查询}"""
+    last = ord(word[-1]) - index.HANGUL_BASE
+    final = index.JONGSEONG[last % 28]
+    forms = {
+        'choseong': index.choseong(word),
+        'bare_initial': word[:-1] + index.CHOSEONG[last // 588],
+    }
+    if final:
+        # 只去掉最后一个收音字母（닭 → 달，한국 → 한구）
+        shorter = index.JONGSEONG.index(final[:-1])
+        forms['dropped_final'] = word[:-1] + chr(ord(word[-1]) - last % 28 + shorter)
+    return forms
+
+
+@pytest.fixture(scope='module')
+def output_dir(tmp_path_factory):
+    output = str(tmp_path_factory.mktemp('search') / 'search')
+    index.build(TEXT_ROOT, os.path.join(ROOT, index.BOOKS_JSON), output, cache_path='', force=True)
+    return output
+
+
+@pytest.fixture(scope='module')
+def cached_reads(output_dir):
+    """每个分片和条目文件只读取一次"""
+    cache = {}
+    read_json = index.read_json
+
+    def cached(path):
+        if path not in cache:
+            cache[path] = read_json(path)
+        return cache[path]
+
+    index.read_json = cached
+    yield
+    index.read_json = read_json
+
+
+def test_partial_queries_find_every_word(output_dir, cached_reads):
+    entries = word_entries()
+    assert entries
+    checked = 0
+    failures = []
+    for doc in entries:
+        word = syllable_head(doc['content'])
+        if not word:
+            continue
+        for name, query in partial_forms(word).items():
+            results, _, _ = index.search(output_dir, query)
+            if doc not in results:
+                failures.append((doc['content'], name, query))
+            checked += 1
+    assert checked > len(entries)
+    assert not failures, failures[:20]
+
+
+def test_partial_forms():
+    assert partial_forms('한국') == {'choseong': 'ㅎㄱ', 'bare_initial': '한ㄱ', 'dropped_final': '한구'}
+    assert partial_forms('닭') == {'choseong': 'ㄷ', 'bare_initial': 'ㄷ', 'dropped_final': '달'}
+    assert partial_forms('나') == {'choseong': 'ㄴ', 'bare_initial': 'ㄴ'}
+
+
+def test_hangul_ts_agrees(tmp_path):
+    node = shutil.which('node')
+    if node is None or not os.path.exists(JITI):
+        pytest.skip('需要 node 和 node_modules/jiti')
+
+    entries = word_entries()
+    texts = sorted({doc['content'] for doc in entries} | {doc['preview'] for doc in entries})
+    texts += ['ㄳㄵㄶㄺㄻㄼㄽㄾㄿㅀㅄ', 'ㅘㅙㅚㅝㅞㅟㅢ', '값 닭 삶 읊 앉', '가힣', 'abc 123 ~']
+    input_path = tmp_path / 'texts.json'
+    input_path.write_text(json.dumps(texts, ensure_ascii=False), encoding='utf-8')
+    script = tmp_path / 'hangul_check.ts'
+    script.write_text(
+        f"import {{ readFileSync }} from 'fs';\n"
+        f"import {{ decompose, choseong }} from {json.dumps(os.path.join(ROOT, 'src', 'hangul'))};\n"
+        f"const texts: string[] = JSON.parse(readFileSync({json.dumps(str(input_path))}, 'utf8'));\n"
+        "console.log(JSON.stringify(texts.map(text => [\n"
+        "  decompose(Array.from(text)).join(''), choseong(Array.from(text)).join(''),\n"
+        "])));\n",
+        encoding='utf-8'
+    )
+    result = subprocess.run([node, JITI, str(script)], capture_output=True, text=True, encoding='utf-8', cwd=ROOT)
+    assert result.returncode == 0, result.stderr
+
+    expected = [[index.decompose(text), index.choseong(text)] for text in texts]
+    actual = json.loads(result.stdout)
+    mismatches = [(text, e, a) for text, e, a in zip(texts, expected, actual) if e != a]
+    assert len(actual) == len(texts)
+    assert not mismatches, mismatches[:20]
@@ -0,0 +1,103 @@
+"""增量生成搜索索引：修改或删除一课后，输出与全部重新生成的结果逐字节相同"""
+
+import json
+import os
+import shutil
+
+import pytest
+
+import build_search_index as index
+from conftest import output_files
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOOKS_JSON = os.path.join(ROOT, index.BOOKS_JSON)
+SOURCE_BOOK = os.path.join(ROOT, index.TEXT_ROOT, 'book1')
+SUFFIXES = ('.json', '.gz')
+
+
+@pytest.fixture
+def text_root(tmp_path):
+    """只复制第一册，保持测试很快"""
+    root = tmp_path / 'text'
+    shutil.copytree(SOURCE_BOOK, root / 'book1')
+    return str(root)
+
+
+def build_both(text_root, tmp_path, cache_path):
+    """增量生成到 incremental/，全部重新生成到 full/，返回两者的文件和增量统计"""
+    incremental = str(tmp_path / 'incremental')
+    full = str(tmp_path / 'full')
+    stats = index.build(text_root, BOOKS_JSON, incremental, cache_path=cache_path)
+    shutil.rmtree(full, ignore_errors=True)
+    index.build(text_root, BOOKS_JSON, full, cache_path='', force=True)
+    return output_files(incremental, SUFFIXES), output_files(full, SUFFIXES), stats
+
+
+def all_documents(output_dir):
+    meta = index.read_json(f'{output_dir}/meta.json')
+    documents = []
+    for chunk_id in range((meta['documents'] + meta['docChunk'] - 1) // meta['docChunk']):
+        documents += index.expand_chunk(index.read_json(f'{output_dir}/docs/{chunk_id}.json'), meta['strings'])
+    return documents
+
+
+def max_posting(output_dir):
+    highest = -1
+    for name in index.INDEXES:
+        for shard_name in os.listdir(f'{output_dir}/{name}'):
+            if shard_name.endswith('.json'):
+                for postings in index.read_json(f'{output_dir}/{name}/{shard_name}').values():
+                    highest = max(highest, max(postings))
+    return highest
+
+
+def edit_sentence(lesson_path, text):
+    path = os.path.join(lesson_path, 'dialogue.json')
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data['sentences'][0]['korean'] = text
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_changed_lesson_matches_full_rebuild(text_root, tmp_path):
+    cache_path = str(tmp_path / 'cache.json')
+    lesson_path = f'{text_root}/book1/lesson5'
+    index.build(text_root, BOOKS_JSON, str(tmp_path / 'incremental'), cache_path=cache_path)
+
+    edit_sentence(lesson_path, '증분색인시험 문장입니다')
+    incremental, full, stats = build_both(text_root, tmp_path, cache_path)
+    assert stats['reread'] == 1 and stats['written'] > 0
+    assert incremental == full
+
+    results, _, _ = index.search(str(tmp_path / 'incremental'), '증분색인시험')
+    assert [(doc['bookId'], doc['lessonId'], doc['content']) for doc in results] == [(1, 5, '증분색인시험 문장입니다')]
+
+    # 改回原文：旧的索引词也要从分片中去掉
+    shutil.copy(f'{SOURCE_BOOK}/lesson5/dialogue.json', f'{lesson_path}/dialogue.json')
+    incremental, full, stats = build_both(text_root, tmp_path, cache_path)
+    assert stats['reread'] == 1
+    assert incremental == full
+    assert index.search(str(tmp_path / 'incremental'), '증분색인시험')[0] == []
+
+
+def test_deleted_lesson_postings_disappear(text_root, tmp_path):
+    cache_path = str(tmp_path / 'cache.json')
+    output_dir = str(tmp_path / 'incremental')
+    index.build(text_root, BOOKS_JSON, output_dir, cache_path=cache_path)
+    before = all_documents(output_dir)
+    deleted = [doc for doc in before if doc['lessonId'] == 5]
+    assert deleted
+
+    shutil.rmtree(f'{text_root}/book1/lesson5')
+    incremental, full, stats = build_both(text_root, tmp_path, cache_path)
+    assert stats['removed'] == 1 and stats['reread'] == 0
+    assert incremental == full
+
+    after = all_documents(output_dir)
+    assert len(after) == len(before) - len(deleted)
+    assert all(doc['lessonId'] != 5 for doc in after)
+    # 倒排表中不再有指向被删除条目（或超出条目数）的编号
+    assert max_posting(output_dir) < len(after)
+    # 多出的条目文件被删除
+    assert len(os.listdir(f'{output_dir}/docs')) == len(os.listdir(str(tmp_path / 'full' / 'docs')))
@@ -0,0 +1,120 @@
+"""按特征区分 提示音 / 噪声 / 原音 / 跟读：合成音频上与预期标签一致，按位置筛选会错位"""
+
+import numpy as np
+import pytest
+
+from audio_processor import AudioProcessor
+from segment_classifier import KEEP_LABELS, classify_segments, pair_segments
+
+FRAME_RATE = 16000
+
+
+def beep(ms=400, freq=1000):
+    t = np.arange(FRAME_RATE * ms // 1000) / FRAME_RATE
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def noise_burst(rng, ms=300):
+    return (0.3 * rng.standard_normal(FRAME_RATE * ms // 1000)).astype(np.float32)
+
+
+# 每个“单词”：时长、基频、谐波权重的衰减、包络形状
+WORDS = [
+    (500, 130, 1.0, lambda x: np.sin(np.pi * x)),                 # 单峰
+    (900, 220, 0.7, lambda x: np.clip(2 - 2.5 * x, 0, 1)),        # 逐渐减弱
+    (700, 170, 0.5, lambda x: np.abs(np.sin(2 * np.pi * x))),     # 双峰
+    (1200, 260, 0.8, lambda x: np.clip(3 * x, 0, 1)),             # 逐渐增强
+]
+
+
+def word(index, rng, stretch=1.0, gain=1.0):
+    """谐波丰富的类语音信号；跟读用稍微不同的语速、音量和噪声"""
+    ms, f0, decay, shape = WORDS[index]
+    frames = int(FRAME_RATE * ms * stretch / 1000)
+    t = np.arange(frames) / FRAME_RATE
+    f0 = f0 * (1 + 0.03 * np.sin(2 * np.pi * 3 * t))                # 轻微的音高起伏
+    phase = 2 * np.pi * np.cumsum(f0) / FRAME_RATE
+    voiced = sum(np.sin(k * phase) / k ** decay for k in range(1, 12))
+    envelope = shape(np.linspace(0, 1, frames))
+    samples = 0.3 * gain * envelope * voiced / np.abs(voiced).max() + 0.005 * rng.standard_normal(frames)
+    return samples.astype(np.float32)
+
+
+def lesson_source(rng, extra_noise=True, odd=True):
+    """提示音 ×2，每个单词 原音 + 跟读，可选插入一段噪声和末尾一个没有跟读的单词；返回 (片段, 预期标签)"""
+    segments = [beep(), beep(freq=1200)]
+    labels = ['prompt', 'prompt']
+    for i in range(3):
+        segments += [word(i, rng), word(i, rng, stretch=1.08, gain=0.8)]
+        labels += ['target', 'repeat']
+        if extra_noise and i == 0:
+            segments.append(noise_burst(rng))
+            labels.append('noise')
+    if odd:
+        segments.append(word(3, rng))
+        labels.append('target')
+    return segments, labels
+
+
+def kept_by_position(count):
+    """原规则（片段编号从1开始）保留的下标"""
+    return [num - 1 for num in AudioProcessor.select_segments(range(1, count + 1))]
+
+
+def kept_by_features(decisions):
+    return [i for i, decision in enumerate(decisions) if decision['label'] in KEEP_LABELS]
+
+
+def test_regular_source_matches_positional_rule():
+    segments, expected = lesson_source(np.random.default_rng(0), extra_noise=False, odd=False)
+    decisions = classify_segments(segments, FRAME_RATE)
+    assert [decision['label'] for decision in decisions] == expected
+    assert kept_by_features(decisions) == kept_by_position(len(segments))
+
+
+@pytest.mark.parametrize('extra_noise,odd', [(True, False), (False, True), (True, True)])
+def test_noise_and_odd_count(extra_noise, odd):
+    segments, expected = lesson_source(np.random.default_rng(1), extra_noise=extra_noise, odd=odd)
+    decisions = classify_segments(segments, FRAME_RATE)
+    assert [decision['label'] for decision in decisions] == expected
+
+    targets = [i for i, label in enumerate(expected) if label == 'target']
+    assert kept_by_features(decisions) == targets
+    if extra_noise:
+        # 多出的噪声使按位置筛选从噪声开始整体错位：保留了噪声和跟读
+        positional = kept_by_position(len(segments))
+        assert expected.index('noise') in positional
+        assert any(expected[i] == 'repeat' for i in positional)
+
+
+def test_decision_report():
+    segments, _ = lesson_source(np.random.default_rng(2))
+    decisions = classify_segments(segments, FRAME_RATE)
+    assert [decision['reason'] for decision in decisions[:5]] == ['tonal', 'tonal', 'paired', 'similar', 'broadband']
+    assert decisions[2]['similarity_next'] > decisions[3]['similarity_next']
+    assert decisions[-1]['reason'] == 'unpaired' and decisions[-1]['similarity_next'] is None
+
+
+def test_leading_prompts_without_tones():
+    """提示音不是纯音时，开头两段语音按原规则视为提示音"""
+    rng = np.random.default_rng(3)
+    segments, expected = lesson_source(rng, extra_noise=False, odd=False)
+    segments[:2] = [word(3, rng, gain=0.5), word(3, rng, stretch=0.7)]
+    decisions = classify_segments(segments, FRAME_RATE)
+    assert [decision['label'] for decision in decisions] == expected
+    assert [decision['reason'] for decision in decisions[:2]] == ['leading', 'leading']
+
+
+def test_short_segment_is_noise():
+    rng = np.random.default_rng(4)
+    decisions = classify_segments([word(0, rng), word(0, rng)[:FRAME_RATE // 10]], FRAME_RATE)
+    assert [(decision['label'], decision['reason']) for decision in decisions][1] == ('noise', 'short')
+
+
+def test_pair_segments():
+    assert pair_segments([]) == ['target']
+    assert pair_segments([0.9, 0.9, 0.9]) == ['target', 'repeat', 'target', 'repeat']
+    # 第1、2段不相似：第1段单独保留，之后两两配对，而不是整体错位
+    assert pair_segments([0.2, 0.9, 0.3, 0.9]) == ['target', 'target', 'repeat', 'target', 'repeat']
+    assert pair_segments([0.9, 0.3, 0.2]) == ['target', 'repeat', 'target', 'target']
+    assert classify_segments([], FRAME_RATE) == []
@@ -0,0 +1,74 @@
+"""silence.detect_silence / detect_nonsilent 与 pydub.silence 的结果完全相同"""
+
+import random
+
+import pytest
+
+pydub = pytest.importorskip('pydub')
+from pydub import AudioSegment
+from pydub.generators import Sine
+import pydub.silence
+
+import silence
+
+
+PARAMS = (
+    # (min_silence_len, silence_thresh, seek_step)
+    (1000, -16, 1),
+    (300, -40, 1),
+    (500, -35, 10),
+    (150, -50, 7),
+)
+
+
+def tone(ms, freq=440, volume=-10, frame_rate=16000):
+    return Sine(freq, sample_rate=frame_rate).to_audio_segment(duration=ms, volume=volume)
+
+
+def gap(ms, frame_rate=16000):
+    return AudioSegment.silent(duration=ms, frame_rate=frame_rate)
+
+
+def random_fixture(seed):
+    """随机交替的 音调 / 静音，音量、频率、长度、声道和位深都随机"""
+    rng = random.Random(seed)
+    frame_rate = rng.choice((8000, 16000, 22050))
+    audio = gap(rng.randint(0, 800), frame_rate)
+    for _ in range(rng.randint(1, 6)):
+        audio += tone(rng.randint(20, 1500), rng.randint(100, 2000), rng.uniform(-45, -3), frame_rate)
+        audio += gap(rng.randint(0, 1500), frame_rate)
+    audio = audio.set_sample_width(rng.choice((1, 2, 4)))
+    return audio.set_channels(2) if rng.random() < 0.3 else audio
+
+
+def assert_same(audio, min_silence_len, silence_thresh, seek_step):
+    args = (min_silence_len, silence_thresh, seek_step)
+    assert silence.detect_silence(audio, *args) == pydub.silence.detect_silence(audio, *args)
+    assert silence.detect_nonsilent(audio, *args) == pydub.silence.detect_nonsilent(audio, *args)
+
+
+@pytest.mark.parametrize('params', PARAMS)
+@pytest.mark.parametrize('seed', range(30))
+def test_random_fixtures(seed, params):
+    assert_same(random_fixture(seed), *params)
+
+
+@pytest.mark.parametrize('params', PARAMS)
+@pytest.mark.parametrize('audio', [
+    pytest.param(gap(3000), id='all-silent'),
+    pytest.param(tone(3000), id='no-silence'),
+    pytest.param(tone(400) + gap(100), id='shorter-than-min-silence'),
+    pytest.param(gap(50), id='clip-shorter-than-min-silence'),
+    pytest.param(tone(800) + gap(1200) + tone(600) + gap(2000), id='silence-at-end'),
+    pytest.param(gap(1500) + tone(700), id='silence-at-start'),
+    pytest.param(tone(500, volume=-38) + gap(900) + tone(500, volume=-5), id='near-threshold'),
+])
+def test_edge_cases(audio, params):
+    assert_same(audio, *params)
+
+
+@pytest.mark.parametrize('seek_step', (2, 3, 10, 333))
+def test_seek_step_remainder(seek_step):
+    # 最后一个窗口不在 seek_step 的整数倍上时，pydub 会额外检查它
+    audio = tone(700) + gap(1234) + tone(301) + gap(1001)
+    assert_same(audio, 1000, -30, seek_step)